@@ -1,4 +1,5 @@
 """CLI интерфейс для Self-Deploy Core Service."""
+import logging
 import sys
 import json
 from pathlib import Path
@@ -6,11 +7,8 @@ from typing import Optional, Dict, Any
 
 import click
 
-from app import storage
-from app.database import Base, engine, get_db
-from app.schemas import Project, ProjectCreate, PipelineGenerationCreate
-from app.services.analyzer import analyze_repository, get_full_stack
-from app.services.pipeline_generator import generate_pipeline
+# Подсистемы (база данных, анализатор стека, генератор пайплайнов) импортируются
+# внутри команд: команде анализа не нужны SQLAlchemy и подключение к базе.
 
 
 def format_stack_to_markdown(analysis, full_stack) -> str:
@@ -83,10 +81,19 @@ def format_stack_to_markdown(analysis, full_stack) -> str:
         lines.append(", ".join(analysis.databases))
         lines.append("")
     
-    # Java версия
-    if analysis.java_version:
-        lines.append("## Java версия")
-        lines.append(analysis.java_version)
+    # Версии инструментов
+    toolchain = [
+        (title, version) for title, version in (
+            ("Java", analysis.java_version),
+            ("Go", analysis.go_version),
+            ("Node.js", analysis.node_version),
+            ("Python", analysis.python_version),
+        ) if version
+    ]
+    if toolchain:
+        lines.append("## Версии инструментов")
+        for title, version in toolchain:
+            lines.append(f"{title}: {version}")
         lines.append("")
     
     # Build tools
@@ -119,21 +126,42 @@ PROJECT_ROOT = Path(__file__).resolve().parents[2]
 
 def init_db():
     """Инициализировать базу данных."""
+    from app import models  # Регистрирует таблицы в Base.metadata
+    from app.database import Base, engine
+
     Base.metadata.create_all(bind=engine)
 
 
 @click.group()
 def cli():
     """Self-Deploy CLI - управление проектами и генерация CI/CD пайплайнов."""
-    pass
+    logging.basicConfig(level=logging.INFO)
 
 
 @cli.command()
 @click.option("--name", required=True, help="Название проекта")
 @click.option("--url", required=True, help="URL Git-репозитория")
 @click.option("--token", default="", help="Токен для клонирования репозитория")
-def add_project(name: str, url: str, token: str):
+@click.option("--enqueue", is_flag=True, help="Поставить анализ в очередь задач вместо выполнения сразу")
+@click.option("--priority", default=0, type=int, help="Приоритет задачи анализа (с --enqueue)")
+def add_project(name: str, url: str, token: str, enqueue: bool, priority: int):
     """Добавить новый проект и проанализировать его стек."""
+    from app import job_queue, storage
+    from app.database import get_db
+    from app.schemas import ProjectCreate
+    from app.services.analyzer import analyze_repository
+    
+    if enqueue:
+        try:
+            db = next(get_db())
+            project = storage.create_project(db, ProjectCreate(name=name, url=url, clone_token=token))
+            job = job_queue.enqueue_analysis(db, project.id, priority=priority)
+            click.echo(f"✓ Проект '{project.name}' добавлен (ID: {project.id}), задача анализа #{job.id} в очереди")
+        except Exception as e:
+            click.echo(f"✗ Ошибка: {e}", err=True)
+            sys.exit(1)
+        return
+
     click.echo(f"Анализ репозитория {url}...")
     
     try:
@@ -164,6 +192,9 @@ def add_project(name: str, url: str, token: str):
 @cli.command()
 def list_projects():
     """Показать список всех проектов."""
+    from app import storage
+    from app.database import get_db
+    
     db = next(get_db())
     projects = storage.list_projects(db)
     
@@ -186,8 +217,15 @@ def list_projects():
 @click.option("--output", type=click.Path(), help="Путь для сохранения пайплайна (опционально)")
 @click.option("--platform", default="gitlab", help="Платформа CI/CD (gitlab/jenkins)")
 @click.option("--stages", help="Список стадий через запятую (опционально)")
-def generate(project_id: int, output: Optional[str], platform: str, stages: Optional[str]):
+@click.option("--enqueue", is_flag=True, help="Поставить генерацию в очередь задач вместо выполнения сразу")
+@click.option("--priority", default=0, type=int, help="Приоритет задачи генерации (с --enqueue)")
+def generate(project_id: int, output: Optional[str], platform: str, stages: Optional[str], enqueue: bool, priority: int):
     """Сгенерировать CI/CD пайплайн для проекта."""
+    from app import job_queue, storage
+    from app.database import get_db
+    from app.schemas import PipelineGenerationCreate
+    from app.services.pipeline_generator import generate_pipeline
+    
     db = next(get_db())
     project = storage.get_project(db, project_id)
     
@@ -195,6 +233,26 @@ def generate(project_id: int, output: Optional[str], platform: str, stages: Opti
         click.echo(f"✗ Проект с ID {project_id} не найден", err=True)
         sys.exit(1)
     
+    # Настройки генерации
+    user_settings: Dict[str, Any] = {
+        "platform": platform,
+        "stages": stages.split(",") if stages else [],
+        "triggers": {
+            "on_push": ["main", "master"],
+            "on_merge_request": False,
+            "on_tags": "",
+            "schedule": "",
+            "manual": False,
+        },
+        "variables": {},
+    }
+    
+    if enqueue:
+        # Анализ может быть еще в очереди: задача генерации повторится, пока его нет
+        job = job_queue.enqueue_generation(db, project_id, user_settings, priority=priority)
+        click.echo(f"✓ Задача генерации #{job.id} для проекта '{project.name}' в очереди")
+        return
+    
     if not project.analysis:
         click.echo(f"✗ Для проекта {project_id} отсутствует анализ. Сначала выполните анализ.", err=True)
         sys.exit(1)
@@ -202,20 +260,6 @@ def generate(project_id: int, output: Optional[str], platform: str, stages: Opti
     click.echo(f"Генерация пайплайна для проекта '{project.name}'...")
     
     try:
-        # Настройки генерации
-        user_settings: Dict[str, Any] = {
-            "platform": platform,
-            "stages": stages.split(",") if stages else [],
-            "triggers": {
-                "on_push": ["main", "master"],
-                "on_merge_request": False,
-                "on_tags": "",
-                "schedule": "",
-                "manual": False,
-            },
-            "variables": {},
-        }
-        
         # Генерация пайплайна
         pipeline = generate_pipeline(project.analysis, user_settings)
         
@@ -253,6 +297,9 @@ def generate(project_id: int, output: Optional[str], platform: str, stages: Opti
 @click.option("--docker-compose/--no-docker-compose", default=None, help="Генерировать docker-compose.yml (по умолчанию: True если есть Docker и нет Kubernetes)")
 def generate_from_repo(url: str, token: str, output: Optional[str], platform: str, stack_output: Optional[str], docker_compose: Optional[bool]):
     """Сгенерировать CI/CD пайплайн напрямую из репозитория со всеми возможными стадиями."""
+    from app.services.analyzer import analyze_repository, get_full_stack
+    from app.services.pipeline_generator import default_pipeline_settings, generate_pipeline
+    
     click.echo(f"Анализ репозитория {url}...")
     
     try:
@@ -321,28 +368,8 @@ def generate_from_repo(url: str, token: str, output: Optional[str], platform: st
             click.echo(f"✓ Стек проекта сохранен в {stack_output}")
         
         # Настройки со всеми стадиями
-        user_settings: Dict[str, Any] = {
-            "platform": platform,
-            "stages": [
-                "pre_checks", "lint", "type_check", "security", "test",
-                "build", "docker_build", "docker_push", "integration",
-                "migration", "deploy", "post_deploy", "cleanup"
-            ],
-            "triggers": {
-                "on_push": ["main", "master"],
-                "on_merge_request": False,
-                "on_tags": "",
-                "schedule": "",
-                "manual": False,
-            },
-            "variables": {},
-            "docker_registry": "$CI_REGISTRY",
-            "docker_image": "$CI_REGISTRY_IMAGE",
-            "docker_context": analysis.docker_context if analysis.docker else ".",
-            "dockerfile_path": analysis.dockerfile_path if analysis.docker else "Dockerfile",
-            # use_docker_compose: только если флаг явно указан
-            "use_docker_compose": docker_compose if docker_compose is not None else False,
-        }
+        # use_docker_compose: только если флаг явно указан
+        user_settings = default_pipeline_settings(analysis, platform, use_docker_compose=bool(docker_compose))
         
         # Генерация пайплайна
         pipeline = generate_pipeline(analysis, user_settings)
@@ -440,42 +467,46 @@ def generate_from_repo(url: str, token: str, output: Optional[str], platform: st
 @click.option("--url", required=True, help="URL Git-репозитория")
 @click.option("--token", default="", help="Токен для клонирования репозитория")
 @click.option("--output", type=click.Path(), help="Путь для сохранения стека (JSON)")
-def analyze_repo(url: str, token: str, output: Optional[str]):
+@click.option("--path", "scope_path", help="Поддиректория репозитория для анализа (сервис монорепозитория)")
+@click.option("--modules", "detect_modules", is_flag=True, help="Определить стеки модулей монорепозитория")
+@click.option("--files-listing", type=click.Path(), help="Путь для полного списка файлов по языкам (TSV)")
+@click.option("--lines", "count_lines", is_flag=True, help="Считать доли языков также по строкам кода")
+@click.option("--progress", is_flag=True, help="Показывать ход анализа (в stderr)")
+def analyze_repo(
+    url: str,
+    token: str,
+    output: Optional[str],
+    scope_path: Optional[str],
+    detect_modules: bool,
+    files_listing: Optional[str],
+    count_lines: bool,
+    progress: bool,
+):
     """Определить стек проекта и вывести его в консоль (или сохранить в файл)."""
-    click.echo(f"Анализ репозитория {url}...")
+    from app.services.analyzer import extract_dockerfile_paths, get_full_stack
+    
+    if scope_path:
+        click.echo(f"Анализ репозитория {url} (директория {scope_path})...")
+    else:
+        click.echo(f"Анализ репозитория {url}...")
     
     try:
         # Получаем полный стек
-        stack = get_full_stack(url, token)
+        stack = get_full_stack(
+            url,
+            token,
+            scope_path=scope_path,
+            detect_modules=detect_modules,
+            files_listing_path=str(Path(files_listing).absolute()) if files_listing else None,
+            count_lines=count_lines,
+            on_event=_echo_progress if progress else None,
+        )
         
         # Формируем информацию о стеке
         # Извлекаем docker пути - все Dockerfile
         docker_context = None
         dockerfile_path = None
-        dockerfile_paths = []
-        
-        docker_all = stack.files_detected.get("docker_all") if hasattr(stack, "files_detected") else None
-        docker_files = stack.files_detected.get("docker") if hasattr(stack, "files_detected") else None
-        
-        if docker_all:
-            if isinstance(docker_all, list):
-                dockerfile_paths = docker_all
-            elif isinstance(docker_all, str):
-                dockerfile_paths = [docker_all]
-        elif docker_files:
-            if isinstance(docker_files, list):
-                dockerfile_paths = docker_files
-            elif isinstance(docker_files, str):
-                dockerfile_paths = [docker_files]
-        
-        # Убираем дубликаты
-        seen = set()
-        unique_paths = []
-        for path in dockerfile_paths:
-            if path not in seen:
-                seen.add(path)
-                unique_paths.append(path)
-        dockerfile_paths = unique_paths
+        dockerfile_paths = extract_dockerfile_paths(stack)
         
         if dockerfile_paths:
             dockerfile_path = dockerfile_paths[0]
@@ -484,7 +515,9 @@ def analyze_repo(url: str, token: str, output: Optional[str]):
             docker_context = context_path if context_path != "." else ""
         
         stack_info = {
+            "scope_path": stack.scope_path,
             "languages": stack.languages,
+            "language_stats": stack.language_stats,
             "frameworks": stack.frameworks,
             "frontend_frameworks": stack.frontend_frameworks,
             "backend_frameworks": stack.backend_frameworks,
@@ -500,43 +533,24 @@ def analyze_repo(url: str, token: str, output: Optional[str]):
             "cloud_platforms": stack.cloud_platforms,
             "build_tools": stack.build_tools,
             "cicd": stack.cicd,
+            "metrics": stack.metrics,
         }
+        if detect_modules:
+            stack_info["modules"] = _modules_info(stack.modules)
         
         # Выводим в консоль
         click.echo("\n" + "="*80)
         click.echo("ТЕХНОЛОГИЧЕСКИЙ СТЕК ПРОЕКТА")
         click.echo("="*80)
         click.echo(f"Языки: {', '.join(stack.languages) if stack.languages else 'не определены'}")
+        if stack.language_stats:
+            shares = ', '.join(f"{lang} {stats['bytes_percent']}%" for lang, stats in stack.language_stats.items())
+            click.echo(f"  Доли по объему кода: {shares}")
         click.echo(f"Фреймворки: {', '.join(stack.frameworks) if stack.frameworks else 'не определены'}")
         click.echo(f"Frontend фреймворки: {', '.join(stack.frontend_frameworks) if stack.frontend_frameworks else 'не определены'}")
         click.echo(f"Backend фреймворки: {', '.join(stack.backend_frameworks) if stack.backend_frameworks else 'не определены'}")
         click.echo(f"Менеджер пакетов: {stack.package_manager or 'не определен'}")
         click.echo(f"Тестовые раннеры: {', '.join(stack.test_runner) if stack.test_runner else 'не определены'}")
-        # Извлекаем docker пути для вывода - все Dockerfile
-        dockerfile_paths = []
-        docker_all = stack.files_detected.get("docker_all") if hasattr(stack, "files_detected") else None
-        docker_files = stack.files_detected.get("docker") if hasattr(stack, "files_detected") else None
-        
-        if docker_all:
-            if isinstance(docker_all, list):
-                dockerfile_paths = docker_all
-            elif isinstance(docker_all, str):
-                dockerfile_paths = [docker_all]
-        elif docker_files:
-            if isinstance(docker_files, list):
-                dockerfile_paths = docker_files
-            elif isinstance(docker_files, str):
-                dockerfile_paths = [docker_files]
-        
-        # Убираем дубликаты
-        seen = set()
-        unique_paths = []
-        for path in dockerfile_paths:
-            if path not in seen:
-                seen.add(path)
-                unique_paths.append(path)
-        dockerfile_paths = unique_paths
-        
         click.echo(f"Docker: {'да' if stack.docker else 'нет'}")
         if stack.docker and dockerfile_paths:
             if len(dockerfile_paths) == 1:
@@ -558,6 +572,14 @@ def analyze_repo(url: str, token: str, output: Optional[str]):
         click.echo(f"Облачные платформы: {', '.join(stack.cloud_platforms) if stack.cloud_platforms else 'не определены'}")
         click.echo(f"Инструменты сборки: {', '.join(stack.build_tools) if stack.build_tools else 'не определены'}")
         click.echo(f"CI/CD: {', '.join(stack.cicd) if stack.cicd else 'не определены'}")
+        if stack.metrics.get("vendored_dirs"):
+            click.echo(
+                f"Пропущен сторонний код: {stack.metrics['vendored_files']} файлов "
+                f"({', '.join(stack.metrics['vendored_dirs'])})"
+            )
+        if detect_modules:
+            click.echo(f"Модули: {'не найдены' if not stack.modules else ''}")
+            _echo_modules(stack.modules)
         click.echo("="*80)
         
         # Сохраняем в файл, если указан
@@ -565,6 +587,8 @@ def analyze_repo(url: str, token: str, output: Optional[str]):
             import json
             Path(output).write_text(json.dumps(stack_info, indent=2, ensure_ascii=False), encoding="utf-8")
             click.echo(f"✓ Стек сохранен в {output}")
+        if files_listing:
+            click.echo(f"✓ Список файлов по языкам сохранен в {files_listing}")
         
         click.echo("✓ Анализ завершен")
         
@@ -575,9 +599,62 @@ def analyze_repo(url: str, token: str, output: Optional[str]):
         sys.exit(1)
 
 
+def _echo_progress(event):
+    """Вывести событие хода анализа в stderr."""
+    data = event.data
+    if event.type == "cloned":
+        message = "репозиторий клонирован"
+    elif event.type == "inventory":
+        message = f"инвентаризация: {data['files']} файлов, модулей: {len(data['modules'])}"
+    elif event.type == "step":
+        module = f" [{data['module']}]" if data["module"] else ""
+        message = f"шаг {data['step']}{module}: {data['status']}"
+    elif event.type == "stack":
+        message = "анализ завершен"
+    else:
+        message = event.type
+    click.echo(f"  [{event.elapsed:7.2f}s] {message}", err=True)
+
+
+def _modules_info(modules) -> list:
+    """Сформировать описание дерева модулей для сохранения в JSON."""
+    from app.services.analyzer import extract_dockerfile_paths
+
+    return [
+        {
+            "path": module.path,
+            "source": module.source,
+            "scope_path": module.stack.scope_path,
+            "languages": module.stack.languages,
+            "frameworks": module.stack.frameworks,
+            "package_manager": module.stack.package_manager,
+            "test_runner": module.stack.test_runner,
+            "java_version": module.stack.files_detected.get("java_version"),
+            "go_version": module.stack.files_detected.get("go_version"),
+            "node_version": module.stack.files_detected.get("node_version"),
+            "python_version": module.stack.files_detected.get("python_version"),
+            "dockerfile_paths": extract_dockerfile_paths(module.stack),
+            "modules": _modules_info(module.modules),
+        }
+        for module in modules
+    ]
+
+
+def _echo_modules(modules, indent: int = 1):
+    """Вывести дерево модулей в консоль."""
+    for module in modules:
+        languages = ', '.join(module.stack.languages) or 'языки не определены'
+        frameworks = ', '.join(module.stack.frameworks)
+        click.echo(f"{'  ' * indent}{module.path} [{module.source}]: {languages}{'; ' + frameworks if frameworks else ''}")
+        _echo_modules(module.modules, indent + 1)
+
+
 @cli.command()
 def list_pipelines():
     """Показать историю генерации пайплайнов."""
+    from app import storage
+    from app.database import get_db
+    
     db = next(get_db())
     pipelines = storage.list_pipeline_generations(db)
     
@@ -594,6 +671,51 @@ def list_pipelines():
         click.echo()
 
 
+@cli.command()
+def list_jobs():
+    """Показать задачи очереди анализа и генерации."""
+    from app import job_queue
+    from app.database import get_db
+    
+    db = next(get_db())
+    jobs = job_queue.list_jobs(db)
+    
+    if not jobs:
+        click.echo("Очередь задач пуста.")
+        return
+    
+    click.echo(f"Найдено задач: {len(jobs)}\n")
+    for job in jobs:
+        click.echo(f"{job.kind} #{job.id}: {job.status}")
+        click.echo(f"  Проект ID: {job.project_id}, приоритет: {job.priority}, попытки: {job.attempts}/{job.max_attempts}")
+        if job.locked_by:
+            click.echo(f"  Обработчик: {job.locked_by}")
+        if job.last_error:
+            click.echo(f"  Последняя ошибка: {job.last_error}")
+        click.echo()
+
+
+@cli.command()
+@click.option("--once", is_flag=True, help="Выполнить одну задачу и завершиться")
+@click.option("--kind", "kinds", multiple=True, type=click.Choice(["analysis", "generation"]), help="Виды задач (по умолчанию: все)")
+@click.option("--lease", default=60.0, type=float, help="Срок аренды задачи в секундах")
+@click.option("--poll-interval", default=2.0, type=float, help="Пауза между опросами пустой очереди в секундах")
+def worker(once: bool, kinds: tuple, lease: float, poll_interval: float):
+    """Запустить обработчик очереди задач (можно запускать на нескольких машинах)."""
+    from app import job_queue
+    from app.services.worker import JobWorker
+
+    job_worker = JobWorker(lease_seconds=lease, poll_interval=poll_interval, kinds=kinds or tuple(job_queue.JOB_MODELS))
+    if once:
+        if not job_worker.run_once():
+            click.echo("Готовых задач нет.")
+        return
+    try:
+        job_worker.run_forever()
+    except KeyboardInterrupt:
+        click.echo("Обработчик остановлен")
+
+
 @cli.command()
 def init():
     """Инициализировать базу данных."""
@@ -602,6 +724,24 @@ def init():
     click.echo("✓ База данных инициализирована")
 
 
+@cli.command()
+@click.option("--host", default="127.0.0.1", help="Адрес для прослушивания")
+@click.option("--port", default=8000, type=int, help="Порт для прослушивания")
+@click.option("--workers", type=int, help="Количество рабочих потоков анализа (по умолчанию: min(4, CPU))")
+@click.option("--queue-size", default=16, type=int, help="Количество запросов в очереди, сверх него - ответ 429")
+@click.option("--timeout", default=300.0, type=float, help="Бюджет времени на анализ одного репозитория (секунды)")
+@click.option("--debounce", default=30.0, type=float, help="Пауза без новых push-событий перед повторным анализом (секунды)")
+def serve(host: str, port: int, workers: Optional[int], queue_size: int, timeout: float, debounce: float):
+    """Запустить HTTP-сервер анализа с прогретым пулом рабочих потоков."""
+    # Сервер нужен не всем командам, поэтому FastAPI и uvicorn импортируются здесь
+    import uvicorn
+    from app.server import DEFAULT_WORKERS, create_app
+
+    app = create_app(workers=workers or DEFAULT_WORKERS, queue_size=queue_size, timeout=timeout, debounce=debounce)
+    click.echo(f"Сервер анализа: http://{host}:{port}")
+    uvicorn.run(app, host=host, port=port, log_level="info")
+
+
 if __name__ == "__main__":
     cli()
 
@@ -0,0 +1,309 @@
+"""Очередь задач анализа и генерации пайплайнов в базе данных.
+
+Обработчики на разных машинах, подключенные к одной базе, забирают задачи
+через SELECT ... FOR UPDATE SKIP LOCKED: каждый пропускает строки, уже
+заблокированные другими, и не ждет их. Захват дополнительно проверяется
+условным UPDATE, поэтому на SQLite (где FOR UPDATE нет) задача тоже не
+достается двум обработчикам.
+"""
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Type
+
+from sqlalchemy import and_, select, update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.schemas import Job
+
+JOB_MODELS: Dict[str, Type[models.JobMixin]] = {
+    "analysis": models.AnalysisJobORM,
+    "generation": models.GenerationJobORM,
+}
+
+# Пауза перед повтором: BACKOFF_BASE * 2^(попытка - 1), но не больше BACKOFF_MAX (секунды)
+BACKOFF_BASE = 30.0
+BACKOFF_MAX = 3600.0
+
+
+def _to_schema(kind: str, job: models.JobMixin) -> Job:
+    settings_json = getattr(job, "settings_json", None)
+    return Job(
+        id=job.id,
+        kind=kind,
+        project_id=job.project_id,
+        status=job.status,
+        priority=job.priority,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        run_after=job.run_after,
+        locked_by=job.locked_by,
+        last_error=job.last_error,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        settings=json.loads(settings_json) if settings_json else {},
+        pipeline_generation_id=getattr(job, "pipeline_generation_id", None),
+        commit_sha=getattr(job, "commit_sha", None),
+    )
+
+
+def backoff_delay(attempts: int) -> float:
+    """Пауза в секундах перед следующей попыткой после attempts неудачных."""
+    return min(BACKOFF_BASE * 2 ** max(attempts - 1, 0), BACKOFF_MAX)
+
+
+# ---------- Постановка в очередь ----------
+
+
+def enqueue_analysis(db: Session, project_id: int, priority: int = 0, max_attempts: int = 3) -> Job:
+    job = models.AnalysisJobORM(project_id=project_id, priority=priority, max_attempts=max_attempts)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return _to_schema("analysis", job)
+
+
+def enqueue_reanalysis(
+    db: Session,
+    project_id: int,
+    commit_sha: Optional[str],
+    debounce_seconds: float,
+    max_delay_seconds: float,
+    priority: int = 0,
+) -> Job:
+    """
+    Запросить повторный анализ проекта после push с подавлением дребезга.
+
+    Если задача анализа проекта еще ждет в очереди, новая не создается:
+    в ожидающей задаче обновляется коммит, а ее запуск откладывается еще на
+    debounce_seconds, но не дальше max_delay_seconds от ее создания. Так серия
+    push-событий дает один анализ самого нового коммита. Задача, ожидающая
+    повтора после неудачного анализа (репозиторий был недоступен), тоже
+    принимает новый коммит, но ее пауза перед повтором не сокращается;
+    сохраненный анализ проекта до успешного повтора не меняется.
+
+    Args:
+        db: Сессия базы данных
+        project_id: ID проекта
+        commit_sha: Коммит push-события
+        debounce_seconds: Пауза без новых push-событий перед анализом
+        max_delay_seconds: Наибольшая задержка анализа при непрерывных push-событиях
+        priority: Приоритет задачи
+
+    Returns:
+        Созданная или обновленная задача
+    """
+    # Блокировка строки проекта упорядочивает одновременные события одного проекта
+    db.execute(select(models.ProjectORM.id).where(models.ProjectORM.id == project_id).with_for_update())
+    now = datetime.utcnow()
+    job = db.execute(
+        select(models.AnalysisJobORM)
+        .where(
+            models.AnalysisJobORM.project_id == project_id,
+            models.AnalysisJobORM.status == models.JOB_QUEUED,
+        )
+        .order_by(models.AnalysisJobORM.id)
+        .limit(1)
+    ).scalar_one_or_none()
+    if job is None:
+        job = models.AnalysisJobORM(
+            project_id=project_id,
+            commit_sha=commit_sha,
+            priority=priority,
+            run_after=now + timedelta(seconds=debounce_seconds),
+            created_at=now,
+        )
+        db.add(job)
+    else:
+        job.commit_sha = commit_sha
+        job.priority = max(job.priority, priority)
+        debounced = min(
+            now + timedelta(seconds=debounce_seconds),
+            job.created_at + timedelta(seconds=max_delay_seconds),
+        )
+        # Повтор после ошибки не запускается раньше паузы backoff_delay
+        job.run_after = max(job.run_after, debounced) if job.attempts else debounced
+    db.commit()
+    db.refresh(job)
+    return _to_schema("analysis", job)
+
+
+def enqueue_generation(
+    db: Session,
+    project_id: int,
+    settings: Dict[str, Any],
+    priority: int = 0,
+    max_attempts: int = 3,
+) -> Job:
+    job = models.GenerationJobORM(
+        project_id=project_id,
+        settings_json=json.dumps(settings, ensure_ascii=False),
+        priority=priority,
+        max_attempts=max_attempts,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return _to_schema("generation", job)
+
+
+def list_jobs(db: Session) -> List[Job]:
+    result: List[Job] = []
+    for kind, model in JOB_MODELS.items():
+        result.extend(_to_schema(kind, job) for job in db.query(model).order_by(model.id).all())
+    return sorted(result, key=lambda job: job.created_at)
+
+
+# ---------- Обработка ----------
+
+
+def claim_job(db: Session, kind: str, worker_id: str, lease_seconds: float) -> Optional[Job]:
+    """
+    Забрать готовую к выполнению задачу с наибольшим приоритетом.
+
+    Args:
+        db: Сессия базы данных
+        kind: Вид задачи (analysis/generation)
+        worker_id: Идентификатор обработчика
+        lease_seconds: Срок аренды задачи
+
+    Returns:
+        Захваченная задача или None, если готовых задач нет
+    """
+    model = JOB_MODELS[kind]
+    now = datetime.utcnow()
+    candidate = db.execute(
+        select(model.id, model.attempts)
+        .where(model.status == models.JOB_QUEUED, model.run_after <= now)
+        .order_by(model.priority.desc(), model.run_after, model.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).first()
+    if candidate is None:
+        db.rollback()
+        return None
+
+    claimed = db.execute(
+        update(model)
+        .where(
+            model.id == candidate.id,
+            model.status == models.JOB_QUEUED,
+            model.attempts == candidate.attempts,
+        )
+        .values(
+            status=models.JOB_RUNNING,
+            attempts=candidate.attempts + 1,
+            locked_by=worker_id,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            heartbeat_at=now,
+        )
+    ).rowcount
+    db.commit()
+    if not claimed:
+        # Задачу между SELECT и UPDATE забрал другой обработчик (SQLite)
+        return None
+    return _to_schema(kind, db.get(model, candidate.id, populate_existing=True))
+
+
+def heartbeat(db: Session, kind: str, job_id: int, worker_id: str, lease_seconds: float) -> bool:
+    """
+    Продлить аренду выполняемой задачи.
+
+    Returns:
+        False, если аренда уже потеряна (истекла и задача отдана другому обработчику)
+    """
+    model = JOB_MODELS[kind]
+    now = datetime.utcnow()
+    renewed = db.execute(
+        update(model)
+        .where(model.id == job_id, model.status == models.JOB_RUNNING, model.locked_by == worker_id)
+        .values(lease_expires_at=now + timedelta(seconds=lease_seconds), heartbeat_at=now)
+    ).rowcount
+    db.commit()
+    return bool(renewed)
+
+
+def complete_job(db: Session, kind: str, job_id: int, worker_id: str, **result: Any) -> bool:
+    """
+    Отметить задачу выполненной.
+
+    Args:
+        result: Дополнительные колонки результата (pipeline_generation_id)
+
+    Returns:
+        False, если аренда задачи потеряна
+    """
+    model = JOB_MODELS[kind]
+    done = db.execute(
+        update(model)
+        .where(model.id == job_id, model.status == models.JOB_RUNNING, model.locked_by == worker_id)
+        .values(
+            status=models.JOB_SUCCEEDED,
+            locked_by=None,
+            lease_expires_at=None,
+            last_error=None,
+            finished_at=datetime.utcnow(),
+            **result,
+        )
+    ).rowcount
+    db.commit()
+    return bool(done)
+
+
+def fail_job(db: Session, kind: str, job_id: int, worker_id: str, error: str) -> Optional[str]:
+    """
+    Отметить неудачную попытку: вернуть задачу в очередь с паузой или завершить ее.
+
+    Returns:
+        Новое состояние задачи или None, если аренда потеряна
+    """
+    model = JOB_MODELS[kind]
+    job = db.get(model, job_id, populate_existing=True)
+    if job is None or job.status != models.JOB_RUNNING or job.locked_by != worker_id:
+        db.rollback()
+        return None
+
+    now = datetime.utcnow()
+    if job.attempts >= job.max_attempts:
+        values = {"status": models.JOB_FAILED, "finished_at": now}
+    else:
+        values = {"status": models.JOB_QUEUED, "run_after": now + timedelta(seconds=backoff_delay(job.attempts))}
+    db.execute(
+        update(model)
+        .where(model.id == job_id, model.locked_by == worker_id)
+        .values(locked_by=None, lease_expires_at=None, last_error=error, **values)
+    )
+    db.commit()
+    return values["status"]
+
+
+def requeue_expired(db: Session, kind: str) -> int:
+    """
+    Вернуть в очередь задачи, аренда которых истекла (обработчик упал или завис).
+
+    Задачи с исчерпанными попытками завершаются с ошибкой.
+
+    Returns:
+        Количество освобожденных задач
+    """
+    model = JOB_MODELS[kind]
+    now = datetime.utcnow()
+    expired = and_(model.status == models.JOB_RUNNING, model.lease_expires_at < now)
+    released = db.execute(
+        update(model)
+        .where(expired, model.attempts >= model.max_attempts)
+        .values(
+            status=models.JOB_FAILED,
+            locked_by=None,
+            lease_expires_at=None,
+            last_error="Аренда истекла, попытки исчерпаны",
+            finished_at=now,
+        )
+    ).rowcount
+    released += db.execute(
+        update(model)
+        .where(expired)
+        .values(status=models.JOB_QUEUED, locked_by=None, lease_expires_at=None, run_after=now)
+    ).rowcount
+    db.commit()
+    return released
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -12,7 +12,8 @@ class ProjectORM(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
-    url: Mapped[str] = mapped_column(String(2048), nullable=False)
+    # Индекс: проекты ищутся по URL при приеме push-событий
+    url: Mapped[str] = mapped_column(String(2048), nullable=False, index=True)
     clone_token: Mapped[str] = mapped_column(String(4096), nullable=False)
     # Для простоты храним JSON анализа как текст (можно заменить на JSONB)
     analysis_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -36,4 +37,58 @@ class PipelineGenerationORM(Base):
     project: Mapped[Optional["ProjectORM"]] = relationship(back_populates="pipelines")
 
 
+# ---------- Очередь задач ----------
 
+JOB_QUEUED = "queued"  # Ждет свободного обработчика (или окончания паузы перед повтором)
+JOB_RUNNING = "running"  # Захвачена обработчиком, пока не истекла аренда
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"  # Исчерпаны попытки
+
+
+class JobMixin:
+    """Общие колонки задач: приоритет, повторы с паузой и аренда обработчиком."""
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    status: Mapped[str] = mapped_column(String(16), default=JOB_QUEUED, nullable=False)
+    # Задачи с большим приоритетом забираются первыми
+    priority: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=3, nullable=False)
+    # Раньше этого момента задачу не забирают (пауза перед повтором)
+    run_after: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False), default=datetime.utcnow, nullable=False
+    )
+    # Аренда: обработчик продлевает ее, пока выполняет задачу; истекшую аренду забирает другой обработчик
+    locked_by: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=False), nullable=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=False), nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False), default=datetime.utcnow, nullable=False
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=False), nullable=True)
+
+
+class AnalysisJobORM(JobMixin, Base):
+    __tablename__ = "analysis_jobs"
+    __table_args__ = (
+        Index("ix_analysis_jobs_claim", "status", "priority", "run_after"),
+    )
+
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"), nullable=False, index=True)
+    # Коммит из push-события, для которого запрошен повторный анализ
+    commit_sha: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+
+
+class GenerationJobORM(JobMixin, Base):
+    __tablename__ = "generation_jobs"
+    __table_args__ = (
+        Index("ix_generation_jobs_claim", "status", "priority", "run_after"),
+    )
+
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"), nullable=False, index=True)
+    # Настройки генерации (JSON) и результат
+    settings_json: Mapped[str] = mapped_column(Text, nullable=False)
+    pipeline_generation_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("pipeline_generations.id"), nullable=True
+    )
@@ -1,5 +1,6 @@
+import re
 from datetime import datetime
-from typing import Any, List, Literal, Optional, Union
+from typing import Any, Dict, List, Literal, Optional, Union
 
 from pydantic import BaseModel, HttpUrl, Field, field_validator
 
@@ -9,12 +10,16 @@ from pydantic import BaseModel, HttpUrl, Field, field_validator
 
 class ProjectAnalysis(BaseModel):
     languages: List[str] = []
+    language_percentages: Dict[str, float] = {}  # Доля языка в объеме кода, %
     frameworks: List[str] = []
     frontend_frameworks: List[str] = []
     backend_frameworks: List[str] = []
     package_manager: Optional[str] = None
     test_runner: Optional[str] = None
-    java_version: Optional[str] = None  # Версия Java из pom.xml
+    java_version: Optional[str] = None  # Версия Java из pom.xml / build.gradle
+    go_version: Optional[str] = None  # Версия Go из go.mod
+    node_version: Optional[str] = None  # Версия Node.js из .nvmrc / package.json (engines)
+    python_version: Optional[str] = None  # Версия Python из .python-version / pyproject.toml
     docker: bool = False
     docker_context: str = ""
     dockerfile_path: Optional[str] = None
@@ -22,6 +27,9 @@ class ProjectAnalysis(BaseModel):
     kubernetes: bool = False
     terraform: bool = False
     databases: List[str] = []
+    modules: List["ModuleAnalysis"] = []  # Анализ модулей монорепозитория
+    incomplete_steps: List[str] = []  # Шаги анализа, не завершенные к дедлайну или с ошибкой
+    commit_sha: Optional[str] = None  # Коммит, для которого выполнен анализ
 
     @field_validator("test_runner", mode="before")
     @classmethod
@@ -38,6 +46,18 @@ class ProjectAnalysis(BaseModel):
         return str(v) if v else None
 
 
+class ModuleAnalysis(BaseModel):
+    """Анализ отдельного модуля монорепозитория."""
+
+    path: str = Field(..., description="Путь модуля относительно корня анализа")
+    source: str = Field(..., description="Откуда известен модуль: workspaces, maven, gradle, go-work, directory")
+    analysis: ProjectAnalysis
+    modules: List["ModuleAnalysis"] = []
+
+
+ProjectAnalysis.model_rebuild()
+
+
 class ProjectBase(BaseModel):
     name: str = Field(..., description="Название проекта в Self-Deploy")
     url: HttpUrl = Field(..., description="URL Git-репозитория")
@@ -84,6 +104,30 @@ class PipelineGeneration(PipelineGenerationBase):
 
 
 
+# ---------- Очередь задач ----------
+
+
+class Job(BaseModel):
+    """Задача анализа или генерации пайплайна в очереди."""
+
+    id: int
+    kind: Literal["analysis", "generation"]
+    project_id: int
+    status: str
+    priority: int
+    attempts: int
+    max_attempts: int
+    run_after: datetime
+    locked_by: Optional[str] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    settings: Dict[str, Any] = {}  # Настройки генерации пайплайна
+    commit_sha: Optional[str] = None  # Коммит push-события (повторный анализ)
+    pipeline_generation_id: Optional[int] = None
+
+
+
 # ---------- Пользовательские настройки для генерации пайплайна ----------
 
 
@@ -131,4 +175,57 @@ class PipelineGenerateFromRepoRequest(BaseModel):
     token: str = Field(..., description="Токен для клонирования репозитория")
 
 
+# ---------- Режим сервера ----------
+
+# Схемы URL репозиториев, которые сервер соглашается клонировать
+REMOTE_URL_SCHEMES = ("https", "http", "ssh")
+
+
+class AnalyzeRepositoryRequest(BaseModel):
+    """Вход для анализа репозитория в режиме сервера."""
+
+    repo_url: str = Field(..., description="URL Git-репозитория (https или ssh)")
+    token: str = Field("", description="Токен для клонирования репозитория")
+    scope_path: Optional[str] = Field(None, description="Поддиректория репозитория для анализа")
+    detect_modules: bool = Field(False, description="Определить стеки модулей монорепозитория")
+
+    @field_validator("repo_url")
+    @classmethod
+    def check_repo_url(cls, v: str) -> str:
+        """Разрешает только удаленные репозитории: локальные пути и file:// отклоняются."""
+        v = v.strip()
+        if v.startswith("-"):
+            raise ValueError("URL репозитория не может начинаться с '-'")
+        scheme, sep, rest = v.partition("://")
+        if sep:
+            if scheme.lower() not in REMOTE_URL_SCHEMES or not rest.split("/", 1)[0]:
+                raise ValueError(f"Допустимы только URL {', '.join(REMOTE_URL_SCHEMES)}: {v}")
+            return v
+        # SSH в виде user@host:path
+        if re.match(r"^[\w.-]+@[\w.-]+:[^/]", v):
+            return v
+        raise ValueError(f"URL репозитория должен быть https или ssh: {v}")
+
+    @field_validator("scope_path")
+    @classmethod
+    def check_scope_path(cls, v: Optional[str]) -> Optional[str]:
+        """Путь поддиректории не может начинаться с '-' (иначе git прочтет его как опцию)."""
+        if v and v.strip().startswith("-"):
+            raise ValueError("Путь поддиректории не может начинаться с '-'")
+        return v
+
+
+class PipelineFromRepoRequest(AnalyzeRepositoryRequest):
+    """Вход для анализа репозитория и генерации пайплайна в режиме сервера."""
+
+    platform: Literal["gitlab", "jenkins"] = Field("gitlab", description="Платформа CI/CD")
+    user_settings: Dict[str, Any] = Field(
+        default_factory=dict, description="Настройки генерации (дополняют настройки по умолчанию)"
+    )
+
+
+class PipelineFromRepoResponse(BaseModel):
+    """Результат анализа репозитория и сгенерированный пайплайн."""
 
+    analysis: ProjectAnalysis
+    pipeline: str
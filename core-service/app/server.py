@@ -0,0 +1,218 @@
+"""HTTP-сервер Self-Deploy Core Service: анализ и генерация пайплайнов в долгоживущем процессе."""
+import asyncio
+import json
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.schemas import (
+    AnalyzeRepositoryRequest,
+    PipelineFromRepoRequest,
+    PipelineFromRepoResponse,
+    ProjectAnalysis,
+)
+from app.services.analyzer import AnalysisError, AnalysisInputError, analyze_repository
+from app.services.pipeline_generator import PipelineSettingsError, default_pipeline_settings, generate_pipeline
+from app.services.pool import AnalysisPool, PoolBusyError
+from app.services.webhooks import DEFAULT_DEBOUNCE, DEFAULT_MAX_DELAY, ingest_push, parse_push_event, verify_signature
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_TIMEOUT = 300.0
+
+# Запас сверх дедлайна анализа на клонирование после дедлайна и сборку ответа
+RESPONSE_GRACE = 5.0
+
+# Через сколько секунд клиенту стоит повторить запрос, отклоненный из-за занятости
+RETRY_AFTER = 5
+
+
+def _analyze_and_generate(request: PipelineFromRepoRequest, timeout: float) -> PipelineFromRepoResponse:
+    """Проанализировать репозиторий и сгенерировать пайплайн (выполняется в пуле)."""
+    analysis = analyze_repository(
+        request.repo_url,
+        request.token,
+        scope_path=request.scope_path,
+        detect_modules=request.detect_modules,
+        deadline=timeout,
+    )
+    user_settings: Dict[str, Any] = default_pipeline_settings(analysis, request.platform)
+    user_settings.update(request.user_settings)
+    pipeline = generate_pipeline(analysis, user_settings)
+    return PipelineFromRepoResponse(analysis=analysis, pipeline=pipeline)
+
+
+def create_app(
+    workers: int = DEFAULT_WORKERS,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    timeout: float = DEFAULT_TIMEOUT,
+    debounce: float = DEFAULT_DEBOUNCE,
+    max_delay: float = DEFAULT_MAX_DELAY,
+    webhook_secret: Optional[str] = None,
+) -> FastAPI:
+    """
+    Создать приложение сервера с прогретым пулом анализа.
+
+    Каждый запрос выполняется в пуле рабочих потоков с дедлайном timeout:
+    шаги анализа, не успевшие к дедлайну, перечисляются в incomplete_steps
+    ответа. Если пул и очередь заполнены, запрос сразу отклоняется с 429.
+    Push-события (POST /webhook/push) не анализируются сразу, а ставят
+    повторный анализ в очередь задач базы данных (обрабатывает cli.py worker).
+
+    Args:
+        workers: Количество рабочих потоков анализа
+        queue_size: Количество запросов, ожидающих свободный поток
+        timeout: Бюджет времени на анализ одного репозитория в секундах
+        debounce: Пауза без новых push-событий проекта перед повторным анализом
+        max_delay: Наибольшая задержка повторного анализа при непрерывных push-событиях
+        webhook_secret: Секрет вебхука (по умолчанию: переменная окружения WEBHOOK_SECRET,
+            без секрета подпись событий не проверяется)
+
+    Returns:
+        FastAPI
+    """
+    pool = AnalysisPool(workers, queue_size)
+    webhook_secret = webhook_secret or os.getenv("WEBHOOK_SECRET")
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await asyncio.to_thread(pool.warm_up)
+        yield
+        pool.shutdown(wait=False)
+
+    app = FastAPI(title="Self-Deploy Core Service", lifespan=lifespan)
+
+    def submit(func, *args, **kwargs):
+        """Поставить задачу в пул (429, если пул и очередь заполнены)."""
+        try:
+            return pool.submit(func, *args, **kwargs)
+        except PoolBusyError as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(RETRY_AFTER)})
+
+    async def run_in_pool(func, *args, **kwargs):
+        """
+        Выполнить задачу в пуле и дождаться результата с учетом дедлайна.
+
+        Ошибки входных данных (поддиректория, настройки пайплайна) - 422,
+        недоступный репозиторий - 502, превышение дедлайна - 504.
+        """
+        future = submit(func, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout + RESPONSE_GRACE)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail=f"Анализ не завершился за {timeout:g} с")
+        except (AnalysisInputError, PipelineSettingsError) as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except AnalysisError as e:
+            # Репозиторий не получен (недоступен, нет прав): ошибка вышестоящего сервера
+            logger.warning(f"Анализ не выполнен: {e}")
+            raise HTTPException(status_code=502, detail=str(e))
+        except Exception as e:
+            logger.exception("Ошибка обработки запроса")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @app.get("/health")
+    async def health() -> Dict[str, Any]:
+        """Состояние сервера и загрузка пула."""
+        return {
+            "status": "ok",
+            "workers": pool.workers,
+            "queue_size": pool.queue_size,
+            "pending": pool.pending,
+        }
+
+    @app.post("/analyze", response_model=ProjectAnalysis)
+    async def analyze(request: AnalyzeRepositoryRequest) -> ProjectAnalysis:
+        """Проанализировать технологический стек репозитория."""
+        return await run_in_pool(
+            analyze_repository,
+            request.repo_url,
+            request.token,
+            scope_path=request.scope_path,
+            detect_modules=request.detect_modules,
+            deadline=timeout,
+        )
+
+    @app.post("/analyze/stream")
+    async def analyze_stream(request: AnalyzeRepositoryRequest) -> StreamingResponse:
+        """
+        Проанализировать репозиторий, передавая ход анализа потоком NDJSON.
+
+        Каждая строка - событие detect_stack (cloned, inventory, step с
+        заполненными шагом полями), последняя - result с ProjectAnalysis
+        или error.
+        """
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+
+        def on_event(event):
+            # Итоговый стек заменяется строкой result с ProjectAnalysis
+            if event.type != "stack":
+                loop.call_soon_threadsafe(events.put_nowait, event.to_dict())
+
+        future = submit(
+            analyze_repository,
+            request.repo_url,
+            request.token,
+            scope_path=request.scope_path,
+            detect_modules=request.detect_modules,
+            deadline=timeout,
+            on_event=on_event,
+        )
+        # События ставятся в очередь раньше, чем задача завершается, поэтому None - последний
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(events.put_nowait, None))
+
+        async def stream():
+            while True:
+                item = await events.get()
+                if item is None:
+                    break
+                yield json.dumps(item, ensure_ascii=False, default=str) + "\n"
+            try:
+                line = {"event": "result", "analysis": future.result().model_dump()}
+            except Exception as e:
+                logger.exception("Ошибка обработки запроса")
+                line = {"event": "error", "detail": str(e)}
+            yield json.dumps(line, ensure_ascii=False, default=str) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    @app.post("/pipeline", response_model=PipelineFromRepoResponse)
+    async def pipeline(request: PipelineFromRepoRequest) -> PipelineFromRepoResponse:
+        """Проанализировать репозиторий и сгенерировать CI/CD пайплайн."""
+        return await run_in_pool(_analyze_and_generate, request, timeout)
+
+    @app.post("/webhook/push")
+    async def webhook_push(request: Request):
+        """Принять push-событие GitLab/GitHub и поставить повторный анализ в очередь."""
+        body = await request.body()
+        if webhook_secret and not verify_signature(webhook_secret, body, request.headers):
+            raise HTTPException(status_code=401, detail="Неверная подпись события")
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Тело события - не JSON")
+        event = parse_push_event(payload) if isinstance(payload, dict) else None
+        if event is None:
+            return {"status": "ignored", "jobs": []}
+
+        def ingest():
+            # База данных нужна только вебхукам: сервер анализа запускается без драйвера БД
+            from app.database import SessionLocal
+
+            with SessionLocal() as db:
+                return ingest_push(db, event, debounce, max_delay)
+
+        jobs = await asyncio.to_thread(ingest)
+        return JSONResponse(
+            status_code=202 if jobs else 200,
+            content={"status": "queued" if jobs else "ignored", "jobs": [job.id for job in jobs]},
+        )
+
+    return app
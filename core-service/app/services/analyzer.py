@@ -1,80 +1,101 @@
 """Сервис для анализа технологического стека репозитория."""
+import copy
+import logging
 import sys
-import os
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Callable, List, Optional
 
-# Добавляем путь к корню проекта в sys.path для правильной работы импортов
+# stack_recognize - пакет в корне проекта
 PROJECT_ROOT = Path(__file__).resolve().parents[3]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-# Устанавливаем PYTHONPATH
-os.environ['PYTHONPATH'] = str(PROJECT_ROOT) + os.pathsep + os.environ.get('PYTHONPATH', '')
-
-# Импортируем через sys.path (stack_recognize должен быть в PYTHONPATH)
-try:
-    # Пробуем импортировать как пакет
-    import stack_recognize.detector as detector_module
-    ProjectStackDetector = detector_module.ProjectStackDetector
-except ImportError:
-    # Если не работает, пробуем прямой импорт
-    STACK_RECOGNIZE_PATH = PROJECT_ROOT / "stack_recognize"
-    sys.path.insert(0, str(STACK_RECOGNIZE_PATH))
-    
-    # Загружаем модули в правильном порядке через importlib
-    import importlib.util
-    
-    # models
-    models_spec = importlib.util.spec_from_file_location("stack_recognize.models", STACK_RECOGNIZE_PATH / "models.py")
-    models_module = importlib.util.module_from_spec(models_spec)
-    sys.modules['stack_recognize.models'] = models_module
-    sys.modules['models'] = models_module
-    models_spec.loader.exec_module(models_module)
-    
-    # config
-    config_spec = importlib.util.spec_from_file_location("stack_recognize.config", STACK_RECOGNIZE_PATH / "config.py")
-    config_module = importlib.util.module_from_spec(config_spec)
-    sys.modules['stack_recognize.config'] = config_module
-    sys.modules['config'] = config_module
-    config_spec.loader.exec_module(config_module)
-    
-    # utils
-    utils_spec = importlib.util.spec_from_file_location("stack_recognize.utils", STACK_RECOGNIZE_PATH / "utils.py")
-    utils_module = importlib.util.module_from_spec(utils_spec)
-    sys.modules['stack_recognize.utils'] = utils_module
-    sys.modules['utils'] = utils_module
-    utils_spec.loader.exec_module(utils_module)
-    
-    # analyzers пакет
-    analyzers_path = STACK_RECOGNIZE_PATH / "analyzers"
-    analyzers_init = importlib.util.spec_from_file_location("stack_recognize.analyzers", analyzers_path / "__init__.py")
-    analyzers_pkg = importlib.util.module_from_spec(analyzers_init)
-    sys.modules['stack_recognize.analyzers'] = analyzers_pkg
-    sys.modules['analyzers'] = analyzers_pkg
-    analyzers_init.loader.exec_module(analyzers_pkg)
-    
-    # Загружаем каждый анализатор
-    for analyzer_file in sorted(analyzers_path.glob("*.py")):
-        if analyzer_file.name != "__init__.py":
-            module_name = analyzer_file.stem
-            spec = importlib.util.spec_from_file_location(
-                f"stack_recognize.analyzers.{module_name}", 
-                analyzer_file
-            )
-            module = importlib.util.module_from_spec(spec)
-            sys.modules[f"stack_recognize.analyzers.{module_name}"] = module
-            sys.modules[f"analyzers.{module_name}"] = module
-            spec.loader.exec_module(module)
-    
-    # detector
-    detector_spec = importlib.util.spec_from_file_location("stack_recognize.detector", STACK_RECOGNIZE_PATH / "detector.py")
-    detector_module = importlib.util.module_from_spec(detector_spec)
-    sys.modules['stack_recognize.detector'] = detector_module
-    sys.modules['detector'] = detector_module
-    detector_spec.loader.exec_module(detector_module)
-    ProjectStackDetector = detector_module.ProjectStackDetector
-from app.schemas import ProjectAnalysis
+from stack_recognize.config import load_config
+from stack_recognize.detector import ProjectStackDetector
+from app.services.singleflight import SingleFlight
+
+if TYPE_CHECKING:
+    from app.schemas import ModuleAnalysis, ProjectAnalysis
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisError(Exception):
+    """Анализ не выполнен: репозиторий не клонирован или сессия анализа не открыта."""
+
+
+class AnalysisInputError(AnalysisError):
+    """Анализ не выполнен из-за входных данных (например, поддиректория не найдена)."""
+
+
+_detector: Optional[ProjectStackDetector] = None
+_detector_lock = threading.Lock()
+
+# Выполняющиеся анализы: одинаковые одновременные запросы ждут первый
+_analyses = SingleFlight()
+
+
+def get_detector() -> ProjectStackDetector:
+    """
+    Общий для процесса детектор стека.
+
+    Детектор потокобезопасен, поэтому один экземпляр с уже скомпилированными
+    правилами обслуживает все вызовы анализа. При каждом вызове сверяется
+    хэш файла конфигурации: если файл изменился, создается новый детектор
+    (анализы, уже выполняющиеся на старом, доработают с ним). Если новый
+    файл не разбирается, остается прежний детектор.
+
+    Returns:
+        ProjectStackDetector
+    """
+    global _detector
+    with _detector_lock:
+        if _detector is None:
+            _detector = ProjectStackDetector()
+            return _detector
+        config_path = str(_detector.config_loader.config_path)
+        try:
+            if load_config(config_path).version != _detector.ruleset.version:
+                _detector = ProjectStackDetector(config_path)
+                logger.info(f"Конфигурация детектора изменилась, версия {_detector.ruleset.version[:12]}")
+        except ValueError as e:
+            logger.error(f"Конфигурация детектора не обновлена: {e}")
+        return _detector
+
+
+def _detect_stack(auth_url: str, **kwargs):
+    """
+    Проанализировать репозиторий, объединяя одновременные одинаковые запросы.
+
+    Ключ - URL (вместе с токеном: результат закрытого репозитория не
+    достается вызывающему без доступа), ветка и версия конфигурации
+    детектора, а также все параметры анализа. Детектор клонирует ветку по
+    умолчанию, поэтому ветка в ключе - HEAD. Вызовы, пришедшие, пока
+    анализ с тем же ключом выполняется, не клонируют репозиторий заново,
+    а получают копию его результата. События хода анализа (on_event)
+    получает только вызывающий, запустивший анализ.
+
+    Args:
+        auth_url: URL Git-репозитория (с токеном, если нужен)
+        **kwargs: Параметры ProjectStackDetector.detect_stack
+
+    Returns:
+        ProjectStack
+    """
+    detector = get_detector()
+    params = tuple(sorted(
+        (name, tuple(value) if name == "fields" and value is not None else value)
+        for name, value in kwargs.items()
+        if name != "on_event"
+    ))
+    key = (auth_url, "HEAD", detector.ruleset.version, params)
+    stack, shared = _analyses.do(key, lambda: detector.detect_stack(auth_url, **kwargs))
+    if shared:
+        logger.info("Результат получен от одновременного анализа того же репозитория")
+        # Результат принадлежит первому вызову, вызывающие не должны делить один объект
+        stack = copy.deepcopy(stack)
+    return stack
 
 
 def _build_authenticated_url(repo_url: str, token: Optional[str]) -> str:
@@ -97,48 +118,8 @@ def _build_authenticated_url(repo_url: str, token: Optional[str]) -> str:
     return f"{scheme}://{token}@{rest}"
 
 
-def _extract_java_version_from_pom(stack) -> Optional[str]:
-    """Извлечь версию Java из pom.xml файлов."""
-    import re
-    import xml.etree.ElementTree as ET
-    
-    # Получаем все pom.xml файлы
-    pom_files = []
-    if hasattr(stack, "files_detected"):
-        pom_files_list = stack.files_detected.get("pom_xml") or []
-        if isinstance(pom_files_list, list):
-            pom_files = pom_files_list
-        elif isinstance(pom_files_list, str):
-            pom_files = [pom_files_list]
-    
-    # Если нет в files_detected, пробуем найти через другие источники
-    if not pom_files and hasattr(stack, "files_detected"):
-        # Ищем pom.xml в других ключах
-        for key, value in stack.files_detected.items():
-            if "pom" in key.lower() or "maven" in key.lower():
-                if isinstance(value, list):
-                    pom_files.extend(value)
-                elif isinstance(value, str) and "pom.xml" in value:
-                    pom_files.append(value)
-    
-    # Пробуем найти версию Java в pom.xml
-    for pom_path in pom_files:
-        try:
-            # Если это путь относительно репозитория, нужно получить полный путь
-            # Но у нас нет доступа к repo_path здесь, поэтому пробуем просто прочитать
-            # В реальности это должно работать при анализе репозитория
-            pass
-        except:
-            pass
-    
-    # Возвращаем None, если не удалось определить
-    return None
-
-def _convert_stack_to_analysis(stack) -> ProjectAnalysis:
-    """Конвертировать ProjectStack в ProjectAnalysis."""
-    # Извлечение docker путей - получаем все Dockerfile
-    docker_context = None
-    dockerfile_path = None
+def extract_dockerfile_paths(stack) -> List[str]:
+    """Получить все Dockerfile стека без дубликатов (пути относительно корня репозитория)."""
     dockerfile_paths = []
     
     # Получаем все Dockerfile из docker_all или docker
@@ -157,6 +138,11 @@ def _convert_stack_to_analysis(stack) -> ProjectAnalysis:
         elif isinstance(docker_files, str):
             dockerfile_paths = [docker_files]
     
+    # При анализе поддиректории пути указаны относительно нее
+    scope_path = getattr(stack, "scope_path", None)
+    if scope_path:
+        dockerfile_paths = [f"{scope_path}/{path}" for path in dockerfile_paths]
+    
     # Убираем дубликаты и сохраняем порядок
     seen = set()
     unique_paths = []
@@ -164,7 +150,18 @@ def _convert_stack_to_analysis(stack) -> ProjectAnalysis:
         if path not in seen:
             seen.add(path)
             unique_paths.append(path)
-    dockerfile_paths = unique_paths
+    return unique_paths
+
+
+def _convert_stack_to_analysis(stack) -> "ProjectAnalysis":
+    """Конвертировать ProjectStack в ProjectAnalysis."""
+    # pydantic нужен только при конвертации, команды анализа стека его не импортируют
+    from app.schemas import ProjectAnalysis
+
+    # Извлечение docker путей - получаем все Dockerfile
+    docker_context = None
+    dockerfile_path = None
+    dockerfile_paths = extract_dockerfile_paths(stack)
     
     # Определяем основной Dockerfile (первый) и его контекст
     if dockerfile_paths:
@@ -189,14 +186,25 @@ def _convert_stack_to_analysis(stack) -> ProjectAnalysis:
         if normalized in allowed_languages and normalized not in filtered_languages:
             filtered_languages.append(normalized)
     
+    # Доли языков по объему кода (байты)
+    language_percentages = {}
+    for lang, stats in (getattr(stack, "language_stats", None) or {}).items():
+        normalized = 'java' if lang in {'kotlin', 'java'} else lang
+        if normalized in allowed_languages:
+            language_percentages[normalized] = language_percentages.get(normalized, 0.0) + stats.get("bytes_percent", 0.0)
+    
     return ProjectAnalysis(
         languages=filtered_languages,
+        language_percentages=language_percentages,
         frameworks=stack.frameworks,
         frontend_frameworks=stack.frontend_frameworks,
         backend_frameworks=stack.backend_frameworks,
         package_manager=stack.package_manager,
         test_runner=test_runner,
-        java_version=None,  # Будет установлено в analyze_repository
+        java_version=stack.files_detected.get('java_version'),
+        go_version=stack.files_detected.get('go_version'),
+        node_version=stack.files_detected.get('node_version'),
+        python_version=stack.files_detected.get('python_version'),
         docker=stack.docker,
         docker_context=docker_context or "",
         dockerfile_path=dockerfile_path,
@@ -204,85 +212,130 @@ def _convert_stack_to_analysis(stack) -> ProjectAnalysis:
         kubernetes=stack.kubernetes,
         terraform=stack.terraform,
         databases=stack.databases,
+        modules=_convert_modules(getattr(stack, "modules", [])),
+        incomplete_steps=[
+            step for step, status in stack.metrics.get("steps", {}).items() if status != "complete"
+        ],
+        commit_sha=getattr(stack, "commit_sha", None),
     )
 
 
-def _extract_java_version_from_pom(repo_path: Path) -> Optional[str]:
-    """Извлечь версию Java из pom.xml файлов в репозитории."""
-    import re
-    
-    # Ищем все pom.xml файлы
-    pom_files = list(repo_path.rglob("pom.xml"))
-    if not pom_files:
-        return None
-    
-    # Пробуем найти версию Java в каждом pom.xml
-    for pom_file in pom_files:
-        try:
-            with open(pom_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Ищем maven.compiler.release, source, target или java.version
-            patterns = [
-                r'<maven\.compiler\.release>(\d+)</maven\.compiler\.release>',
-                r'<maven\.compiler\.source>(\d+)</maven\.compiler\.source>',
-                r'<maven\.compiler\.target>(\d+)</maven\.compiler\.target>',
-                r'<java\.version>(\d+)</java\.version>',
-                r'<javaVersion>(\d+)</javaVersion>',
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, content)
-                if match:
-                    version = match.group(1)
-                    # Нормализуем версию (например, 21 -> 21, 1.8 -> 8)
-                    if version.startswith('1.'):
-                        version = version[2:]
-                    return version
-        except Exception:
-            continue
-    
-    return None
+def _convert_modules(modules) -> List["ModuleAnalysis"]:
+    """Конвертировать дерево ModuleStack в дерево ModuleAnalysis."""
+    from app.schemas import ModuleAnalysis
+
+    result = []
+    for module in modules:
+        analysis = _convert_stack_to_analysis(module.stack)
+        result.append(ModuleAnalysis(
+            path=module.path,
+            source=module.source,
+            analysis=analysis,
+            modules=_convert_modules(module.modules),
+        ))
+    return result
 
-def analyze_repository(repo_url: str, token: str = "") -> ProjectAnalysis:
+
+# Поля ProjectStack, из которых строится ProjectAnalysis (остальные анализаторы не запускаются)
+ANALYSIS_FIELDS = (
+    "languages",
+    "language_stats",
+    "frameworks",
+    "frontend_frameworks",
+    "backend_frameworks",
+    "package_manager",
+    "test_runner",
+    "docker",
+    "kubernetes",
+    "terraform",
+    "databases",
+    "toolchain_versions",
+)
+
+
+def analyze_repository(
+    repo_url: str,
+    token: str = "",
+    scope_path: Optional[str] = None,
+    detect_modules: bool = False,
+    deadline: Optional[float] = None,
+    on_event: Optional[Callable] = None,
+) -> "ProjectAnalysis":
     """
     Проанализировать репозиторий и вернуть анализ стека.
     
     Args:
         repo_url: URL Git-репозитория
         token: Токен для клонирования (опционально)
+        scope_path: Поддиректория репозитория для анализа (опционально)
+        detect_modules: Определить стеки модулей монорепозитория за один анализ
+        deadline: Бюджет времени на анализ в секундах (незавершенные шаги - в incomplete_steps)
+        on_event: Обработчик событий хода анализа (см. ProjectStackDetector.detect_stack)
     
     Returns:
         ProjectAnalysis: Анализ технологического стека
+
+    Raises:
+        AnalysisInputError: Анализ невозможен для переданных параметров (поддиректория)
+        AnalysisError: Анализ не выполнен (например, репозиторий недоступен)
     """
-    detector = ProjectStackDetector()
     auth_url = _build_authenticated_url(repo_url, token)
-    stack = detector.detect_stack(auth_url)
-    
-    # Извлекаем версию Java из stack.files_detected (определяется в detector)
-    java_version = stack.files_detected.get('java_version') if hasattr(stack, 'files_detected') else None
-    
-    analysis = _convert_stack_to_analysis(stack)
-    
-    # Сохраняем версию Java в анализ, если она определена
-    if java_version:
-        analysis.java_version = java_version
-    
-    return analysis
+    stack = _detect_stack(
+        auth_url,
+        scope_path=scope_path,
+        detect_modules=detect_modules,
+        fields=ANALYSIS_FIELDS,
+        deadline=deadline,
+        on_event=on_event,
+    )
+    _check_analysis(stack, token)
+    return _convert_stack_to_analysis(stack)
+
 
+def _check_analysis(stack, token: str = ""):
+    """Поднять AnalysisError, если детектор не выполнил ни одного шага анализа."""
+    error = stack.metrics.get("error")
+    if not error and stack.metrics.get("steps"):
+        return
+    message = error["message"] if error else "шаги анализа не выполнены"
+    if token:
+        # Сообщение git может содержать URL с токеном
+        message = message.replace(token, "***")
+    error_type = AnalysisInputError if error and error["input"] else AnalysisError
+    raise error_type(f"Анализ репозитория не выполнен: {message}")
 
-def get_full_stack(repo_url: str, token: str = ""):
+
+def get_full_stack(
+    repo_url: str,
+    token: str = "",
+    scope_path: Optional[str] = None,
+    detect_modules: bool = False,
+    files_listing_path: Optional[str] = None,
+    count_lines: bool = False,
+    on_event: Optional[Callable] = None,
+):
     """
     Получить полный стек проекта (ProjectStack объект).
     
     Args:
         repo_url: URL Git-репозитория
         token: Токен для клонирования (опционально)
+        scope_path: Поддиректория репозитория для анализа (опционально)
+        detect_modules: Определить стеки модулей монорепозитория за один анализ
+        files_listing_path: Файл для полного списка файлов по языкам (опционально)
+        count_lines: Считать доли языков также по строкам
+        on_event: Обработчик событий хода анализа (см. ProjectStackDetector.detect_stack)
     
     Returns:
         ProjectStack: Полный объект стека
     """
-    detector = ProjectStackDetector()
     auth_url = _build_authenticated_url(repo_url, token)
-    return detector.detect_stack(auth_url)
+    return _detect_stack(
+        auth_url,
+        scope_path=scope_path,
+        detect_modules=detect_modules,
+        files_listing_path=files_listing_path,
+        count_lines=count_lines,
+        on_event=on_event,
+    )
 
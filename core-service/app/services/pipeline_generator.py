@@ -1,34 +1,88 @@
 """Сервис для генерации CI/CD пайплайнов."""
 import sys
+import threading
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
-# Добавляем путь к ci_generator в sys.path
+# ci_generator импортирует свои плагины как пакеты верхнего уровня (plugins.*)
 PROJECT_ROOT = Path(__file__).resolve().parents[3]
 CI_GENERATOR_PATH = PROJECT_ROOT / "ci_generator"
 if str(CI_GENERATOR_PATH) not in sys.path:
     sys.path.insert(0, str(CI_GENERATOR_PATH))
 
-try:
-    from generator.stage_selector import select_stages
-    from generator.renderer import PipelineRenderer
-except ImportError:
-    # Попытка прямого импорта
-    import importlib.util
-    
-    # Импорт stage_selector
-    spec = importlib.util.spec_from_file_location("stage_selector", CI_GENERATOR_PATH / "generator" / "stage_selector.py")
-    stage_selector_module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(stage_selector_module)
-    select_stages = stage_selector_module.select_stages
-    
-    # Импорт renderer
-    spec = importlib.util.spec_from_file_location("renderer", CI_GENERATOR_PATH / "generator" / "renderer.py")
-    renderer_module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(renderer_module)
-    PipelineRenderer = renderer_module.PipelineRenderer
+from generator.stage_selector import select_stages
+from generator.renderer import PipelineRenderer
 from app.schemas import ProjectAnalysis
 
+# Все стадии, которые может содержать пайплайн
+ALL_STAGES = [
+    "pre_checks", "lint", "type_check", "security", "test",
+    "build", "docker_build", "docker_push", "integration",
+    "migration", "deploy", "post_deploy", "cleanup"
+]
+
+
+
+class PipelineSettingsError(ValueError):
+    """Недопустимые настройки генерации пайплайна (например, неизвестная платформа)."""
+
+
+_renderer: Optional[PipelineRenderer] = None
+_renderer_lock = threading.Lock()
+
+
+def get_renderer() -> PipelineRenderer:
+    """
+    Общий для процесса рендерер пайплайнов.
+
+    Окружение Jinja2 кэширует скомпилированные шаблоны, поэтому один
+    экземпляр рендерера не компилирует шаблоны стадий повторно.
+
+    Returns:
+        PipelineRenderer
+    """
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            templates_root = CI_GENERATOR_PATH / "pipelines"
+            _renderer = PipelineRenderer(templates_root=str(templates_root))
+        return _renderer
+
+
+def default_pipeline_settings(
+    analysis: ProjectAnalysis,
+    platform: str = "gitlab",
+    use_docker_compose: bool = False,
+) -> Dict[str, Any]:
+    """
+    Настройки генерации пайплайна со всеми стадиями.
+
+    Args:
+        analysis: Анализ технологического стека
+        platform: Платформа CI/CD (gitlab/jenkins)
+        use_docker_compose: Деплой через docker-compose
+
+    Returns:
+        Dict[str, Any]: Настройки для generate_pipeline
+    """
+    return {
+        "platform": platform,
+        "stages": list(ALL_STAGES),
+        "triggers": {
+            "on_push": ["main", "master"],
+            "on_merge_request": False,
+            "on_tags": "",
+            "schedule": "",
+            "manual": False,
+        },
+        "variables": {},
+        "docker_registry": "$CI_REGISTRY",
+        "docker_image": "$CI_REGISTRY_IMAGE",
+        "docker_context": analysis.docker_context if analysis.docker else ".",
+        "dockerfile_path": analysis.dockerfile_path if analysis.docker else "Dockerfile",
+        "use_docker_compose": use_docker_compose,
+    }
+
 
 def generate_pipeline(analysis: ProjectAnalysis, user_settings: Dict[str, Any]) -> str:
     """
@@ -44,12 +98,16 @@ def generate_pipeline(analysis: ProjectAnalysis, user_settings: Dict[str, Any])
     # Конвертация ProjectAnalysis в словарь
     analysis_dict = {
         "languages": analysis.languages,
+        "language_percentages": analysis.language_percentages,
         "frameworks": analysis.frameworks,
         "frontend_frameworks": analysis.frontend_frameworks,
         "backend_frameworks": analysis.backend_frameworks,
         "package_manager": analysis.package_manager,
         "test_runner": analysis.test_runner,
-        "java_version": analysis.java_version,  # Версия Java из pom.xml
+        "java_version": analysis.java_version,  # Версия Java из pom.xml / build.gradle
+        "go_version": analysis.go_version,
+        "node_version": analysis.node_version,
+        "python_version": analysis.python_version,
         "docker": analysis.docker,
         "docker_context": analysis.docker_context,
         "dockerfile_path": analysis.dockerfile_path,
@@ -82,10 +140,13 @@ def generate_pipeline(analysis: ProjectAnalysis, user_settings: Dict[str, Any])
     languages = [l.lower() for l in analysis_dict.get("languages", [])]
     main_languages = ["python", "java", "kotlin", "go", "golang", "typescript", "javascript"]
     language = None
-    for lang in languages:
-        if lang in main_languages:
-            language = lang
-            break
+    candidates = [lang for lang in languages if lang in main_languages]
+    percentages = analysis_dict.get("language_percentages") or {}
+    if candidates and percentages:
+        # Основной язык - с наибольшей долей в объеме кода
+        language = max(candidates, key=lambda lang: percentages.get(lang, 0.0))
+    elif candidates:
+        language = candidates[0]
     if not language and languages:
         language = languages[0]
     elif not language:
@@ -99,14 +160,15 @@ def generate_pipeline(analysis: ProjectAnalysis, user_settings: Dict[str, Any])
     }
     
     # Добавляем версию для используемого языка
+    # (явная настройка пользователя -> версия из файлов сборки -> значение по умолчанию)
     if language == "python":
-        ctx["python_version"] = user_settings_dict.get("python_version", analysis_dict.get("python_version", "3.11"))
+        ctx["python_version"] = user_settings_dict.get("python_version") or analysis_dict.get("python_version") or "3.11"
     elif language in ["java", "kotlin"]:
-        ctx["java_version"] = user_settings_dict.get("java_version", analysis_dict.get("java_version", "17"))
+        ctx["java_version"] = user_settings_dict.get("java_version") or analysis_dict.get("java_version") or "17"
     elif language in ["go", "golang"]:
-        ctx["go_version"] = user_settings_dict.get("go_version", analysis_dict.get("go_version", "1.21"))
+        ctx["go_version"] = user_settings_dict.get("go_version") or analysis_dict.get("go_version") or "1.21"
     elif language in ["typescript", "javascript"]:
-        ctx["node_version"] = user_settings_dict.get("node_version", analysis_dict.get("node_version", "18"))
+        ctx["node_version"] = user_settings_dict.get("node_version") or analysis_dict.get("node_version") or "18"
     
     # Добавляем build_image для Java/Kotlin
     if language in ["java", "kotlin"]:
@@ -141,13 +203,12 @@ def generate_pipeline(analysis: ProjectAnalysis, user_settings: Dict[str, Any])
     })
     
     # Рендеринг пайплайна
-    templates_root = CI_GENERATOR_PATH / "pipelines"
-    renderer = PipelineRenderer(templates_root=str(templates_root))
+    renderer = get_renderer()
     
     if platform == "gitlab":
         return renderer.render_gitlab(stages, ctx)
     elif platform == "jenkins":
         return renderer.render_jenkins(stages, ctx)
     else:
-        raise ValueError(f"Unsupported platform: {platform}")
+        raise PipelineSettingsError(f"Unsupported platform: {platform}")
 
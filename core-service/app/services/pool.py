@@ -0,0 +1,117 @@
+"""Пул прогретых рабочих потоков анализа с ограниченной очередью."""
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from app.services.analyzer import get_detector
+from app.services.pipeline_generator import get_renderer
+
+logger = logging.getLogger(__name__)
+
+# Сколько ждать запуска всех рабочих потоков при прогреве
+WARM_UP_TIMEOUT = 10.0
+
+
+class PoolBusyError(Exception):
+    """Все рабочие потоки заняты и очередь пула заполнена."""
+
+
+class AnalysisPool:
+    """Пул рабочих потоков для анализа репозиториев.
+
+    Потоки, а не процессы: детектор стека потокобезопасен и разделяется
+    всеми вызовами, а основное время анализа уходит на git и чтение файлов.
+    Одновременно принимается не больше workers + queue_size задач, остальные
+    отклоняются сразу (PoolBusyError), а не копятся в очереди без ограничения.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        """
+        Инициализация пула.
+
+        Args:
+            workers: Количество рабочих потоков
+            queue_size: Количество задач, ожидающих свободный поток
+        """
+        if workers < 1:
+            raise ValueError("Количество рабочих потоков должно быть не меньше 1")
+        if queue_size < 0:
+            raise ValueError("Размер очереди не может быть отрицательным")
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+    def warm_up(self):
+        """
+        Прогреть пул до первого запроса.
+
+        Импортирует анализаторы, компилирует правила детектора и окружение
+        шаблонов пайплайнов, затем запускает все рабочие потоки, чтобы
+        первые запросы не платили за их создание.
+        """
+        get_detector()
+        get_renderer()
+
+        barrier = threading.Barrier(self.workers + 1)
+        for _ in range(self.workers):
+            # Каждая задача держит свой поток, пока не стартуют все остальные
+            self._executor.submit(barrier.wait, WARM_UP_TIMEOUT)
+        try:
+            barrier.wait(WARM_UP_TIMEOUT)
+        except threading.BrokenBarrierError:
+            logger.warning("Не все рабочие потоки анализа запустились при прогреве")
+        logger.info(f"Пул анализа готов: потоков {self.workers}, очередь {self.queue_size}")
+
+    def submit(self, func: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Поставить задачу в пул.
+
+        Args:
+            func: Выполняемая функция
+            *args: Позиционные аргументы функции
+            **kwargs: Именованные аргументы функции
+
+        Returns:
+            Future с результатом функции
+
+        Raises:
+            PoolBusyError: Если все потоки заняты и очередь заполнена
+        """
+        if not self._slots.acquire(blocking=False):
+            raise PoolBusyError(
+                f"Пул анализа занят: {self.workers} задач выполняется, {self.queue_size} в очереди"
+            )
+        with self._pending_lock:
+            self._pending += 1
+        try:
+            future = self._executor.submit(func, *args, **kwargs)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        """Освободить место в пуле после завершения задачи."""
+        with self._pending_lock:
+            self._pending -= 1
+        self._slots.release()
+
+    @property
+    def pending(self) -> int:
+        """Количество принятых и еще не завершенных задач."""
+        with self._pending_lock:
+            return self._pending
+
+    def shutdown(self, wait: bool = True):
+        """
+        Остановить пул.
+
+        Args:
+            wait: Дождаться завершения принятых задач
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
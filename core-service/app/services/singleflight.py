@@ -0,0 +1,60 @@
+"""Объединение одновременных одинаковых вызовов (single-flight)."""
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Выполняет одну функцию на ключ, пока она не завершилась.
+
+    Первый вызов с ключом выполняет функцию, вызовы с тем же ключом,
+    пришедшие до ее завершения, ждут и получают тот же результат или то же
+    исключение. После завершения ключ освобождается: результат не кэшируется,
+    следующий вызов выполнит функцию заново.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Выполнить функцию или дождаться уже выполняющегося вызова с тем же ключом.
+
+        Args:
+            key: Ключ вызова
+            func: Выполняемая функция без аргументов
+
+        Returns:
+            Кортеж (результат, получен ли результат чужого вызова)
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    @property
+    def in_flight(self) -> int:
+        """Количество выполняющихся вызовов."""
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,142 @@
+"""Прием push-событий GitLab/GitHub и постановка повторного анализа в очередь."""
+import hashlib
+import hmac
+import logging
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
+    from app.schemas import Job
+
+logger = logging.getLogger(__name__)
+
+# Пауза без новых push-событий перед повторным анализом (секунды)
+DEFAULT_DEBOUNCE = 30.0
+# Наибольшая задержка анализа при непрерывной серии push-событий (секунды)
+DEFAULT_MAX_DELAY = 300.0
+
+# Коммит удаленной ветки в push-событии
+_NULL_SHA = "0" * 40
+
+
+@dataclass
+class PushEvent:
+    """Push-событие, приведенное к общему для GitLab и GitHub виду."""
+    urls: List[str] = field(default_factory=list)  # URL репозитория из события (HTTP, SSH, веб)
+    ref: str = ""  # refs/heads/<ветка>
+    default_branch: Optional[str] = None
+    after: Optional[str] = None  # Коммит после push
+
+    @property
+    def branch(self) -> str:
+        return self.ref[len("refs/heads/"):] if self.ref.startswith("refs/heads/") else self.ref
+
+
+def parse_push_event(payload: Mapping[str, Any]) -> Optional[PushEvent]:
+    """
+    Разобрать тело push-события GitLab или GitHub.
+
+    Args:
+        payload: JSON тела запроса
+
+    Returns:
+        PushEvent или None, если это не push-событие
+    """
+    if not payload.get("ref"):
+        return None
+    if payload.get("object_kind") not in (None, "push"):
+        return None
+
+    # GitLab: project, GitHub: repository (у GitLab repository - устаревший дубль project)
+    repository = payload.get("project") or payload.get("repository") or {}
+    urls = [
+        repository.get(key)
+        for key in ("git_http_url", "clone_url", "http_url", "web_url", "html_url", "git_ssh_url", "ssh_url", "url")
+        if isinstance(repository.get(key), str)
+    ]
+    return PushEvent(
+        urls=urls,
+        ref=payload["ref"],
+        default_branch=repository.get("default_branch"),
+        after=payload.get("after") or payload.get("checkout_sha"),
+    )
+
+
+def url_variants(url: str) -> List[str]:
+    """Варианты записи URL репозитория, под которыми проект может быть сохранен."""
+    base = url.strip().rstrip("/")
+    if base.endswith(".git"):
+        base = base[:-4]
+    return [base, base + ".git", base + "/"]
+
+
+def verify_signature(secret: str, body: bytes, headers: Mapping[str, str]) -> bool:
+    """
+    Проверить подпись события: X-Gitlab-Token (общий секрет) или X-Hub-Signature-256 (HMAC GitHub).
+
+    Args:
+        secret: Секрет вебхука
+        body: Тело запроса
+        headers: Заголовки запроса
+
+    Returns:
+        True если подпись верна
+    """
+    # Сравниваются байты: compare_digest не принимает строки с не-ASCII символами
+    token = headers.get("x-gitlab-token")
+    if token is not None:
+        return hmac.compare_digest(token.encode(), secret.encode())
+    signature = headers.get("x-hub-signature-256")
+    if signature is not None:
+        expected = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(signature.encode(), expected.encode())
+    return False
+
+
+def ingest_push(
+    db: "Session",
+    event: PushEvent,
+    debounce_seconds: float = DEFAULT_DEBOUNCE,
+    max_delay_seconds: float = DEFAULT_MAX_DELAY,
+) -> List["Job"]:
+    """
+    Поставить в очередь повторный анализ проектов репозитория из push-события.
+
+    Анализируется ветка по умолчанию, поэтому push в другие ветки и удаление
+    ветки пропускаются. Серия событий одного проекта сворачивается в одну
+    задачу для самого нового коммита (см. job_queue.enqueue_reanalysis).
+
+    Args:
+        db: Сессия базы данных
+        event: Push-событие
+        debounce_seconds: Пауза без новых событий перед анализом
+        max_delay_seconds: Наибольшая задержка анализа при непрерывных событиях
+
+    Returns:
+        Созданные или обновленные задачи анализа
+    """
+    # Очередь и хранилище загружают модели и движок БД - только при приеме события
+    from app import job_queue, storage
+
+    if event.default_branch and event.branch != event.default_branch:
+        logger.info(f"Push в ветку {event.branch} пропущен: анализируется ветка {event.default_branch}")
+        return []
+    if event.after == _NULL_SHA:
+        return []
+
+    candidates: List[str] = []
+    for url in event.urls:
+        candidates.extend(variant for variant in url_variants(url) if variant not in candidates)
+    projects = storage.find_projects_by_urls(db, candidates) if candidates else []
+    if not projects:
+        logger.info(f"Push-событие для незарегистрированного репозитория: {event.urls[:1]}")
+        return []
+
+    jobs = [
+        job_queue.enqueue_reanalysis(db, project.id, event.after, debounce_seconds, max_delay_seconds)
+        for project in projects
+    ]
+    logger.info(f"Повторный анализ коммита {event.after} в очереди: задачи {[job.id for job in jobs]}")
+    return jobs
@@ -0,0 +1,154 @@
+"""Обработчик очереди задач анализа и генерации пайплайнов."""
+import logging
+import os
+import socket
+import threading
+import uuid
+from typing import Optional, Sequence
+
+from app import job_queue, storage
+from app.database import SessionLocal
+from app.schemas import Job, PipelineGenerationCreate
+from app.services.analyzer import analyze_repository
+from app.services.pipeline_generator import generate_pipeline
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEASE = 60.0
+DEFAULT_POLL_INTERVAL = 2.0
+
+
+class JobWorker:
+    """Обработчик задач из таблиц analysis_jobs и generation_jobs.
+
+    Обработчики можно запускать на нескольких машинах с общей базой: задача
+    достается одному из них (см. job_queue.claim_job). Пока задача
+    выполняется, ее аренда продлевается из фонового потока; если обработчик
+    упал, после истечения аренды задачу заберет другой.
+    """
+
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        lease_seconds: float = DEFAULT_LEASE,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        kinds: Sequence[str] = tuple(job_queue.JOB_MODELS),
+    ):
+        """
+        Инициализация обработчика.
+
+        Args:
+            worker_id: Идентификатор обработчика (по умолчанию: хост, PID и случайный суффикс)
+            lease_seconds: Срок аренды задачи (продлевается каждую треть срока)
+            poll_interval: Пауза между опросами пустой очереди в секундах
+            kinds: Виды обрабатываемых задач
+        """
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.kinds = list(kinds)
+        self.handlers = {
+            "analysis": self._run_analysis,
+            "generation": self._run_generation,
+        }
+
+    def run_once(self) -> bool:
+        """
+        Выполнить одну готовую задачу.
+
+        Returns:
+            True если задача была выполнена (успешно или нет), False если очередь пуста
+        """
+        for kind in self.kinds:
+            with SessionLocal() as db:
+                released = job_queue.requeue_expired(db, kind)
+                if released:
+                    logger.warning(f"Освобождено задач {kind} с истекшей арендой: {released}")
+                job = job_queue.claim_job(db, kind, self.worker_id, self.lease_seconds)
+            if job is not None:
+                self._execute(kind, job)
+                return True
+        return False
+
+    def run_forever(self, stop: Optional[threading.Event] = None):
+        """
+        Обрабатывать задачи, пока не установлен stop.
+
+        Args:
+            stop: Событие остановки (None - до прерывания процесса)
+        """
+        stop = stop or threading.Event()
+        logger.info(f"Обработчик {self.worker_id} запущен: задачи {self.kinds}")
+        while not stop.is_set():
+            if not self.run_once():
+                stop.wait(self.poll_interval)
+
+    def _execute(self, kind: str, job: Job):
+        """Выполнить захваченную задачу, продлевая аренду до ее завершения."""
+        logger.info(f"Задача {kind} #{job.id} (проект {job.project_id}), попытка {job.attempts}/{job.max_attempts}")
+        done = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(kind, job.id, done), name=f"heartbeat-{kind}-{job.id}", daemon=True
+        )
+        heartbeat.start()
+        try:
+            with SessionLocal() as db:
+                result = self.handlers[kind](db, job) or {}
+        except Exception as e:
+            logger.exception(f"Задача {kind} #{job.id} завершилась с ошибкой")
+            done.set()
+            heartbeat.join()
+            with SessionLocal() as db:
+                status = job_queue.fail_job(db, kind, job.id, self.worker_id, str(e))
+            if status is None:
+                logger.warning(f"Аренда задачи {kind} #{job.id} потеряна, ошибка не записана")
+            else:
+                logger.info(f"Задача {kind} #{job.id}: {status}")
+            return
+
+        done.set()
+        heartbeat.join()
+        with SessionLocal() as db:
+            if job_queue.complete_job(db, kind, job.id, self.worker_id, **result):
+                logger.info(f"Задача {kind} #{job.id} выполнена")
+            else:
+                logger.warning(f"Аренда задачи {kind} #{job.id} потеряна, задача будет выполнена повторно")
+
+    def _heartbeat(self, kind: str, job_id: int, done: threading.Event):
+        """Продлевать аренду задачи каждую треть срока, пока задача выполняется."""
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                with SessionLocal() as db:
+                    if not job_queue.heartbeat(db, kind, job_id, self.worker_id, self.lease_seconds):
+                        logger.warning(f"Аренда задачи {kind} #{job_id} потеряна")
+                        return
+            except Exception as e:
+                logger.warning(f"Не удалось продлить аренду задачи {kind} #{job_id}: {e}")
+
+    def _run_analysis(self, db, job: Job):
+        project = storage.get_project(db, job.project_id)
+        if project is None:
+            raise ValueError(f"Проект с ID {job.project_id} не найден")
+        # Серия push-событий свернута в задачу для самого нового коммита: если он уже
+        # проанализирован (например, повторная доставка события), анализ не нужен
+        if job.commit_sha and project.analysis and project.analysis.commit_sha == job.commit_sha:
+            logger.info(f"Коммит {job.commit_sha} проекта {project.id} уже проанализирован, задача #{job.id} пропущена")
+            return
+        analysis = analyze_repository(str(project.url), project.clone_token)
+        if job.commit_sha and analysis.commit_sha and analysis.commit_sha != job.commit_sha:
+            logger.info(
+                f"Задача #{job.id} запрошена для коммита {job.commit_sha}, проанализирован {analysis.commit_sha}"
+            )
+        storage.update_project_analysis(db, project.id, analysis)
+
+    def _run_generation(self, db, job: Job):
+        project = storage.get_project(db, job.project_id)
+        if project is None:
+            raise ValueError(f"Проект с ID {job.project_id} не найден")
+        if not project.analysis:
+            raise ValueError(f"Для проекта {job.project_id} отсутствует анализ")
+        pipeline = generate_pipeline(project.analysis, job.settings)
+        generation = storage.create_pipeline_generation(
+            db, PipelineGenerationCreate(project_id=project.id, uml=pipeline)
+        )
+        return {"pipeline_generation_id": generation.id}
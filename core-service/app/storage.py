@@ -82,6 +82,29 @@ def get_project(db: Session, project_id: int) -> Project | None:
     )
 
 
+def find_projects_by_urls(db: Session, urls: List[str]) -> List[Project]:
+    projects = db.query(models.ProjectORM).filter(models.ProjectORM.url.in_(urls)).all()
+    return [
+        Project(
+            id=p.id,
+            name=p.name,
+            url=p.url,
+            clone_token=p.clone_token,
+            analysis=_analysis_from_json(p.analysis_json),
+        )
+        for p in projects
+    ]
+
+
+def update_project_analysis(db: Session, project_id: int, analysis: ProjectAnalysis) -> Project | None:
+    p = db.query(models.ProjectORM).filter(models.ProjectORM.id == project_id).first()
+    if p is None:
+        return None
+    p.analysis_json = _analysis_to_json(analysis)
+    db.commit()
+    return get_project(db, project_id)
+
+
 # ---------- Pipeline generations ----------
 
 
@@ -1,7 +1,9 @@
 """Пакет для анализа технологического стека проекта."""
 from .detector import ProjectStackDetector
-from .models import ProjectStack, EntryPoint
+from .events import AnalysisEvent
+from .models import ProjectStack, ModuleStack, EntryPoint
+from .session import AnalysisSession, FIELD_STEPS
 
-__all__ = ['ProjectStackDetector', 'ProjectStack', 'EntryPoint']
+__all__ = ['ProjectStackDetector', 'AnalysisEvent', 'AnalysisSession', 'FIELD_STEPS', 'ProjectStack', 'ModuleStack', 'EntryPoint']
 __version__ = '1.0.0'
 
@@ -1,10 +1,11 @@
 """Анализатор инструментов сборки."""
 import logging
 from pathlib import Path
+from typing import Optional
 
 from ..models import ProjectStack
 from ..config import ConfigLoader
-from ..utils import get_relevant_files
+from ..inventory import FileInventory
 
 logger = logging.getLogger(__name__)
 
@@ -21,14 +22,16 @@ class BuildToolsAnalyzer:
         """
         self.config_loader = config_loader
 
-    def analyze(self, repo_path: Path, stack: ProjectStack):
+    def analyze(self, repo_path: Path, stack: ProjectStack, inventory: Optional[FileInventory] = None):
         """
         Анализ инструментов сборки.
 
         Args:
             repo_path: Путь к репозиторию
             stack: Объект ProjectStack для заполнения
+            inventory: Инвентаризация файлов репозитория (строится, если не передана)
         """
+        inventory = inventory or FileInventory.build(repo_path)
         build_tools_files = {
             'webpack': ['webpack.config.js', 'webpack.config.ts'],
             'vite': ['vite.config.js', 'vite.config.ts'],
@@ -47,7 +50,7 @@ class BuildToolsAnalyzer:
         }
 
         # Используем оптимизированный поиск файлов
-        relevant_files = get_relevant_files(repo_path)
+        relevant_files = inventory.files()
         
         for tool, patterns in build_tools_files.items():
             for pattern in patterns:
@@ -1,10 +1,11 @@
 """Анализатор CI/CD конфигураций."""
 import logging
 from pathlib import Path
+from typing import Optional
 
 from ..models import ProjectStack
 from ..config import ConfigLoader
-from ..utils import get_relevant_files
+from ..inventory import FileInventory
 
 logger = logging.getLogger(__name__)
 
@@ -21,14 +22,16 @@ class CICDAnalyzer:
         """
         self.config_loader = config_loader
 
-    def analyze(self, repo_path: Path, stack: ProjectStack):
+    def analyze(self, repo_path: Path, stack: ProjectStack, inventory: Optional[FileInventory] = None):
         """
         Анализ CI/CD конфигураций.
 
         Args:
             repo_path: Путь к репозиторию
             stack: Объект ProjectStack для заполнения
+            inventory: Инвентаризация файлов репозитория (строится, если не передана)
         """
+        inventory = inventory or FileInventory.build(repo_path)
         cicd_files = {
             'github-actions': ['.github/workflows/*.yml', '.github/workflows/*.yaml'],
             'gitlab': ['.gitlab-ci.yml'],
@@ -44,7 +47,7 @@ class CICDAnalyzer:
         detected_files = {}
         
         # Используем оптимизированный поиск файлов
-        relevant_files = get_relevant_files(repo_path)
+        relevant_files = inventory.files()
 
         for provider, patterns in cicd_files.items():
             for pattern in patterns:
@@ -1,11 +1,12 @@
 """Анализатор облачных платформ."""
-import re
 import logging
 from pathlib import Path
+from typing import Optional
 
 from ..models import ProjectStack
-from ..config import ConfigLoader, PatternConfig
-from ..utils import get_relevant_files, read_file_sample
+from ..config import ConfigLoader
+from ..inventory import FileInventory
+from ..ruleset import get_ruleset
 
 logger = logging.getLogger(__name__)
 
@@ -21,23 +22,25 @@ class CloudAnalyzer:
             config_loader: Загрузчик конфигурации
         """
         self.config_loader = config_loader
-        self.pattern_config = PatternConfig()
+        self.ruleset = get_ruleset(config_loader)
 
-    def analyze(self, repo_path: Path, stack: ProjectStack):
+    def analyze(self, repo_path: Path, stack: ProjectStack, inventory: Optional[FileInventory] = None):
         """
         Анализ облачных платформ.
 
         Args:
             repo_path: Путь к репозиторию
             stack: Объект ProjectStack для заполнения
+            inventory: Инвентаризация файлов репозитория (строится, если не передана)
         """
+        inventory = inventory or FileInventory.build(repo_path)
         # Анализ по конфигурационным файлам
-        self._analyze_by_files(repo_path, stack)
+        self._analyze_by_files(inventory, stack)
 
         # Анализ по зависимостям и импортам
-        self._analyze_by_content(repo_path, stack)
+        self._analyze_by_content(inventory, stack)
 
-    def _analyze_by_files(self, repo_path: Path, stack: ProjectStack):
+    def _analyze_by_files(self, inventory: FileInventory, stack: ProjectStack):
         """Анализ облачных платформ по наличию специфичных файлов."""
         cloud_files = {
             'aws': ['.aws/', 'aws.yml', 'aws.yaml'],
@@ -48,30 +51,34 @@ class CloudAnalyzer:
 
         for cloud, patterns in cloud_files.items():
             for pattern in patterns:
-                if list(repo_path.rglob(pattern)):
+                if pattern.endswith('/'):
+                    found = inventory.has_directory(pattern)
+                else:
+                    found = bool(inventory.glob(pattern))
+                if found:
                     if cloud not in stack.cloud_platforms:
                         stack.cloud_platforms.append(cloud)
                     break
 
-    def _analyze_by_content(self, repo_path: Path, stack: ProjectStack):
+    def _analyze_by_content(self, inventory: FileInventory, stack: ProjectStack):
         """Анализ облачных платформ по содержимому файлов."""
         # Только расширения поддерживаемых языков: Python, TypeScript, Java/Kotlin, Go + конфиги
         code_extensions = ['.py', '.pyw', '.ts', '.tsx', '.java', '.kt', '.kts', '.go', '.yaml', '.yml']
 
         # Используем оптимизированную функцию для получения релевантных файлов
-        relevant_files = get_relevant_files(repo_path, extensions=code_extensions, max_file_size=200 * 1024)
+        relevant_entries = inventory.select(extensions=code_extensions, max_file_size=200 * 1024, text_only=True)
 
-        for file_path in relevant_files:
+        for entry in relevant_entries:
             # Читаем только начало файла (достаточно для поиска паттернов облачных платформ)
-            content = read_file_sample(file_path, max_lines=50, max_bytes=4096)
+            content = inventory.read_sample(entry, max_lines=50, max_bytes=4096)
 
             if not content:
                 continue
 
-            for cloud, patterns in self.pattern_config.CLOUD_PATTERNS.items():
+            for cloud, patterns in self.ruleset.clouds.items():
                 if cloud not in stack.cloud_platforms:
                     for pattern in patterns:
-                        if re.search(pattern, content, re.IGNORECASE):
+                        if pattern.search(content):
                             stack.cloud_platforms.append(cloud)
                             break
 
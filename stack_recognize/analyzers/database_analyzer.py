@@ -1,11 +1,15 @@
 """Анализатор баз данных."""
-import re
 import logging
 from pathlib import Path
+from typing import Optional, Set
 
 from ..models import ProjectStack
-from ..config import ConfigLoader, PatternConfig
-from ..utils import get_relevant_files, read_file_sample, get_language_by_extension
+from ..config import ConfigLoader
+from ..inventory import FileInventory
+from ..manifests import ECOSYSTEM_LANGUAGES, filter_extensions, match_declared_dependencies, record_content_scan
+from ..ruleset import get_ruleset
+from ..scheduler import COST_CONTENT, COST_FILE_NAMES, COST_MANIFESTS, Rule, run_rules
+from ..utils import get_language_by_extension
 
 logger = logging.getLogger(__name__)
 
@@ -21,23 +25,50 @@ class DatabaseAnalyzer:
             config_loader: Загрузчик конфигурации
         """
         self.config_loader = config_loader
-        self.pattern_config = PatternConfig()
+        self.ruleset = get_ruleset(config_loader)
 
-    def analyze(self, repo_path: Path, stack: ProjectStack):
+    def analyze(self, repo_path: Path, stack: ProjectStack, inventory: Optional[FileInventory] = None):
         """
         Анализ используемых баз данных.
 
         Args:
             repo_path: Путь к репозиторию
             stack: Объект ProjectStack для заполнения
+            inventory: Инвентаризация файлов репозитория (строится, если не передана)
         """
-        # Анализ по конфигурационным файлам
-        self._analyze_by_files(repo_path, stack)
+        inventory = inventory or FileInventory.build(repo_path)
+
+        def scan_content(languages: Set[str]) -> Set[str]:
+            record_content_scan(stack, 'databases', languages)
+            self._analyze_by_content(repo_path, inventory, stack, languages)
+            return languages
+
+        # Конфигурационные файлы и драйверы из манифестов, затем импорты в исходниках
+        # только для языков, не определенных по манифестам
+        record_content_scan(stack, 'databases', set())
+        run_rules('databases', [
+            Rule('files', COST_FILE_NAMES, lambda _: self._analyze_by_files(inventory, stack)),
+            Rule('manifests', COST_MANIFESTS, lambda _: self._analyze_by_manifests(inventory, stack),
+                 frozenset(ECOSYSTEM_LANGUAGES.values())),
+            Rule('content', COST_CONTENT, scan_content, frozenset(ECOSYSTEM_LANGUAGES.values())),
+        ], inventory.languages(), stack)
+
+    def _analyze_by_manifests(self, inventory: FileInventory, stack: ProjectStack) -> Set[str]:
+        """
+        Анализ баз данных по зависимостям из манифестов.
 
-        # Анализ по зависимостям и импортам
-        self._analyze_by_content(repo_path, stack)
+        Returns:
+            Языки, для которых БД определены по манифестам
+        """
+        resolved = match_declared_dependencies(inventory, self.ruleset.database_dependencies)
+        for databases in resolved.values():
+            for db, manifests in databases.items():
+                if db not in stack.databases:
+                    stack.databases.append(db)
+                    logger.info(f"Обнаружена БД {db} по манифесту {manifests[0]}")
+        return set(resolved)
 
-    def _analyze_by_files(self, repo_path: Path, stack: ProjectStack):
+    def _analyze_by_files(self, inventory: FileInventory, stack: ProjectStack):
         """Анализ баз данных по наличию специфичных файлов."""
         database_files = {
             'postgresql': ['postgresql.conf', 'pg_hba.conf'],
@@ -48,7 +79,7 @@ class DatabaseAnalyzer:
         }
 
         # Используем оптимизированный поиск файлов
-        relevant_files = get_relevant_files(repo_path)
+        relevant_files = inventory.files()
         for db, patterns in database_files.items():
             for pattern in patterns:
                 matches = [f for f in relevant_files 
@@ -58,17 +89,22 @@ class DatabaseAnalyzer:
                         stack.databases.append(db)
                     break
 
-    def _analyze_by_content(self, repo_path: Path, stack: ProjectStack):
-        """Анализ баз данных по содержимому файлов."""
+    def _analyze_by_content(self, repo_path: Path, inventory: FileInventory, stack: ProjectStack, languages: Set[str]):
+        """Анализ баз данных по содержимому файлов указанных языков."""
         # Только расширения поддерживаемых языков: Python, TypeScript, Java/Kotlin, Go
-        code_extensions = ['.py', '.pyw', '.ts', '.tsx', '.java', '.kt', '.kts', '.go']
+        code_extensions = filter_extensions(['.py', '.pyw', '.ts', '.tsx', '.java', '.kt', '.kts', '.go'], languages)
 
         # Используем оптимизированную функцию для получения релевантных файлов
-        relevant_files = get_relevant_files(repo_path, extensions=code_extensions, max_file_size=200 * 1024)
+        relevant_entries = inventory.select(extensions=code_extensions, max_file_size=200 * 1024, text_only=True)
+
+        for entry in relevant_entries:
+            if all(db in stack.databases for db in self.ruleset.databases):
+                logger.debug("Все известные БД найдены, анализ содержимого остановлен")
+                break
 
-        for file_path in relevant_files:
+            file_path = entry.path
             # Читаем только начало файла (достаточно для поиска паттернов БД)
-            content = read_file_sample(file_path, max_lines=50, max_bytes=4096)
+            content = inventory.read_sample(entry, max_lines=50, max_bytes=4096)
 
             if not content:
                 continue
@@ -76,14 +112,15 @@ class DatabaseAnalyzer:
             # Определяем язык файла по расширению
             file_lang = get_language_by_extension(file_path.suffix)
 
-            for db, patterns in self.pattern_config.DATABASE_PATTERNS.items():
+            for db, patterns in self.ruleset.databases.items():
                 if db not in stack.databases:
                     # Проверяем паттерны с учетом языка файла
                     # Python-специфичные паттерны (psycopg2, pymysql и т.д.) применяются только к Python файлам
                     # TypeScript/JavaScript паттерны (require, import) применяются только к TypeScript файлам
                     # Go паттерны (redis.NewClient) применяются только к Go файлам
                     
-                    for pattern in patterns:
+                    for compiled in patterns:
+                        pattern = compiled.pattern
                         # Фильтрация паттернов по языку
                         if file_lang == 'python':
                             # Для Python ищем Python-специфичные паттерны
@@ -115,7 +152,7 @@ class DatabaseAnalyzer:
                                'redis.NewClient' in pattern:
                                 continue
                         
-                        if re.search(pattern, content, re.IGNORECASE):
+                        if compiled.search(content):
                             stack.databases.append(db)
                             logger.info(f"Обнаружена БД {db} в файле {file_path.relative_to(repo_path)} по паттерну: {pattern}")
                             break
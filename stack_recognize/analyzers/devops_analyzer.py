@@ -5,7 +5,8 @@ from typing import List, Optional, Dict
 
 from ..models import ProjectStack
 from ..config import ConfigLoader
-from ..utils import get_relevant_files, should_ignore_path
+from ..inventory import FileInventory, is_dockerfile_name
+from ..k8s import scan_kubernetes
 
 logger = logging.getLogger(__name__)
 
@@ -23,56 +24,7 @@ class DevOpsAnalyzer:
         self.config_loader = config_loader
 
     @staticmethod
-    def _detect_monorepo_structure(repo_path: Path) -> Dict[str, List[Path]]:
-        """Определить структуру монорепозитория.
-        
-        Returns:
-            Словарь с ключами: 'frontend', 'backend', 'root', 'apps'
-        """
-        structure = {
-            'frontend': [],
-            'backend': [],
-            'root': [],
-            'apps': [],
-            'packages': []
-        }
-        
-        # Типичные структуры монорепозиториев
-        frontend_dirs = ['frontend', 'web', 'client', 'ui', 'app']
-        backend_dirs = ['backend', 'server', 'api', 'services']
-        apps_dirs = ['apps', 'applications']
-        packages_dirs = ['packages', 'libs', 'libraries']
-        
-        for item in repo_path.iterdir():
-            if not item.is_dir():
-                continue
-            
-            dir_name = item.name.lower()
-            
-            if dir_name in frontend_dirs:
-                structure['frontend'].append(item)
-            elif dir_name in backend_dirs:
-                structure['backend'].append(item)
-            elif dir_name in apps_dirs:
-                structure['apps'].append(item)
-            elif dir_name in packages_dirs:
-                structure['packages'].append(item)
-        
-        # Проверяем apps/ на наличие frontend/backend подпапок
-        for apps_dir in structure['apps']:
-            for subdir in apps_dir.iterdir():
-                if not subdir.is_dir():
-                    continue
-                subdir_name = subdir.name.lower()
-                if subdir_name in frontend_dirs:
-                    structure['frontend'].append(subdir)
-                elif subdir_name in backend_dirs:
-                    structure['backend'].append(subdir)
-        
-        return structure
-
-    @staticmethod
-    def _categorize_dockerfiles(docker_files: List[Path], repo_path: Path, monorepo_structure: Dict[str, List[Path]]) -> Dict[str, List[Path]]:
+    def _categorize_dockerfiles(docker_files: List[Path], repo_path: Path, monorepo_structure: Dict[str, List[str]]) -> Dict[str, List[Path]]:
         """Категоризировать Dockerfile по назначению (frontend, backend, root).
         
         Args:
@@ -192,19 +144,19 @@ class DevOpsAnalyzer:
         # Если ничего не подошло, возвращаем первый
         return docker_files[0]
 
-    def analyze(self, repo_path: Path, stack: ProjectStack):
+    def analyze(self, repo_path: Path, stack: ProjectStack, inventory: Optional[FileInventory] = None):
         """
         Анализ DevOps инструментов.
 
         Args:
             repo_path: Путь к репозиторию
             stack: Объект ProjectStack для заполнения
+            inventory: Инвентаризация файлов репозитория (строится, если не передана)
         """
+        inventory = inventory or FileInventory.build(repo_path)
         devops_files = {
             'docker': ['Dockerfile', '*.dockerfile'],
             'docker-compose': ['docker-compose.yml', 'docker-compose.yaml'],
-            'kubernetes': ['k8s/**/*', 'manifests/**/*', 'kubernetes/**/*', '*.k8s.yaml', '*.k8s.yml'],
-            'helm': ['Chart.yaml'],
             'terraform': ['*.tf', '.terraform.lock.hcl', '*.tfvars', 'terraform.tfstate'],
             'ansible': ['ansible.cfg', 'inventory', 'playbook.yml'],
             'pulumi': ['Pulumi.yaml'],
@@ -213,14 +165,13 @@ class DevOpsAnalyzer:
 
         detected_files = {}
         
-        # Используем оптимизированный поиск файлов
-        relevant_files = get_relevant_files(repo_path)
+        relevant_files = inventory.files()
         logger.info(f"Найдено релевантных файлов для анализа DevOps: {len(relevant_files)}")
         
-        # Дополнительный поиск Dockerfile и docker-compose через rglob (на случай, если они не попали в relevant_files)
-        dockerfile_matches = list(repo_path.rglob('Dockerfile*'))
-        dockerfile_matches = [f for f in dockerfile_matches if f.is_file() and not should_ignore_path(f)]
-        logger.info(f"Найдено Dockerfile файлов через rglob: {len(dockerfile_matches)}")
+        # Dockerfile и docker-compose учитываем независимо от размера файла
+        all_files = inventory.files(max_file_size=None)
+        dockerfile_matches = [f for f in all_files if f.name.startswith('Dockerfile')]
+        logger.info(f"Найдено Dockerfile файлов: {len(dockerfile_matches)}")
         if dockerfile_matches:
             logger.info(f"Dockerfile файлы: {[str(f.relative_to(repo_path)) for f in dockerfile_matches]}")
             before_count = len(relevant_files)
@@ -228,9 +179,8 @@ class DevOpsAnalyzer:
             after_count = len(relevant_files)
             logger.info(f"Добавлено Dockerfile файлов в relevant_files: {after_count - before_count}, всего файлов: {after_count}")
         
-        docker_compose_matches = list(repo_path.rglob('docker-compose.*'))
-        docker_compose_matches = [f for f in docker_compose_matches if f.is_file() and not should_ignore_path(f)]
-        logger.info(f"Найдено docker-compose файлов через rglob: {len(docker_compose_matches)}")
+        docker_compose_matches = [f for f in all_files if f.name.startswith('docker-compose.')]
+        logger.info(f"Найдено docker-compose файлов: {len(docker_compose_matches)}")
         if docker_compose_matches:
             logger.info(f"docker-compose файлы: {[str(f.relative_to(repo_path)) for f in docker_compose_matches]}")
             relevant_files.extend([f for f in docker_compose_matches if f not in relevant_files])
@@ -239,7 +189,7 @@ class DevOpsAnalyzer:
         # Dockerfile может быть: Dockerfile, Dockerfile.prod, Dockerfile_backend, Dockerfile-frontend и т.д.
         docker_files = []
         for f in relevant_files:
-            if f.name == 'Dockerfile' or f.name.startswith('Dockerfile') or f.name.endswith('.dockerfile'):
+            if is_dockerfile_name(f.name):
                 docker_files.append(f)
         
         logger.info(f"Найдено потенциальных Dockerfile файлов в relevant_files: {len(docker_files)}")
@@ -248,7 +198,7 @@ class DevOpsAnalyzer:
             stack.docker = True
             
             # Определяем структуру монорепозитория
-            monorepo_structure = self._detect_monorepo_structure(repo_path)
+            monorepo_structure = inventory.monorepo_structure()
             is_monorepo = any(len(v) > 0 for v in monorepo_structure.values() if isinstance(v, list))
             
             if is_monorepo and len(docker_files) > 1:
@@ -326,15 +276,26 @@ class DevOpsAnalyzer:
                     matches = [f for f in relevant_files if f.name == pattern]
                 
                 if matches:
-                    if tool == 'kubernetes':
-                        stack.kubernetes = True
-                    elif tool == 'helm':
-                        stack.kubernetes = True  # Helm тоже указывает на Kubernetes
-                    elif tool == 'terraform':
+                    if tool == 'terraform':
                         stack.terraform = True
 
                     detected_files[tool] = detected_files.get(tool, []) + [str(m.relative_to(repo_path)) for m in matches]
                     # Не break, продолжаем поиск для других паттернов того же инструмента
 
+        # Kubernetes, Helm и Kustomize - по заголовкам YAML-документов, а не по именам директорий
+        kubernetes = scan_kubernetes(inventory)
+        if kubernetes.found:
+            stack.kubernetes = True  # Helm и Kustomize тоже указывают на Kubernetes
+            if kubernetes.manifests:
+                detected_files['kubernetes'] = kubernetes.manifests
+            if kubernetes.charts:
+                detected_files['helm'] = kubernetes.charts
+            if kubernetes.kustomizations:
+                detected_files['kustomize'] = kubernetes.kustomizations
+            if kubernetes.kinds:
+                detected_files['kubernetes_kinds'] = dict(sorted(kubernetes.kinds.items()))
+            if kubernetes.ports:
+                detected_files['kubernetes_ports'] = sorted(kubernetes.ports)
+
         stack.files_detected.update(detected_files)
 
@@ -3,11 +3,13 @@ import json
 import re
 import logging
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
 from ..models import ProjectStack, EntryPoint
-from ..config import ConfigLoader, PatternConfig
-from ..utils import get_language_by_extension, detect_language_from_command, get_relevant_files, read_file_sample
+from ..config import ConfigLoader
+from ..inventory import FileInventory
+from ..ruleset import WINDOW_ANY, WINDOW_HEAD, WINDOW_TAIL, get_ruleset
+from ..utils import get_language_by_extension, detect_language_from_command
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +25,7 @@ class EntryPointAnalyzer:
             config_loader: Загрузчик конфигурации
         """
         self.config_loader = config_loader
-        self.pattern_config = PatternConfig()
+        self.ruleset = get_ruleset(config_loader)
 
         # Конфигурационные файлы, указывающие на точку входа (только для поддерживаемых языков)
         self.config_files = {
@@ -38,97 +40,111 @@ class EntryPointAnalyzer:
             'docker-compose.yml': self._parse_docker_compose_entry,
         }
 
-    def analyze(self, repo_path: Path, stack: ProjectStack):
+    def analyze(self, repo_path: Path, stack: ProjectStack, inventory: Optional[FileInventory] = None):
         """
         Анализ точек входа в приложение.
 
         Args:
             repo_path: Путь к репозиторию
             stack: Объект ProjectStack для заполнения
+            inventory: Инвентаризация файлов репозитория (строится, если не передана)
         """
+        inventory = inventory or FileInventory.build(repo_path)
         logger.info("Поиск точек входа в приложение...")
 
         # 1. Поиск по стандартным именам файлов
-        self._find_standard_entry_points(repo_path, stack)
+        self._find_standard_entry_points(repo_path, inventory, stack)
 
         # 2. Анализ конфигурационных файлов
-        self._analyze_config_files(repo_path, stack)
+        self._analyze_config_files(inventory, stack)
 
         # 3. Поиск по содержимому файлов
-        self._find_entry_points_by_content(repo_path, stack)
+        self._find_entry_points_by_content(repo_path, inventory, stack)
 
         # 4. Анализ Docker файлов
-        self._analyze_docker_entry_points(repo_path, stack)
+        self._analyze_docker_entry_points(inventory, stack)
 
         # 5. Определение основной точки входа
         self._determine_main_entry_point(stack)
 
         logger.info(f"Найдено точек входа: {len(stack.entry_points)}")
 
-    def _find_standard_entry_points(self, repo_path: Path, stack: ProjectStack):
+    def _find_standard_entry_points(self, repo_path: Path, inventory: FileInventory, stack: ProjectStack):
         """Поиск точек входа по стандартным именам файлов."""
-        for language, patterns in self.pattern_config.STANDARD_ENTRY_FILES.items():
+        for language, patterns in self.ruleset.standard_entry_files.items():
             for pattern in patterns:
-                matches = list(repo_path.rglob(pattern))
-                for match in matches:
-                    if match.is_file():
-                        entry_point = EntryPoint(
-                            type='main',
-                            file_path=str(match.relative_to(repo_path)),
-                            language=language,
-                            confidence=0.7
-                        )
-                        self._add_entry_point(entry_point, stack)
+                for match in inventory.glob(pattern):
+                    entry_point = EntryPoint(
+                        type='main',
+                        file_path=str(match.relative_to(repo_path)),
+                        language=language,
+                        confidence=0.7
+                    )
+                    self._add_entry_point(entry_point, stack)
 
-    def _analyze_config_files(self, repo_path: Path, stack: ProjectStack):
+    def _analyze_config_files(self, inventory: FileInventory, stack: ProjectStack):
         """Анализ конфигурационных файлов для определения точек входа."""
         for config_file, parser_method in self.config_files.items():
             if config_file == 'dockerfile':
                 continue  # Обрабатывается отдельно
-            # Используем оптимизированный поиск файлов
-            matches = [f for f in get_relevant_files(repo_path) 
-                      if f.name == config_file]
+            matches = [f for f in inventory.files() if f.name == config_file]
             for match in matches:
                 try:
                     parser_method(match, stack)
                 except Exception as e:
                     logger.warning(f"Ошибка анализа {config_file}: {e}")
 
-    def _find_entry_points_by_content(self, repo_path: Path, stack: ProjectStack):
+    def _find_entry_points_by_content(self, repo_path: Path, inventory: FileInventory, stack: ProjectStack):
         """Поиск точек входа по содержимому файлов."""
         # Только расширения поддерживаемых языков: Python, TypeScript, Java/Kotlin, Go
         code_extensions = ['.py', '.pyw', '.ts', '.tsx', '.java', '.kt', '.kts', '.go']
 
         # Используем оптимизированную функцию для получения релевантных файлов
-        relevant_files = get_relevant_files(repo_path, extensions=code_extensions, max_file_size=200 * 1024)
+        relevant_entries = inventory.select(extensions=code_extensions, max_file_size=200 * 1024, text_only=True)
 
-        for file_path in relevant_files:
-            # Читаем только начало файла (достаточно для поиска паттернов точек входа)
-            content = read_file_sample(file_path, max_lines=50, max_bytes=4096)
-
-            if not content:
-                continue
+        for entry in relevant_entries:
+            file_path = entry.path
 
             # Определяем язык файла по расширению
             file_lang = get_language_by_extension(file_path.suffix)
-            if file_lang and file_lang in self.pattern_config.ENTRY_POINT_PATTERNS:
-                patterns = self.pattern_config.ENTRY_POINT_PATTERNS[file_lang]
-                for pattern, framework, confidence in patterns:
-                    if re.search(pattern, content):
-                        entry_point = EntryPoint(
-                            type='app' if framework != 'main' else 'main',
-                            file_path=str(file_path.relative_to(repo_path)),
-                            framework=framework,
-                            language=file_lang,
-                            confidence=confidence
-                        )
-                        self._add_entry_point(entry_point, stack)
-                        break
+            if not file_lang or file_lang not in self.ruleset.entry_points:
+                continue
+            patterns = self.ruleset.entry_points[file_lang]
+
+            # Читаем начало и (если его требует хотя бы одно правило) конец файла,
+            # середина не читается
+            needs_tail = self.ruleset.entry_points_need_tail[file_lang]
+            head, tail = inventory.read_windows(
+                entry,
+                head_bytes=self.ruleset.entry_point_head_bytes,
+                tail_bytes=self.ruleset.entry_point_tail_bytes if needs_tail else 0,
+                max_lines=50,
+            )
+
+            if not head and not tail:
+                continue
+
+            windows = {
+                WINDOW_HEAD: head,
+                WINDOW_TAIL: tail,
+                WINDOW_ANY: f"{head}\n{tail}" if tail else head,
+            }
+            for pattern, framework, confidence, window in patterns:
+                if pattern.search(windows[window]):
+                    entry_point = EntryPoint(
+                        type='app' if framework != 'main' else 'main',
+                        file_path=str(file_path.relative_to(repo_path)),
+                        framework=framework,
+                        language=file_lang,
+                        confidence=confidence
+                    )
+                    self._add_entry_point(entry_point, stack)
+                    break
 
-    def _analyze_docker_entry_points(self, repo_path: Path, stack: ProjectStack):
+    def _analyze_docker_entry_points(self, inventory: FileInventory, stack: ProjectStack):
         """Анализ Docker файлов для определения точек входа."""
         # Используем оптимизированный поиск Docker файлов
-        relevant_files = get_relevant_files(repo_path)
+        relevant_files = inventory.files()
         docker_files = [f for f in relevant_files 
                        if f.name.startswith('Dockerfile') or f.name.endswith('.dockerfile')]
 
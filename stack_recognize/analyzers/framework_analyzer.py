@@ -2,13 +2,30 @@
 import re
 import logging
 from pathlib import Path
+from typing import Dict, Optional, Set
 
 from ..models import ProjectStack
-from ..config import ConfigLoader, PatternConfig
-from ..utils import get_relevant_files, read_file_sample, get_language_by_extension
+from ..config import ConfigLoader
+from ..inventory import FileInventory
+from ..sampling import ContentScan
+from ..manifests import ECOSYSTEM_LANGUAGES, filter_extensions, match_declared_dependencies, record_content_scan
+from ..ruleset import get_ruleset
+from ..scheduler import COST_CONTENT, COST_FILE_NAMES, COST_MANIFESTS, Rule, run_rules
+from ..utils import get_language_by_extension
 
 logger = logging.getLogger(__name__)
 
+# Имена фреймворков из detect_config.json, отличающиеся от встроенных (Ruleset.frameworks)
+_CONFIG_FRAMEWORK_ALIASES = {'nestjs': 'nest'}
+
+# Язык -> фреймворки, которые применяются только к файлам этого языка
+_FRAMEWORK_LANGUAGES = {
+    'java': {'spring', 'spring-boot', 'quarkus', 'micronaut', 'vertx'},
+    'python': {'django', 'flask', 'fastapi'},
+    'go': {'gin', 'echo', 'fiber', 'beego'},
+    'typescript': {'express', 'nest', 'react', 'vue', 'angular', 'nextjs'},
+}
+
 
 class FrameworkAnalyzer:
     """Анализатор для определения фреймворков."""
@@ -21,26 +38,81 @@ class FrameworkAnalyzer:
             config_loader: Загрузчик конфигурации
         """
         self.config_loader = config_loader
-        self.pattern_config = PatternConfig()
+        self.ruleset = get_ruleset(config_loader)
 
-    def analyze(self, repo_path: Path, stack: ProjectStack):
+    def analyze(self, repo_path: Path, stack: ProjectStack, inventory: Optional[FileInventory] = None):
         """
         Анализ фреймворков.
 
         Args:
             repo_path: Путь к репозиторию
             stack: Объект ProjectStack для заполнения
+            inventory: Инвентаризация файлов репозитория (строится, если не передана)
         """
-        # Анализ по файлам
-        self._analyze_by_files(repo_path, stack)
+        inventory = inventory or FileInventory.build(repo_path)
+
+        def scan_content(languages: Set[str]) -> Set[str]:
+            record_content_scan(stack, 'frameworks', languages)
+            self._analyze_by_content(repo_path, inventory, stack, languages)
+            return languages
 
-        # Анализ по содержимому файлов
-        self._analyze_by_content(repo_path, stack)
+        # Открытые вопросы - языки репозитория. Манифесты закрывают языки,
+        # для которых фреймворки найдены, содержимое читается только для оставшихся
+        record_content_scan(stack, 'frameworks', set())
+        run_rules('frameworks', [
+            Rule('files', COST_FILE_NAMES, lambda _: self._analyze_by_files(repo_path, inventory, stack)),
+            Rule('manifests', COST_MANIFESTS, lambda _: self._analyze_by_manifests(inventory, stack),
+                 frozenset(ECOSYSTEM_LANGUAGES.values())),
+            Rule('content', COST_CONTENT, scan_content, frozenset(_FRAMEWORK_LANGUAGES)),
+        ], inventory.languages(), stack)
 
         # Классификация фреймворков
         self._classify_frameworks(stack)
 
-    def _analyze_by_files(self, repo_path: Path, stack: ProjectStack):
+    def _framework_dependencies(self) -> Dict[str, list]:
+        """Фреймворк -> имена зависимостей из секции frameworks конфигурации."""
+        return {
+            _CONFIG_FRAMEWORK_ALIASES.get(name, name): config.get('dependencies', [])
+            for name, config in self.config_loader.frameworks.items()
+        }
+
+    def _analyze_by_manifests(self, inventory: FileInventory, stack: ProjectStack) -> Set[str]:
+        """
+        Анализ фреймворков по зависимостям, объявленным в манифестах.
+
+        Returns:
+            Языки, для которых фреймворки определены по манифестам
+        """
+        resolved = match_declared_dependencies(
+            inventory,
+            self._framework_dependencies(),
+            lambda framework, language: self._framework_language(framework) == language,
+        )
+        found: Dict[str, str] = {}
+        for frameworks in resolved.values():
+            for framework, manifests in frameworks.items():
+                found[framework] = manifests[0]
+                if framework not in stack.frameworks:
+                    stack.frameworks.append(framework)
+                    logger.info(f"Обнаружен фреймворк {framework} по манифесту {manifests[0]}")
+
+        # spring-boot включает в себя spring, поэтому spring избыточен
+        if 'spring-boot' in stack.frameworks and 'spring' in stack.frameworks:
+            stack.frameworks.remove('spring')
+            found.pop('spring', None)
+        if found:
+            stack.files_detected['manifest_frameworks'] = found
+        return set(resolved)
+
+    @staticmethod
+    def _framework_language(framework: str) -> Optional[str]:
+        """Язык, к которому относится фреймворк."""
+        for language, frameworks in _FRAMEWORK_LANGUAGES.items():
+            if framework in frameworks:
+                return language
+        return None
+
+    def _analyze_by_files(self, repo_path: Path, inventory: FileInventory, stack: ProjectStack):
         """Анализ фреймворков по наличию специфичных файлов."""
         framework_files = {
             # Python фреймворки
@@ -62,12 +134,11 @@ class FrameworkAnalyzer:
         }
 
         # Используем оптимизированный поиск файлов
-        relevant_files = get_relevant_files(repo_path)
+        relevant_files = inventory.files()
         logger.debug(f"Найдено релевантных файлов для анализа фреймворков: {len(relevant_files)}")
         
         for framework, files in framework_files.items():
             for pattern in files:
-                # Используем get_relevant_files для фильтрации
                 matches = [f for f in relevant_files 
                           if f.name == pattern or str(f.relative_to(repo_path)) == pattern]
                 if matches:
@@ -76,53 +147,56 @@ class FrameworkAnalyzer:
                         logger.debug(f"Обнаружен фреймворк {framework} по файлу: {[str(m.relative_to(repo_path)) for m in matches]}")
                     break
 
-    def _analyze_by_content(self, repo_path: Path, stack: ProjectStack):
-        """Анализ фреймворков по содержимому файлов."""
+    def _analyze_by_content(self, repo_path: Path, inventory: FileInventory, stack: ProjectStack, languages: Set[str]):
+        """Анализ фреймворков по содержимому файлов указанных языков.
+
+        Если в инвентаризации задана политика выборки, читается
+        стратифицированная выборка файлов (см. sampling.ContentScan).
+        """
         # Только расширения поддерживаемых языков: Python, TypeScript/JavaScript, Java/Kotlin, Go
-        code_extensions = ['.py', '.pyw', '.ts', '.tsx', '.js', '.jsx', '.java', '.kt', '.kts', '.go']
+        code_extensions = filter_extensions(
+            ['.py', '.pyw', '.ts', '.tsx', '.js', '.jsx', '.java', '.kt', '.kts', '.go'], languages
+        )
 
         # Используем оптимизированную функцию для получения только релевантных файлов
         # Ограничиваем размер файлов до 200KB для анализа фреймворков
-        relevant_files = get_relevant_files(repo_path, extensions=code_extensions, max_file_size=200 * 1024)
-        logger.info(f"Найдено файлов для анализа фреймворков по содержимому: {len(relevant_files)}")
+        relevant_entries = inventory.select(extensions=code_extensions, max_file_size=200 * 1024, text_only=True)
+        logger.info(f"Найдено файлов для анализа фреймворков по содержимому: {len(relevant_entries)}")
+
+        scan = ContentScan(relevant_entries, inventory.sampling)
+        for entry in scan:
+            # Фреймворки, которые еще могут быть найдены; когда их не осталось, файлы не читаются
+            pending = self._pending_frameworks(stack, languages)
+            if not pending:
+                logger.debug("Все возможные фреймворки найдены, анализ содержимого остановлен")
+                break
+
+            file_path = entry.path
+            # Определяем язык файла по расширению
+            file_lang = get_language_by_extension(file_path.suffix)
+            if not any(self._framework_language(framework) in (file_lang, None) for framework in pending):
+                continue
 
-        for file_path in relevant_files:
             # Читаем начало файла (достаточно для поиска импортов)
             # Увеличиваем лимит для лучшего обнаружения фреймворков
-            content = read_file_sample(file_path, max_lines=100, max_bytes=8192)
+            content = inventory.read_sample(entry, max_lines=100, max_bytes=8192)
 
             if not content:
                 continue
+            scan.observe(entry)
             
             # Логируем первые несколько файлов для отладки
             file_rel = str(file_path.relative_to(repo_path))
             if 'main.py' in file_rel or 'app.py' in file_rel:
                 logger.info(f"Анализ файла {file_rel}, первые 200 символов: {content[:200]}")
-
-            # Определяем язык файла по расширению
-            file_lang = get_language_by_extension(file_path.suffix)
             
-            for framework, patterns in self.pattern_config.FRAMEWORK_PATTERNS.items():
+            for framework, patterns in self.ruleset.frameworks.items():
                 if framework not in stack.frameworks:
                     # Проверка совместимости языка файла и фреймворка
                     # Java/Kotlin фреймворки применяются только к Java/Kotlin файлам
-                    java_frameworks = {'spring', 'spring-boot', 'quarkus', 'micronaut', 'vertx'}
-                    if framework in java_frameworks and file_lang != 'java':
-                        continue
-                    
-                    # Python фреймворки применяются только к Python файлам
-                    python_frameworks = {'django', 'flask', 'fastapi'}
-                    if framework in python_frameworks and file_lang != 'python':
-                        continue
-                    
-                    # Go фреймворки применяются только к Go файлам
-                    go_frameworks = {'gin', 'echo', 'fiber', 'beego'}
-                    if framework in go_frameworks and file_lang != 'go':
-                        continue
-                    
-                    # TypeScript/JavaScript фреймворки применяются только к TypeScript файлам
-                    ts_frameworks = {'express', 'nest', 'react', 'vue', 'angular', 'nextjs'}
-                    if framework in ts_frameworks and file_lang != 'typescript':
+                    # (Java/Kotlin, Python, Go и TypeScript/JavaScript фреймворки - только к файлам своего языка)
+                    framework_lang = self._framework_language(framework)
+                    if framework_lang and framework_lang != file_lang:
                         continue
                     
                     # Специальная логика для Spring: если уже определен spring-boot, не добавлять spring
@@ -193,9 +267,9 @@ class FrameworkAnalyzer:
                     
                     # Обычная проверка паттернов
                     for pattern in patterns:
-                        if re.search(pattern, content, re.IGNORECASE):
+                        if pattern.search(content):
                             stack.frameworks.append(framework)
-                            logger.info(f"Обнаружен фреймворк {framework} в файле {file_rel} по паттерну: {pattern}")
+                            logger.info(f"Обнаружен фреймворк {framework} в файле {file_rel} по паттерну: {pattern.pattern}")
                             
                             # Если найден spring-boot, удалить spring (если он был добавлен ранее)
                             if framework == 'spring-boot' and 'spring' in stack.frameworks:
@@ -214,16 +288,39 @@ class FrameworkAnalyzer:
                             
                             break
 
+        pending = self._pending_frameworks(stack, languages)
+        scan.report(stack, 'frameworks', {
+            language for language in languages
+            if not any(self._framework_language(framework) in (language, None) for framework in pending)
+        })
+
+    def _pending_frameworks(self, stack: ProjectStack, languages: Set[str]) -> Set[str]:
+        """Фреймворки языков languages, которые еще могут быть добавлены по содержимому."""
+        pending = set()
+        for framework in self.ruleset.frameworks:
+            if framework in stack.frameworks:
+                continue
+            language = self._framework_language(framework)
+            if language is not None and language not in languages:
+                continue
+            # Взаимоисключающие Java-фреймворки (см. _analyze_by_content)
+            if framework in ('spring', 'quarkus') and 'spring-boot' in stack.frameworks:
+                continue
+            if framework == 'spring-boot' and 'quarkus' in stack.frameworks:
+                continue
+            pending.add(framework)
+        return pending
+
     def _classify_frameworks(self, stack: ProjectStack):
         """Классификация фреймворков по типам."""
         for framework in stack.frameworks:
-            if framework in self.pattern_config.FRONTEND_FRAMEWORKS:
+            if framework in self.ruleset.frontend_frameworks:
                 if framework not in stack.frontend_frameworks:
                     stack.frontend_frameworks.append(framework)
-            elif framework in self.pattern_config.BACKEND_FRAMEWORKS:
+            elif framework in self.ruleset.backend_frameworks:
                 if framework not in stack.backend_frameworks:
                     stack.backend_frameworks.append(framework)
-            elif framework in self.pattern_config.MOBILE_FRAMEWORKS:
+            elif framework in self.ruleset.mobile_frameworks:
                 if framework not in stack.mobile_frameworks:
                     stack.mobile_frameworks.append(framework)
 
@@ -1,10 +1,11 @@
 """Анализатор дополнительных подсказок о проекте."""
 import logging
 from pathlib import Path
+from typing import Optional
 
 from ..models import ProjectStack
 from ..config import ConfigLoader
-from ..utils import get_relevant_files
+from ..inventory import FileInventory
 
 logger = logging.getLogger(__name__)
 
@@ -21,14 +22,16 @@ class HintsAnalyzer:
         """
         self.config_loader = config_loader
 
-    def analyze(self, repo_path: Path, stack: ProjectStack):
+    def analyze(self, repo_path: Path, stack: ProjectStack, inventory: Optional[FileInventory] = None):
         """
         Анализ дополнительных подсказок о проекте.
 
         Args:
             repo_path: Путь к репозиторию
             stack: Объект ProjectStack для заполнения
+            inventory: Инвентаризация файлов репозитория (строится, если не передана)
         """
+        inventory = inventory or FileInventory.build(repo_path)
         hint_files = {
             'Наличие конфигурации веб-сервера': ['nginx.conf', 'apache.conf', '.htaccess', 'httpd.conf'],
             'Наличие конфигурации базы данных': ['*.sql', 'migrations/**/*', 'seeders/**/*'],
@@ -41,7 +44,7 @@ class HintsAnalyzer:
         }
 
         # Используем оптимизированный поиск файлов
-        relevant_files = get_relevant_files(repo_path)
+        relevant_files = inventory.files()
         
         for hint, patterns in hint_files.items():
             for pattern in patterns:
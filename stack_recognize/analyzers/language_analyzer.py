@@ -2,14 +2,19 @@
 import json
 import logging
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional, TextIO
 
 from ..models import ProjectStack
 from ..config import ConfigLoader
-from ..utils import get_language_extensions, get_relevant_files
+from ..inventory import FileInventory
+from ..language_stats import compute_language_stats
+from ..utils import get_language_extensions
 
 logger = logging.getLogger(__name__)
 
+# Сколько путей каждого языка сохраняется в files_detected (полный список - в files_listing)
+FILES_SAMPLE_SIZE = 20
+
 
 class LanguageAnalyzer:
     """Анализатор для определения языков программирования и менеджеров пакетов."""
@@ -24,16 +29,114 @@ class LanguageAnalyzer:
         self.config_loader = config_loader
         self.language_extensions = get_language_extensions()
 
-    def analyze(self, repo_path: Path, stack: ProjectStack):
+    def analyze(
+        self,
+        repo_path: Path,
+        stack: ProjectStack,
+        inventory: Optional[FileInventory] = None,
+        files_listing: Optional[TextIO] = None,
+        count_lines: bool = False,
+    ):
         """
         Анализ языков программирования и менеджеров пакетов.
 
+        В files_detected для каждого языка сохраняются количество файлов
+        ('<lang>_files_count') и первые FILES_SAMPLE_SIZE путей ('<lang>_files').
+        Доли языков по объему кода сохраняются в stack.language_stats.
+
         Args:
             repo_path: Путь к репозиторию
             stack: Объект ProjectStack для заполнения
+            inventory: Инвентаризация файлов репозитория (строится, если не передана)
+            files_listing: Поток для полного списка файлов по языкам
+                (строки 'язык<TAB>путь'), опционально
+            count_lines: Считать также доли языков по строкам (читает файлы)
         """
+        inventory = inventory or FileInventory.build(repo_path)
         detected_files = {}
 
+        self._detect_root_package_manager(repo_path, stack, detected_files)
+
+        # Используем оптимизированную функцию для получения релевантных файлов
+        # Ограничиваем размер файлов до 500KB для анализа языков
+        relevant_entries = inventory.select(max_file_size=512 * 1024)
+        logger.debug(f"Найдено релевантных файлов для анализа языков: {len(relevant_entries)}")
+
+        for entry in relevant_entries:
+            file_path = entry.path
+            filename = entry.name
+            file_path_str = entry.rel_path
+
+            # Язык определен по расширению при построении инвентаризации
+            language = entry.language
+            if language:
+                self._add_language(language, stack)
+                count_key = f'{language}_files_count'
+                detected_files[count_key] = detected_files.get(count_key, 0) + 1
+                if detected_files[count_key] <= FILES_SAMPLE_SIZE:
+                    detected_files.setdefault(f'{language}_files', []).append(file_path_str)
+                if files_listing is not None:
+                    files_listing.write(f"{language}\t{file_path_str}\n")
+                logger.debug(f"Обнаружен файл {file_path_str} с языком {language} (расширение: {entry.suffix})")
+
+            # Определение менеджеров пакетов и сборщиков
+            # КРИТИЧНО: Пропускаем обработку pyproject.toml в цикле, если go.mod существует в корне
+            # Это должно быть ПЕРВОЙ проверкой перед вызовом _detect_package_manager
+            if filename == 'pyproject.toml' and file_path.parent == repo_path:
+                # Проверяем наличие go.mod ПЕРВЫМ, так как он имеет высший приоритет
+                go_mod_path = repo_path / 'go.mod'
+                if go_mod_path.exists() and go_mod_path.is_file():
+                    logger.info(f"pyproject.toml найден в цикле файлов, но go.mod тоже есть в корне - go.mod имеет приоритет, пропускаем pyproject.toml")
+                    detected_files['pyproject_toml'] = str(file_path.relative_to(repo_path))
+                    continue
+                # Проверяем, если уже установлен приоритетный менеджер
+                high_priority_managers = {'go mod', 'gradle', 'maven', 'ant', 'bundler', 'composer'}
+                if stack.package_manager in high_priority_managers:
+                    logger.info(f"pyproject.toml найден в цикле файлов, но уже установлен приоритетный менеджер {stack.package_manager}, пропускаем")
+                    detected_files['pyproject_toml'] = str(file_path.relative_to(repo_path))
+                    continue
+            
+            self._detect_package_manager(filename, file_path, repo_path, stack, detected_files)
+
+        stack.files_detected.update(detected_files)
+        stack.language_stats = compute_language_stats(inventory, count_lines=count_lines)
+
+    def analyze_inherited(self, repo_root: Path, scope_root: Path, stack: ProjectStack):
+        """
+        Учет манифестов из корня репозитория при анализе поддиректории.
+
+        Манифесты корня используются только как унаследованный контекст:
+        менеджер пакетов берется из корня, если в поддиректории он не определен,
+        а lock-файлы workspace уточняют менеджер пакетов для package.json.
+
+        Args:
+            repo_root: Корень репозитория
+            scope_root: Анализируемая поддиректория
+            stack: Объект ProjectStack для заполнения
+        """
+        if repo_root == scope_root:
+            return
+
+        inherited_files = {}
+
+        if not stack.package_manager:
+            self._detect_root_package_manager(repo_root, stack, inherited_files)
+            if stack.package_manager:
+                logger.info(f"Менеджер пакетов {stack.package_manager} унаследован из корня репозитория")
+        elif stack.package_manager == 'npm' and not (scope_root / 'package-lock.json').exists():
+            # npm выбран по умолчанию - lock-файл workspace в корне точнее
+            for lock_file, pm_name in (('yarn.lock', 'yarn'), ('pnpm-lock.yaml', 'pnpm'), ('package-lock.json', 'npm')):
+                if (repo_root / lock_file).is_file():
+                    stack.package_manager = pm_name
+                    inherited_files[lock_file.replace('.', '_').replace('-', '_')] = lock_file
+                    logger.info(f"Менеджер пакетов {pm_name} унаследован из корня репозитория ({lock_file})")
+                    break
+
+        if inherited_files:
+            stack.files_detected['inherited'] = inherited_files
+
+    def _detect_root_package_manager(self, repo_path: Path, stack: ProjectStack, detected_files: Dict):
+        """Определение менеджера пакетов по манифестам в корне директории."""
         # Сначала проверяем приоритетные менеджеры пакетов (Java, Go, Python) в корне
         # Они имеют приоритет над package.json
         # Приоритет: go.mod > build.gradle/build.gradle.kts > pom.xml > build.xml > Gemfile > composer.json > pyproject.toml > requirements.txt
@@ -108,47 +211,6 @@ class LanguageAnalyzer:
                 self._detect_package_manager('package.json', package_json_path, repo_path, stack, detected_files)
                 logger.info(f"package_manager после обработки package.json: {stack.package_manager}")
 
-        # Используем оптимизированную функцию для получения релевантных файлов
-        # Ограничиваем размер файлов до 500KB для анализа языков
-        relevant_files = get_relevant_files(repo_path, max_file_size=512 * 1024)
-        logger.debug(f"Найдено релевантных файлов для анализа языков: {len(relevant_files)}")
-
-        for file_path in relevant_files:
-            filename = file_path.name
-            file_path_str = str(file_path.relative_to(repo_path))
-
-            # Определение языков по расширениям файлов
-            file_suffix = file_path.suffix.lower() if file_path.suffix else None
-            for language, extensions in self.language_extensions.items():
-                # Проверяем расширение файла (с точкой) или имя файла без расширения для специальных случаев
-                if file_suffix and file_suffix in extensions:
-                    self._add_language(language, stack)
-                    key = f'{language}_files'
-                    detected_files[key] = detected_files.get(key, []) + [file_path_str]
-                    logger.debug(f"Обнаружен файл {file_path_str} с языком {language} (расширение: {file_suffix})")
-                    break  # Язык определен, переходим к следующему файлу
-
-            # Определение менеджеров пакетов и сборщиков
-            # КРИТИЧНО: Пропускаем обработку pyproject.toml в цикле, если go.mod существует в корне
-            # Это должно быть ПЕРВОЙ проверкой перед вызовом _detect_package_manager
-            if filename == 'pyproject.toml' and file_path.parent == repo_path:
-                # Проверяем наличие go.mod ПЕРВЫМ, так как он имеет высший приоритет
-                go_mod_path = repo_path / 'go.mod'
-                if go_mod_path.exists() and go_mod_path.is_file():
-                    logger.info(f"pyproject.toml найден в цикле файлов, но go.mod тоже есть в корне - go.mod имеет приоритет, пропускаем pyproject.toml")
-                    detected_files['pyproject_toml'] = str(file_path.relative_to(repo_path))
-                    continue
-                # Проверяем, если уже установлен приоритетный менеджер
-                high_priority_managers = {'go mod', 'gradle', 'maven', 'ant', 'bundler', 'composer'}
-                if stack.package_manager in high_priority_managers:
-                    logger.info(f"pyproject.toml найден в цикле файлов, но уже установлен приоритетный менеджер {stack.package_manager}, пропускаем")
-                    detected_files['pyproject_toml'] = str(file_path.relative_to(repo_path))
-                    continue
-            
-            self._detect_package_manager(filename, file_path, repo_path, stack, detected_files)
-
-        stack.files_detected.update(detected_files)
-
     def _detect_package_manager(self, filename: str, file_path: Path, repo_path: Path, stack: ProjectStack, detected_files: Dict):
         """Определение менеджера пакетов по имени файла."""
         # Приоритетные менеджеры пакетов (не должны перезаписываться package.json)
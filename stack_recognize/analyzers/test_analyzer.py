@@ -1,12 +1,16 @@
 """Анализатор тестовых раннеров."""
-import re
 import logging
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Set
 
 from ..models import ProjectStack
-from ..config import ConfigLoader, PatternConfig
-from ..utils import get_relevant_files, read_file_sample, get_language_by_extension
+from ..config import ConfigLoader
+from ..inventory import FileInventory
+from ..manifests import ECOSYSTEM_LANGUAGES, filter_extensions, match_declared_dependencies, record_content_scan
+from ..sampling import ContentScan
+from ..ruleset import get_ruleset
+from ..scheduler import COST_CONTENT, COST_FILE_NAMES, COST_MANIFESTS, Rule, run_rules
+from ..utils import get_language_by_extension
 
 logger = logging.getLogger(__name__)
 
@@ -22,134 +26,124 @@ class TestAnalyzer:
             config_loader: Загрузчик конфигурации
         """
         self.config_loader = config_loader
-        self.pattern_config = PatternConfig()
+        self.ruleset = get_ruleset(config_loader)
 
-    def analyze(self, repo_path: Path, stack: ProjectStack):
+    def analyze(self, repo_path: Path, stack: ProjectStack, inventory: Optional[FileInventory] = None):
         """
         Анализ тестовых раннеров.
 
         Args:
             repo_path: Путь к репозиторию
             stack: Объект ProjectStack для заполнения
+            inventory: Инвентаризация файлов репозитория (строится, если не передана)
         """
+        inventory = inventory or FileInventory.build(repo_path)
+
         # Определяем структуру монорепозитория (если есть)
-        monorepo_structure = self._detect_monorepo_structure(repo_path)
+        monorepo_structure = inventory.monorepo_structure()
         is_monorepo = any(len(v) > 0 for v in monorepo_structure.values() if isinstance(v, list))
         
-        # Анализ по файлам
-        self._analyze_by_files(repo_path, stack)
-
-        # Анализ по содержимому файлов
-        # Продолжаем поиск, чтобы найти тестовые раннеры для всех языков
-        self._analyze_by_content(repo_path, stack)
+        def scan_content(languages: Set[str]) -> Set[str]:
+            record_content_scan(stack, 'test_runners', languages)
+            self._analyze_by_content(repo_path, inventory, stack, languages, is_monorepo)
+            return languages
+
+        # Манифесты и имена тестовых файлов закрывают языки, для которых раннеры найдены;
+        # для остальных читается содержимое (чтобы найти тестовые раннеры всех языков)
+        record_content_scan(stack, 'test_runners', set())
+        run_rules('test_runners', [
+            Rule('files', COST_FILE_NAMES, lambda _: self._analyze_by_files(repo_path, inventory, stack)),
+            Rule('manifests', COST_MANIFESTS, lambda _: self._analyze_by_manifests(inventory, stack),
+                 frozenset(ECOSYSTEM_LANGUAGES.values())),
+            Rule('content', COST_CONTENT, scan_content, frozenset(ECOSYSTEM_LANGUAGES.values())),
+        ], inventory.languages(), stack)
         
         # Для монорепозиториев анализируем тесты по категориям
         if is_monorepo:
-            self._analyze_monorepo_tests(repo_path, stack, monorepo_structure)
-    
-    @staticmethod
-    def _detect_monorepo_structure(repo_path: Path) -> Dict[str, List[Path]]:
-        """Определить структуру монорепозитория (используем ту же логику, что и в DevOpsAnalyzer)."""
-        structure = {
-            'frontend': [],
-            'backend': [],
-            'root': [],
-            'apps': [],
-            'packages': []
-        }
-        
-        frontend_dirs = ['frontend', 'web', 'client', 'ui', 'app']
-        backend_dirs = ['backend', 'server', 'api', 'services']
-        apps_dirs = ['apps', 'applications']
-        
-        for item in repo_path.iterdir():
-            if not item.is_dir():
-                continue
-            
-            dir_name = item.name.lower()
-            
-            if dir_name in frontend_dirs:
-                structure['frontend'].append(item)
-            elif dir_name in backend_dirs:
-                structure['backend'].append(item)
-            elif dir_name in apps_dirs:
-                structure['apps'].append(item)
-        
-        # Проверяем apps/ на наличие frontend/backend подпапок
-        for apps_dir in structure['apps']:
-            for subdir in apps_dir.iterdir():
-                if not subdir.is_dir():
-                    continue
-                subdir_name = subdir.name.lower()
-                if subdir_name in frontend_dirs:
-                    structure['frontend'].append(subdir)
-                elif subdir_name in backend_dirs:
-                    structure['backend'].append(subdir)
-        
-        return structure
+            self._analyze_monorepo_tests(inventory, stack, monorepo_structure)
     
-    def _analyze_monorepo_tests(self, repo_path: Path, stack: ProjectStack, monorepo_structure: Dict[str, List[Path]]):
-        """Анализ тестов для монорепозиториев по категориям (frontend/backend)."""
+    def _analyze_monorepo_tests(self, inventory: FileInventory, stack: ProjectStack, monorepo_structure: Dict[str, List[str]]):
+        """Анализ тестов для монорепозиториев по категориям (frontend/backend).
+
+        Срабатывания правил уже собраны в дереве директорий при анализе по
+        файлам и содержимому, поэтому повторный обход директорий не нужен.
+        """
         test_by_category = {}
         
-        # Анализируем тесты в frontend частях
-        for frontend_dir in monorepo_structure.get('frontend', []):
-            frontend_tests = self._analyze_directory_tests(frontend_dir, repo_path)
-            if frontend_tests:
-                test_by_category['frontend'] = frontend_tests
-        
-        # Анализируем тесты в backend частях
-        for backend_dir in monorepo_structure.get('backend', []):
-            backend_tests = self._analyze_directory_tests(backend_dir, repo_path)
-            if backend_tests:
-                test_by_category['backend'] = backend_tests
+        for category in ('frontend', 'backend'):
+            for directory in monorepo_structure.get(category, []):
+                node = inventory.tree.node(directory)
+                if node is None:
+                    continue
+                for runner in node.test_runners:
+                    if runner not in test_by_category.setdefault(category, []):
+                        test_by_category[category].append(runner)
+            if not test_by_category.get(category):
+                test_by_category.pop(category, None)
         
         # Сохраняем информацию о тестах по категориям
         if test_by_category:
             stack.files_detected['test_by_category'] = test_by_category
             logger.info(f"Тесты в монорепозитории по категориям: {test_by_category}")
-    
-    def _analyze_directory_tests(self, directory: Path, repo_path: Path) -> List[str]:
-        """Анализ тестов в конкретной директории."""
-        found_runners = []
-        code_extensions = ['.py', '.pyw', '.ts', '.tsx', '.js', '.jsx', '.java', '.kt', '.kts', '.go']
+
+    @staticmethod
+    def _runner_applies(runner: str, file_lang: Optional[str]) -> bool:
+        """Проверка совместимости языка файла и тестового раннера."""
+        # Python тестовые раннеры применяются только к Python файлам
+        python_runners = {'pytest', 'unittest'}
+        if runner in python_runners and file_lang != 'python':
+            return False
         
-        relevant_files = get_relevant_files(directory, extensions=code_extensions, max_file_size=200 * 1024)
+        # JavaScript/TypeScript тестовые раннеры применяются только к TypeScript файлам
+        js_runners = {'jest', 'mocha', 'jasmine', 'karma', 'cypress', 'playwright', 'vitest'}
+        if runner in js_runners and file_lang != 'typescript':
+            return False
         
-        for file_path in relevant_files:
-            content = read_file_sample(file_path, max_lines=50, max_bytes=4096)
-            if not content:
-                continue
-            
-            file_lang = get_language_by_extension(file_path.suffix)
-            
-            for runner, patterns in self.pattern_config.TEST_RUNNER_PATTERNS.items():
-                if runner in found_runners:
-                    continue
-                
-                # Проверка совместимости языка
-                python_runners = {'pytest', 'unittest'}
-                js_runners = {'jest', 'mocha', 'jasmine', 'karma', 'cypress', 'playwright', 'vitest'}
-                java_runners = {'junit', 'testng'}
-                go_runners = {'go-testing'}
-                
-                if runner in python_runners and file_lang != 'python':
-                    continue
-                if runner in js_runners and file_lang != 'typescript':
-                    continue
-                if runner in java_runners and file_lang != 'java':
-                    continue
-                if runner in go_runners and file_lang != 'go':
-                    continue
-                
-                for pattern in patterns:
-                    if re.search(pattern, content, re.IGNORECASE):
-                        found_runners.append(runner)
-                        break
+        # Java/Kotlin тестовые раннеры применяются только к Java/Kotlin файлам
+        java_runners = {'junit', 'testng'}
+        if runner in java_runners and file_lang != 'java':
+            return False
+        
+        # Go тестовые раннеры применяются только к Go файлам
+        go_runners = {'go-testing'}
+        if runner in go_runners and file_lang != 'go':
+            return False
         
-        return found_runners
+        # PHP и Ruby тестовые раннеры - не поддерживаются (нет PHP/Ruby в списке языков)
+        if runner in {'phpunit', 'rspec'}:
+            return False
+        
+        # E2E/BDD тестовые раннеры могут быть в любом языке
+        return True
+
+    def _analyze_by_manifests(self, inventory: FileInventory, stack: ProjectStack) -> Set[str]:
+        """
+        Анализ тестовых раннеров по зависимостям из манифестов и файлам *_test.go.
 
-    def _analyze_by_files(self, repo_path: Path, stack: ProjectStack):
+        Срабатывания записываются в дерево директорий по путям манифестов.
+
+        Returns:
+            Языки, для которых тестовые раннеры определены без чтения исходников
+        """
+        resolved = match_declared_dependencies(
+            inventory, self.ruleset.test_runner_dependencies, self._runner_applies
+        )
+
+        # Тесты Go однозначно определяются по именам файлов
+        go_tests = [entry.rel_path for entry in inventory.entries if entry.name.endswith('_test.go')]
+        if go_tests:
+            resolved.setdefault('go', {}).setdefault('go-testing', []).extend(go_tests)
+
+        for runners in resolved.values():
+            for runner, paths in runners.items():
+                for rel_path in paths:
+                    inventory.tree.record_test_hit(rel_path, runner)
+                if runner not in stack.test_runner:
+                    stack.test_runner.append(runner)
+                    logger.info(f"Обнаружен тестовый раннер {runner} по файлу: {paths[0]}")
+        return set(resolved)
+
+    def _analyze_by_files(self, repo_path: Path, inventory: FileInventory, stack: ProjectStack):
         """Анализ тестовых раннеров по наличию специфичных файлов."""
         test_files = {
             # Убрали 'pyproject.toml' из pytest - слишком общий файл
@@ -166,74 +160,89 @@ class TestAnalyzer:
             'cucumber': ['cucumber.yml', 'cucumber.js'],
         }
 
-        # Используем оптимизированный поиск файлов
-        relevant_files = get_relevant_files(repo_path)
+        relevant_files = inventory.select()
         for runner, patterns in test_files.items():
             for pattern in patterns:
-                matches = [f for f in relevant_files if f.name == pattern]
+                matches = [entry for entry in relevant_files if entry.name == pattern]
+                for match in matches:
+                    inventory.tree.record_test_hit(match.rel_path, runner)
                 if matches:
                     if runner not in stack.test_runner:
                         stack.test_runner.append(runner)
                         logger.info(f"Обнаружен тестовый раннер {runner} по файлу: {pattern}")
                     # Не возвращаемся, продолжаем поиск для других языков
 
-    def _analyze_by_content(self, repo_path: Path, stack: ProjectStack):
-        """Анализ тестовых раннеров по содержимому файлов."""
+    def _analyze_by_content(
+        self,
+        repo_path: Path,
+        inventory: FileInventory,
+        stack: ProjectStack,
+        languages: Set[str],
+        track_directories: bool = True,
+    ):
+        """Анализ тестовых раннеров по содержимому файлов указанных языков.
+
+        Срабатывания записываются в дерево директорий. Раннер перестает
+        проверяться для файла, когда он уже найден в той же директории
+        второго уровня (например, apps/web), - этого достаточно для ответов
+        о тестах отдельных частей монорепозитория. Файл не читается, если
+        для его языка не осталось непроверенных раннеров. Без монорепозитория
+        (track_directories=False) проход останавливается, когда найдены все
+        раннеры, применимые к языкам languages. Если в инвентаризации задана
+        политика выборки, читается стратифицированная выборка файлов
+        (см. sampling.ContentScan).
+        """
         # Только расширения поддерживаемых языков: Python, TypeScript, Java/Kotlin, Go
-        code_extensions = ['.py', '.pyw', '.ts', '.tsx', '.js', '.jsx', '.java', '.kt', '.kts', '.go']
+        code_extensions = filter_extensions(
+            ['.py', '.pyw', '.ts', '.tsx', '.js', '.jsx', '.java', '.kt', '.kts', '.go'], languages
+        )
+
+        possible = {
+            runner for runner in self.ruleset.test_runners
+            if any(self._runner_applies(runner, language) for language in languages)
+        }
+
+        scan = ContentScan(
+            inventory.select(extensions=code_extensions, max_file_size=200 * 1024, text_only=True),
+            inventory.sampling,
+        )
+        for entry in scan:
+            if not track_directories and possible.issubset(stack.test_runner):
+                logger.debug("Все возможные тестовые раннеры найдены, анализ содержимого остановлен")
+                break
 
-        # Используем оптимизированную функцию для получения релевантных файлов
-        relevant_files = get_relevant_files(repo_path, extensions=code_extensions, max_file_size=200 * 1024)
+            # Определяем язык файла по расширению
+            file_lang = get_language_by_extension(entry.suffix)
+            module_dir = '/'.join(entry.rel_path.split('/')[:-1][:2])
+            module_node = inventory.tree.node(module_dir)
+
+            # Раннеры, которые еще не найдены в этой части репозитория
+            # (без монорепозитория - во всем репозитории)
+            found = module_node.test_hits if track_directories else stack.test_runner
+            pending = [
+                (runner, patterns) for runner, patterns in self.ruleset.test_runners.items()
+                if runner not in found and self._runner_applies(runner, file_lang)
+            ]
+            if not pending:
+                continue
 
-        for file_path in relevant_files:
             # Читаем только начало файла (достаточно для поиска паттернов тестов)
-            content = read_file_sample(file_path, max_lines=50, max_bytes=4096)
+            content = inventory.read_sample(entry, max_lines=50, max_bytes=4096)
 
             if not content:
                 continue
+            scan.observe(entry)
 
-            # Определяем язык файла по расширению
-            file_lang = get_language_by_extension(file_path.suffix)
-            
-            for runner, patterns in self.pattern_config.TEST_RUNNER_PATTERNS.items():
-                # Пропускаем, если этот раннер уже найден
-                if runner in stack.test_runner:
-                    continue
-                
-                # Проверка совместимости языка файла и тестового раннера
-                # Python тестовые раннеры применяются только к Python файлам
-                python_runners = {'pytest', 'unittest'}
-                if runner in python_runners and file_lang != 'python':
-                    continue
-                
-                # JavaScript/TypeScript тестовые раннеры применяются только к TypeScript файлам
-                js_runners = {'jest', 'mocha', 'jasmine', 'karma', 'cypress', 'playwright', 'vitest'}
-                if runner in js_runners and file_lang != 'typescript':
-                    continue
-                
-                # Java/Kotlin тестовые раннеры применяются только к Java/Kotlin файлам
-                java_runners = {'junit', 'testng'}
-                if runner in java_runners and file_lang != 'java':
-                    continue
-                
-                # Go тестовые раннеры применяются только к Go файлам
-                go_runners = {'go-testing'}
-                if runner in go_runners and file_lang != 'go':
-                    continue
-                
-                # PHP тестовые раннеры - не поддерживаются (нет PHP в списке языков)
-                if runner == 'phpunit':
-                    continue
-                
-                # Ruby тестовые раннеры - не поддерживаются (нет Ruby в списке языков)
-                if runner == 'rspec':
-                    continue
-                
-                # Go не имеет специфичных тестовых раннеров в списке
-                # E2E/BDD тестовые раннеры могут быть в любом языке
-                
+            for runner, patterns in pending:
                 for pattern in patterns:
-                    if re.search(pattern, content, re.IGNORECASE):
-                        stack.test_runner.append(runner)
-                        logger.info(f"Обнаружен тестовый раннер {runner} в файле {file_path.relative_to(repo_path)} по паттерну: {pattern}")
+                    if pattern.search(content):
+                        inventory.tree.record_test_hit(entry.rel_path, runner)
+                        if runner not in stack.test_runner:
+                            stack.test_runner.append(runner)
+                            logger.info(f"Обнаружен тестовый раннер {runner} в файле {entry.rel_path} по паттерну: {pattern.pattern}")
                         break  # Переходим к следующему раннеру, не выходим из цикла
+
+        scan.report(stack, 'test_runners', {
+            language for language in languages
+            if all(runner in stack.test_runner for runner in possible if self._runner_applies(runner, language))
+        })
@@ -1,8 +1,87 @@
 """Конфигурация и паттерны для определения технологического стека."""
+import hashlib
 import json
+import os
 import re
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Tuple, Any, Optional
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Tuple, Any, Optional
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """Неизменяемый снимок конфигурационного файла.
+
+    version - SHA-256 содержимого файла (пустая строка, если файла нет).
+    data - содержимое, в котором словари и списки заменены на
+    MappingProxyType и кортежи, поэтому снимок безопасно разделять
+    между потоками и процессами.
+    """
+    path: Path
+    version: str
+    data: Mapping[str, Any]
+
+
+_snapshots: Dict[Path, ConfigSnapshot] = {}
+_snapshots_lock = threading.Lock()
+
+
+def _reset_snapshots_lock():
+    """Новая блокировка в дочернем процессе (блокировка родителя могла быть захвачена при fork)."""
+    global _snapshots_lock
+    _snapshots_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_snapshots_lock)
+
+
+def _freeze(value: Any) -> Any:
+    """Рекурсивно сделать значение из JSON неизменяемым."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def load_config(config_path: Optional[str] = None) -> ConfigSnapshot:
+    """
+    Получить снимок конфигурации, общий для процесса.
+
+    Файл читается при каждом вызове только для подсчета хэша; JSON
+    разбирается заново, только если содержимое изменилось.
+
+    Args:
+        config_path: Путь к JSON файлу конфигурации. Если None, используется detect_config.json
+
+    Returns:
+        ConfigSnapshot
+    """
+    path = Path(config_path) if config_path is not None else Path(__file__).parent / "detect_config.json"
+    try:
+        raw = path.read_bytes()
+    except FileNotFoundError:
+        raw = None
+    version = hashlib.sha256(raw).hexdigest() if raw is not None else ''
+
+    key = path.resolve()
+    with _snapshots_lock:
+        snapshot = _snapshots.get(key)
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+    try:
+        data = json.loads(raw.decode('utf-8')) if raw is not None else {}
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ValueError(f"Ошибка парсинга конфигурационного файла: {e}")
+
+    snapshot = ConfigSnapshot(path, version, _freeze(data))
+    with _snapshots_lock:
+        _snapshots[key] = snapshot
+    return snapshot
 
 
 class ConfigLoader:
@@ -12,24 +91,19 @@ class ConfigLoader:
         """
         Инициализация загрузчика конфигурации.
 
+        Разобранная конфигурация общая для процесса (см. load_config).
+
         Args:
             config_path: Путь к JSON файлу конфигурации. Если None, используется detect_config.json
         """
-        if config_path is None:
-            config_path = Path(__file__).parent / "detect_config.json"
-
-        self.config_path = Path(config_path)
-        self.config_data = self._load_config()
-
-    def _load_config(self) -> Dict[str, Any]:
-        """Загрузка конфигурации из JSON файла."""
-        try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Ошибка парсинга конфигурационного файла: {e}")
+        self.snapshot = load_config(config_path)
+        self.config_path = self.snapshot.path
+        self.config_data = self.snapshot.data
+
+    @property
+    def version(self) -> str:
+        """Версия конфигурации (хэш содержимого файла)."""
+        return self.snapshot.version
 
     @property
     def languages(self) -> Dict[str, Any]:
@@ -61,53 +135,75 @@ class ConfigLoader:
         """Получить конфигурацию DevOps инструментов."""
         return self.config_data.get('devops', {})
 
+    @property
+    def vendored(self) -> Dict[str, Any]:
+        """Получить конфигурацию определения стороннего (vendored) кода."""
+        return self.config_data.get('vendored', {})
+
+    @property
+    def sampling(self) -> Dict[str, Any]:
+        """Получить параметры выборочного анализа содержимого."""
+        return self.config_data.get('sampling', {})
+
 
 class PatternConfig:
-    """Встроенные паттерны для определения технологий."""
+    """Встроенные паттерны для определения технологий (анализаторы читают их через Ruleset)."""
+
+    # Окна чтения файла для правил по содержимому: начало, конец или оба
+    WINDOW_HEAD = 'head'
+    WINDOW_TAIL = 'tail'
+    WINDOW_ANY = 'any'
+
+    # Размеры окон для поиска точек входа (байты)
+    ENTRY_POINT_HEAD_BYTES = 4096
+    ENTRY_POINT_TAIL_BYTES = 2048
 
-    # Паттерны для определения точек входа
+    # Паттерны для определения точек входа: (паттерн, фреймворк, уверенность, окно)
+    # Импорты и объявления ищутся в начале файла. Запуск приложения
+    # (if __name__ == '__main__', app.run(), uvicorn.run()) обычно в конце,
+    # но в коротких модулях попадает в начало, поэтому ищется в обоих окнах
     ENTRY_POINT_PATTERNS = {
         'python': [
-            (r'if __name__ == [\'"]__main__[\'"]', 'main', 0.9),
-            (r'app\.run\(', 'flask', 0.8),
-            (r'application\.run\(', 'flask', 0.8),
-            (r'uvicorn\.run\(', 'fastapi', 0.9),
-            (r'manage\.py', 'django', 1.0),
-            (r'from django\.', 'django', 0.7),
-            (r'Flask\(\)', 'flask', 0.6),
-            (r'FastAPI\(\)', 'fastapi', 0.8),
+            (r'if __name__ == [\'"]__main__[\'"]', 'main', 0.9, WINDOW_ANY),
+            (r'app\.run\(', 'flask', 0.8, WINDOW_ANY),
+            (r'application\.run\(', 'flask', 0.8, WINDOW_ANY),
+            (r'uvicorn\.run\(', 'fastapi', 0.9, WINDOW_ANY),
+            (r'manage\.py', 'django', 1.0, WINDOW_ANY),
+            (r'from django\.', 'django', 0.7, WINDOW_HEAD),
+            (r'Flask\(\)', 'flask', 0.6, WINDOW_ANY),
+            (r'FastAPI\(\)', 'fastapi', 0.8, WINDOW_ANY),
         ],
         'typescript': [
-            (r'app\.listen\(', 'express', 0.9),
-            (r'express\(\)', 'express', 0.7),
-            (r'module\.exports\s*=', 'node', 0.8),
-            (r'export default', 'es6', 0.7),
-            (r'require\([\'"]express[\'"]\)', 'express', 0.6),
-            (r'import.*express', 'express', 0.6),
-            (r'ReactDOM\.render\(', 'react', 0.9),
-            (r'createApp\(', 'vue', 0.9),  # Vue 3 createApp, не путать с createApplication
-            (r'Vue\.createApp\(', 'vue', 0.95),  # Более строгий паттерн для Vue
-            (r'bootstrapApplication\(', 'angular', 0.9),
-            (r'@nestjs', 'nestjs', 0.8),
-            (r'from [\'"]next[\'"]', 'nextjs', 0.8),
+            (r'app\.listen\(', 'express', 0.9, WINDOW_ANY),
+            (r'express\(\)', 'express', 0.7, WINDOW_ANY),
+            (r'module\.exports\s*=', 'node', 0.8, WINDOW_ANY),
+            (r'export default', 'es6', 0.7, WINDOW_ANY),
+            (r'require\([\'"]express[\'"]\)', 'express', 0.6, WINDOW_HEAD),
+            (r'import.*express', 'express', 0.6, WINDOW_HEAD),
+            (r'ReactDOM\.render\(', 'react', 0.9, WINDOW_ANY),
+            (r'createApp\(', 'vue', 0.9, WINDOW_ANY),  # Vue 3 createApp, не путать с createApplication
+            (r'Vue\.createApp\(', 'vue', 0.95, WINDOW_ANY),  # Более строгий паттерн для Vue
+            (r'bootstrapApplication\(', 'angular', 0.9, WINDOW_ANY),
+            (r'@nestjs', 'nestjs', 0.8, WINDOW_HEAD),
+            (r'from [\'"]next[\'"]', 'nextjs', 0.8, WINDOW_HEAD),
         ],
         'java': [
-            (r'public static void main\(String\[\] args\)', 'java', 1.0),
-            (r'fun main\(', 'kotlin', 1.0),  # Kotlin main function
-            (r'@SpringBootApplication', 'spring-boot', 0.9),
-            (r'SpringApplication\.run\(', 'spring-boot', 0.9),
-            (r'@RestController', 'spring', 0.7),
-            (r'io\.quarkus', 'quarkus', 0.8),
-            (r'io\.micronaut', 'micronaut', 0.8),
-            (r'io\.vertx', 'vertx', 0.8),
+            (r'public static void main\(String\[\] args\)', 'java', 1.0, WINDOW_ANY),
+            (r'fun main\(', 'kotlin', 1.0, WINDOW_ANY),  # Kotlin main function
+            (r'@SpringBootApplication', 'spring-boot', 0.9, WINDOW_HEAD),
+            (r'SpringApplication\.run\(', 'spring-boot', 0.9, WINDOW_ANY),
+            (r'@RestController', 'spring', 0.7, WINDOW_HEAD),
+            (r'io\.quarkus', 'quarkus', 0.8, WINDOW_HEAD),
+            (r'io\.micronaut', 'micronaut', 0.8, WINDOW_HEAD),
+            (r'io\.vertx', 'vertx', 0.8, WINDOW_HEAD),
         ],
         'go': [
-            (r'func main\(\)', 'go', 1.0),
-            (r'package main', 'go', 0.8),
-            (r'gin\.', 'gin', 0.7),
-            (r'echo\.', 'echo', 0.7),
-            (r'fiber\.', 'fiber', 0.7),
-            (r'beego\.', 'beego', 0.7),
+            (r'func main\(\)', 'go', 1.0, WINDOW_ANY),
+            (r'package main', 'go', 0.8, WINDOW_HEAD),
+            (r'gin\.', 'gin', 0.7, WINDOW_ANY),
+            (r'echo\.', 'echo', 0.7, WINDOW_ANY),
+            (r'fiber\.', 'fiber', 0.7, WINDOW_ANY),
+            (r'beego\.', 'beego', 0.7, WINDOW_ANY),
         ],
     }
 
@@ -223,6 +319,57 @@ class PatternConfig:
         ],
     }
 
+    # Зависимости из манифестов, однозначно указывающие на тестовый раннер
+    # (go-testing определяется по файлам *_test.go, unittest - только по содержимому)
+    TEST_RUNNER_DEPENDENCIES = {
+        'pytest': ['pytest'],
+        'jest': ['jest', 'ts-jest', '@jest/core'],
+        'mocha': ['mocha'],
+        'jasmine': ['jasmine', 'jasmine-core'],
+        'karma': ['karma'],
+        'cypress': ['cypress'],
+        'playwright': ['@playwright/test', 'playwright', 'pytest-playwright'],
+        'vitest': ['vitest'],
+        'junit': ['junit', 'junit-jupiter', 'spring-boot-starter-test'],
+        'testng': ['testng'],
+        'cucumber': ['@cucumber/cucumber', 'cucumber', 'cucumber-java', 'behave'],
+        'selenium': ['selenium', 'selenium-webdriver', 'selenium-java'],
+        'go-testing': ['github.com/stretchr/testify'],
+    }
+
+    # Зависимости из манифестов (драйверы и клиенты), однозначно указывающие на БД
+    DATABASE_DEPENDENCIES = {
+        'postgresql': [
+            'psycopg2', 'psycopg2-binary', 'psycopg', 'asyncpg',  # Python
+            'pg', 'postgres', 'pg-promise',  # TypeScript/JavaScript
+            'github.com/lib/pq', 'github.com/jackc/pgx',  # Go
+            'postgresql', 'r2dbc-postgresql',  # Java
+        ],
+        'mysql': [
+            'pymysql', 'mysqlclient', 'mysql-connector-python', 'aiomysql',
+            'mysql', 'mysql2',
+            'github.com/go-sql-driver/mysql',
+            'mysql-connector-java', 'mysql-connector-j',
+        ],
+        'mongodb': [
+            'pymongo', 'motor', 'mongoengine',
+            'mongodb', 'mongoose',
+            'go.mongodb.org/mongo-driver',
+            'mongodb-driver', 'spring-boot-starter-data-mongodb',
+        ],
+        'redis': [
+            'redis', 'aioredis',
+            'ioredis',
+            'github.com/go-redis/redis', 'github.com/redis/go-redis',
+            'jedis', 'lettuce-core', 'spring-boot-starter-data-redis',
+        ],
+        'sqlite': ['aiosqlite', 'sqlite3', 'better-sqlite3', 'github.com/mattn/go-sqlite3', 'sqlite-jdbc'],
+        'cassandra': ['cassandra-driver', 'github.com/gocql/gocql', 'java-driver-core'],
+        'elasticsearch': ['elasticsearch', '@elastic/elasticsearch', 'github.com/elastic/go-elasticsearch', 'elasticsearch-java'],
+        'oracle': ['cx-oracle', 'oracledb', 'github.com/godror/godror', 'ojdbc8', 'ojdbc11'],
+        'sqlserver': ['pymssql', 'mssql', 'tedious', 'github.com/microsoft/go-mssqldb', 'mssql-jdbc'],
+    }
+
     # Паттерны для облачных платформ
     CLOUD_PATTERNS = {
         'aws': [r'aws', r'boto3', r'aws-sdk'],
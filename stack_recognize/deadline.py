@@ -0,0 +1,85 @@
+"""Дедлайн анализа и сторожевой таймер шагов."""
+import threading
+import time
+from typing import Callable, Optional
+
+# Запас времени сверх дедлайна, за который шаг должен заметить дедлайн и завершиться сам
+WATCHDOG_GRACE = 1.0
+
+# Состояния шагов анализа (stack.metrics['steps'])
+STEP_COMPLETE = 'complete'  # Шаг выполнен полностью
+STEP_PARTIAL = 'partial'  # Шаг остановлен дедлайном, часть файлов не прочитана
+STEP_TIMEOUT = 'timeout'  # Шаг не завершился к дедлайну, результат отброшен
+STEP_SKIPPED = 'skipped'  # Дедлайн истек до начала шага
+STEP_ERROR = 'error'  # Шаг завершился с ошибкой
+
+STEP_STATUS_HINTS = {
+    STEP_PARTIAL: "остановлен по дедлайну, результат неполный",
+    STEP_TIMEOUT: "не завершился к дедлайну, результат отброшен",
+    STEP_SKIPPED: "не выполнен: дедлайн истек",
+    STEP_ERROR: "завершился с ошибкой",
+}
+
+
+class Deadline:
+    """Момент времени, к которому анализ должен вернуть результат."""
+
+    def __init__(self, seconds: Optional[float] = None):
+        """
+        Инициализация дедлайна.
+
+        Args:
+            seconds: Бюджет времени в секундах от текущего момента (None - без ограничения)
+        """
+        self.expires_at = time.monotonic() + seconds if seconds is not None else None
+
+    def remaining(self) -> Optional[float]:
+        """Оставшееся время в секундах (None - без ограничения)."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """Истек ли дедлайн."""
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+
+def run_with_watchdog(func: Callable[[], None], timeout: Optional[float], name: str) -> bool:
+    """
+    Выполнить функцию под сторожевым таймером.
+
+    Функция выполняется в фоновом потоке. Поток нельзя прервать принудительно:
+    если он не завершился за timeout, результат не дожидаются, а поток
+    завершится сам (чтение файлов после дедлайна не выполняется). Поэтому func
+    должна писать только в собственное состояние, которое вызывающий
+    отбрасывает при False.
+    Исключение функции пробрасывается вызывающему.
+
+    Args:
+        func: Выполняемая функция
+        timeout: Время ожидания в секундах (None - выполнить в текущем потоке)
+        name: Имя потока (для логов)
+
+    Returns:
+        True если функция завершилась, False если истек timeout
+    """
+    if timeout is None:
+        func()
+        return True
+
+    errors = []
+
+    def target():
+        try:
+            func()
+        except BaseException as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=target, name=name, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        return False
+    if errors:
+        raise errors[0]
+    return True
@@ -0,0 +1,415 @@
+"""Разбор файлов сборки (build descriptors) и версии инструментов."""
+import fnmatch
+import json
+import logging
+import re
+import threading
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .inventory import FileInventory
+
+logger = logging.getLogger(__name__)
+
+# Свойства pom.xml с версией Java в порядке приоритета
+_POM_JAVA_PROPERTIES = (
+    'maven.compiler.release',
+    'maven.compiler.source',
+    'maven.compiler.target',
+    'java.version',
+    'javaVersion',
+)
+
+# Параметры maven-compiler-plugin (<configuration>) в порядке приоритета
+_POM_COMPILER_PARAMETERS = ('release', 'source', 'target')
+
+_GRADLE_JAVA_PATTERNS = [
+    re.compile(r'JavaLanguageVersion\.of\(\s*(\d+)\s*\)'),
+    re.compile(r'jvmToolchain\(\s*(\d+)\s*\)'),
+    re.compile(r'(?:source|target)Compatibility\s*=?\s*JavaVersion\.VERSION_(\d+(?:_\d+)?)'),
+    re.compile(r'(?:source|target)Compatibility\s*=?\s*[\'"]?(\d+(?:\.\d+)?)[\'"]?'),
+]
+
+_GO_DIRECTIVE = re.compile(r'^go\s+(\d+\.\d+(?:\.\d+)?)\s*$', re.MULTILINE)
+_REQUIRES_PYTHON = re.compile(r'^requires-python\s*=\s*["\']([^"\']+)["\']', re.MULTILINE)
+_POETRY_PYTHON = re.compile(r'^python\s*=\s*["\']([^"\']+)["\']', re.MULTILINE)
+_VERSION_NUMBER = re.compile(r'(\d+)(?:\.(\d+))?')
+_GRADLE_COORDINATE = re.compile(r'[\'"][\w.\-]+:([\w.\-]+)(?::[^\'"\s]*)?[\'"]')
+_POETRY_DEPENDENCY_SECTION = re.compile(r'^tool\.poetry\.(?:dev-dependencies|dependencies|group\.[\w-]+\.dependencies)$')
+_REQUIREMENT_NAME = re.compile(r'([A-Za-z0-9][A-Za-z0-9._-]*)')
+
+
+def _normalize_java(version: str) -> Optional[str]:
+    """'1.8' -> '8', '17' -> '17', 'VERSION_1_8' -> '8'."""
+    version = version.strip().replace('_', '.')
+    if version.startswith('1.'):
+        version = version[2:]
+    major = version.split('.')[0]
+    return major if major.isdigit() else None
+
+
+def _major(spec: str) -> Optional[str]:
+    """Мажорная версия из строки версии или диапазона ('>=18.0', '^20', 'v20.1.0')."""
+    match = _VERSION_NUMBER.search(spec)
+    return match.group(1) if match else None
+
+
+def _major_minor(spec: str) -> Optional[str]:
+    """Версия вида 'X.Y' из строки версии или диапазона ('>=3.10', '^3.11', '3.12.1')."""
+    match = _VERSION_NUMBER.search(spec)
+    if not match:
+        return None
+    return f"{match.group(1)}.{match.group(2)}" if match.group(2) else match.group(1)
+
+
+def _version_key(version: str) -> Tuple[int, ...]:
+    """Ключ сравнения версий ('1.21' < '1.22.1')."""
+    return tuple(int(part) for part in re.findall(r'\d+', version))
+
+
+@dataclass
+class BuildDescriptor:
+    """Результат разбора одного файла сборки."""
+    ecosystem: Optional[str] = None  # 'maven', 'go', 'npm', 'python'
+    versions: Dict[str, str] = field(default_factory=dict)  # инструмент -> версия
+    dependencies: List[str] = field(default_factory=list)  # объявленные зависимости
+
+
+def _parse_pom(path: Path) -> BuildDescriptor:
+    """
+    Версия Java и зависимости (artifactId) из pom.xml.
+
+    Файл разбирается потоково (iterparse), обработанные элементы сразу
+    освобождаются, поэтому память не зависит от размера POM.
+    """
+    descriptor = BuildDescriptor('maven')
+    found: Dict[str, str] = {}
+    parents: List[str] = []
+    in_compiler_plugin = False
+    try:
+        for event, element in ET.iterparse(str(path), events=('start', 'end')):
+            tag = element.tag.rsplit('}', 1)[-1]
+            if event == 'start':
+                parents.append(tag)
+                continue
+            parents.pop()
+            text = (element.text or '').strip()
+            if tag == 'artifactId' and text == 'maven-compiler-plugin':
+                in_compiler_plugin = True
+            elif tag == 'plugin':
+                in_compiler_plugin = False
+            if tag == 'artifactId' and text and parents and parents[-1] in ('dependency', 'parent'):
+                descriptor.dependencies.append(text)
+            elif tag in _POM_JAVA_PROPERTIES and text:
+                found.setdefault(tag, text)
+            elif in_compiler_plugin and tag in _POM_COMPILER_PARAMETERS and text and not text.startswith('$'):
+                found.setdefault(f'plugin.{tag}', text)
+            element.clear()
+    except (ET.ParseError, OSError) as e:
+        logger.debug(f"Не удалось разобрать {path}: {e}")
+
+    for key in _POM_JAVA_PROPERTIES + tuple(f'plugin.{p}' for p in _POM_COMPILER_PARAMETERS):
+        version = _normalize_java(found[key]) if key in found else None
+        if version:
+            descriptor.versions['java'] = version
+            break
+    return descriptor
+
+
+def _parse_gradle(path: Path) -> BuildDescriptor:
+    """Версия Java (toolchain или sourceCompatibility) и зависимости из build.gradle(.kts)."""
+    content = _read_text(path)
+    descriptor = BuildDescriptor('maven')
+    for pattern in _GRADLE_JAVA_PATTERNS:
+        match = pattern.search(content)
+        version = _normalize_java(match.group(1)) if match else None
+        if version:
+            descriptor.versions['java'] = version
+            break
+    descriptor.dependencies = _GRADLE_COORDINATE.findall(content)
+    return descriptor
+
+
+def _parse_go_mod(path: Path) -> BuildDescriptor:
+    """Версия Go из директивы go и прямые зависимости из require в go.mod.
+
+    Модули с комментарием // indirect - транзитивные зависимости, они пропускаются.
+    """
+    content = _read_text(path)
+    descriptor = BuildDescriptor('go')
+    match = _GO_DIRECTIVE.search(content)
+    if match:
+        descriptor.versions['go'] = match.group(1)
+    in_require = False
+    for line in content.splitlines():
+        line, _, comment = line.partition('//')
+        line = line.strip()
+        if comment.strip().startswith('indirect'):
+            continue
+        if in_require:
+            if line == ')':
+                in_require = False
+            elif line:
+                descriptor.dependencies.append(line.split()[0])
+        elif line.startswith('require'):
+            rest = line[len('require'):].strip()
+            if rest == '(':
+                in_require = True
+            elif rest:
+                descriptor.dependencies.append(rest.split()[0])
+    return descriptor
+
+
+def _parse_package_json(path: Path) -> BuildDescriptor:
+    """Версия Node.js из поля engines.node и зависимости из package.json."""
+    descriptor = BuildDescriptor('npm')
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            package = json.load(f)
+    except (OSError, ValueError):
+        return descriptor
+    if not isinstance(package, dict):
+        return descriptor
+    engines = package.get('engines')
+    node = engines.get('node') if isinstance(engines, dict) else None
+    version = _major(node) if isinstance(node, str) else None
+    if version:
+        descriptor.versions['node'] = version
+    for section in ('dependencies', 'devDependencies', 'peerDependencies', 'optionalDependencies'):
+        if isinstance(package.get(section), dict):
+            descriptor.dependencies.extend(package[section])
+    return descriptor
+
+
+def _parse_nvmrc(path: Path) -> BuildDescriptor:
+    """Версия Node.js из .nvmrc / .node-version ('lts/*' и алиасы пропускаются)."""
+    line = _read_text(path).strip().splitlines()[:1]
+    version = _major(line[0]) if line and not line[0].startswith('lts') else None
+    return BuildDescriptor('npm', {'node': version} if version else {})
+
+
+def _parse_python_version(path: Path) -> BuildDescriptor:
+    """Версия Python из .python-version (первая строка)."""
+    line = _read_text(path).strip().splitlines()[:1]
+    version = _major_minor(line[0]) if line else None
+    return BuildDescriptor('python', {'python': version} if version else {})
+
+
+def _parse_pyproject(path: Path) -> BuildDescriptor:
+    """
+    Минимальная версия Python и зависимости из pyproject.toml.
+
+    Поддерживаются [project] (dependencies, optional-dependencies) и
+    таблицы зависимостей Poetry; файл разбирается построчно без TOML-парсера.
+    """
+    content = _read_text(path)
+    descriptor = BuildDescriptor('python')
+    match = _REQUIRES_PYTHON.search(content) or _POETRY_PYTHON.search(content)
+    version = _major_minor(match.group(1)) if match else None
+    if version:
+        descriptor.versions['python'] = version
+
+    section = ''
+    in_array = False
+    for line in content.splitlines():
+        stripped = line.strip()
+        if stripped.startswith('['):
+            section = stripped.strip('[]').strip()
+            in_array = False
+            continue
+        if section == 'project' and re.match(r'dependencies\s*=\s*\[', stripped):
+            in_array = True
+        elif section == 'project.optional-dependencies' and re.match(r'[\w.-]+\s*=\s*\[', stripped):
+            in_array = True
+        if in_array:
+            descriptor.dependencies.extend(
+                _requirement_name(requirement) for requirement in re.findall(r'["\']([^"\']+)["\']', stripped)
+            )
+            if stripped.endswith(']'):
+                in_array = False
+        elif _POETRY_DEPENDENCY_SECTION.match(section):
+            key = re.match(r'([A-Za-z0-9][A-Za-z0-9._-]*)\s*=', stripped)
+            if key and key.group(1) != 'python':
+                descriptor.dependencies.append(key.group(1))
+    descriptor.dependencies = [name for name in descriptor.dependencies if name]
+    return descriptor
+
+
+def _parse_requirements(path: Path) -> BuildDescriptor:
+    """Зависимости из requirements*.txt (опции pip и ссылки пропускаются)."""
+    descriptor = BuildDescriptor('python')
+    for line in _read_text(path).splitlines():
+        line = line.split('#', 1)[0].strip()
+        if line and not line.startswith('-') and '://' not in line:
+            name = _requirement_name(line)
+            if name:
+                descriptor.dependencies.append(name)
+    return descriptor
+
+
+def _parse_pipfile(path: Path) -> BuildDescriptor:
+    """Зависимости из секций [packages] и [dev-packages] Pipfile."""
+    descriptor = BuildDescriptor('python')
+    section = ''
+    for line in _read_text(path).splitlines():
+        stripped = line.strip()
+        if stripped.startswith('['):
+            section = stripped.strip('[]').strip()
+            continue
+        key = re.match(r'["\']?([A-Za-z0-9][A-Za-z0-9._-]*)["\']?\s*=', stripped)
+        if section in ('packages', 'dev-packages') and key:
+            descriptor.dependencies.append(key.group(1))
+    return descriptor
+
+
+def _parse_setup_py(path: Path) -> BuildDescriptor:
+    """Зависимости из install_requires в setup.py (без выполнения файла)."""
+    descriptor = BuildDescriptor('python')
+    match = re.search(r'install_requires\s*=\s*\[(.*?)\]', _read_text(path), re.DOTALL)
+    if match:
+        for requirement in re.findall(r'["\']([^"\']+)["\']', match.group(1)):
+            name = _requirement_name(requirement)
+            if name:
+                descriptor.dependencies.append(name)
+    return descriptor
+
+
+def _requirement_name(requirement: str) -> str:
+    """Имя пакета из спецификации PEP 508 ('Django[bcrypt]>=4.2; python_version>"3"' -> 'Django')."""
+    match = _REQUIREMENT_NAME.match(requirement.strip())
+    return match.group(1) if match else ''
+
+
+def _read_text(path: Path) -> str:
+    """Прочитать небольшой текстовый файл сборки."""
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.read()
+    except OSError:
+        return ''
+
+
+# Имя файла сборки -> парсер
+DESCRIPTOR_PARSERS: Dict[str, Callable[[Path], BuildDescriptor]] = {
+    'pom.xml': _parse_pom,
+    'build.gradle': _parse_gradle,
+    'build.gradle.kts': _parse_gradle,
+    'go.mod': _parse_go_mod,
+    'package.json': _parse_package_json,
+    '.nvmrc': _parse_nvmrc,
+    '.node-version': _parse_nvmrc,
+    '.python-version': _parse_python_version,
+    'pyproject.toml': _parse_pyproject,
+    'Pipfile': _parse_pipfile,
+    'setup.py': _parse_setup_py,
+}
+
+# Шаблоны имен файлов сборки (проверяются, если имени нет в DESCRIPTOR_PARSERS)
+DESCRIPTOR_NAME_PATTERNS: Dict[str, Callable[[Path], BuildDescriptor]] = {
+    'requirements*.txt': _parse_requirements,
+}
+
+# Файлы, явно задающие версию, важнее диапазонов из манифестов
+_PINNED_FILES = {'.nvmrc', '.node-version', '.python-version'}
+
+
+def descriptor_parser(name: str) -> Optional[Callable[[Path], BuildDescriptor]]:
+    """Парсер для файла сборки с указанным именем (None, если файл не поддерживается)."""
+    if name in DESCRIPTOR_PARSERS:
+        return DESCRIPTOR_PARSERS[name]
+    for pattern, parser in DESCRIPTOR_NAME_PATTERNS.items():
+        if fnmatch.fnmatch(name, pattern):
+            return parser
+    return None
+
+
+class BuildDescriptors:
+    """Кэш разобранных файлов сборки на один анализ.
+
+    Каждый файл разбирается не более одного раза, даже если он попадает в
+    несколько корней анализа (корень репозитория и модули монорепозитория).
+    Экземпляр можно использовать из нескольких потоков.
+    """
+
+    def __init__(self):
+        self._cache: Dict[Path, BuildDescriptor] = {}
+        self._lock = threading.Lock()
+
+    def parse(self, path: Path) -> BuildDescriptor:
+        """
+        Разобрать файл сборки (результат кэшируется).
+
+        Args:
+            path: Путь к файлу сборки (см. DESCRIPTOR_PARSERS)
+
+        Returns:
+            BuildDescriptor с версиями инструментов и объявленными зависимостями
+        """
+        with self._lock:
+            if path in self._cache:
+                return self._cache[path]
+        parser = descriptor_parser(path.name)
+        result = parser(path) if parser else BuildDescriptor()
+        with self._lock:
+            self._cache[path] = result
+        return result
+
+    def descriptor_paths(self, inventory: 'FileInventory') -> List[Path]:
+        """Все поддерживаемые файлы сборки инвентаризации."""
+        return [entry.path for entry in inventory.entries if descriptor_parser(entry.name)]
+
+    def toolchain_versions(self, inventory: 'FileInventory', inherited: Iterable[Path] = ()) -> Dict[str, str]:
+        """
+        Версии инструментов для корня анализа.
+
+        Для каждого инструмента берется максимальная версия среди файлов сборки,
+        чтобы образ поддерживал все модули. Файлы .nvmrc/.python-version имеют
+        приоритет над диапазонами из package.json и pyproject.toml.
+
+        Args:
+            inventory: Инвентаризация корня анализа
+            inherited: Дополнительные файлы вне корня (например, родительский pom.xml)
+
+        Returns:
+            Словарь инструмент -> версия
+        """
+        pinned: Dict[str, List[str]] = {}
+        declared: Dict[str, List[str]] = {}
+        for path in self.descriptor_paths(inventory) + list(inherited):
+            target = pinned if path.name in _PINNED_FILES else declared
+            for tool, version in self.parse(path).versions.items():
+                target.setdefault(tool, []).append(version)
+
+        versions = {}
+        for tool in set(pinned) | set(declared):
+            candidates = pinned.get(tool) or declared[tool]
+            versions[tool] = max(candidates, key=_version_key)
+        return versions
+
+    def declared_dependencies(self, inventory: 'FileInventory') -> Dict[str, Dict[str, List[str]]]:
+        """
+        Зависимости, объявленные в манифестах корня анализа.
+
+        Args:
+            inventory: Инвентаризация корня анализа
+
+        Returns:
+            Словарь экосистема -> {имя зависимости -> относительные пути манифестов}.
+            Экосистема присутствует, если найден хотя бы один ее манифест.
+        """
+        declared: Dict[str, Dict[str, List[str]]] = {}
+        for entry in inventory.entries:
+            if not descriptor_parser(entry.name):
+                continue
+            descriptor = self.parse(entry.path)
+            if not descriptor.ecosystem or entry.name in _PINNED_FILES:
+                continue
+            names = declared.setdefault(descriptor.ecosystem, {})
+            for name in descriptor.dependencies:
+                manifests = names.setdefault(name, [])
+                if entry.rel_path not in manifests:
+                    manifests.append(entry.rel_path)
+        return declared
@@ -1,15 +1,32 @@
 """Основной класс для определения технологического стека проекта."""
+import asyncio
+import copy
 import os
 import shutil
 import subprocess
 import tempfile
 import logging
+from dataclasses import fields as dataclass_fields, replace
+from functools import partial
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
 
 try:
-    from .models import ProjectStack
+    from .models import ProjectStack, ModuleStack
     from .config import ConfigLoader
+    from .deadline import (
+        STEP_COMPLETE, STEP_ERROR, STEP_PARTIAL, STEP_SKIPPED, STEP_STATUS_HINTS, STEP_TIMEOUT,
+        WATCHDOG_GRACE, Deadline, run_with_watchdog,
+    )
+    from .descriptors import BuildDescriptors
+    from .events import (
+        EVENT_CLONED, EVENT_INVENTORY, EVENT_STACK, EVENT_STEP,
+        AnalysisEvent, EventCallback, EventSink, aiter_events, iter_events, step_fields,
+    )
+    from .inventory import FileInventory
+    from .modules import find_module_roots
+    from .ruleset import get_ruleset
+    from .session import AnalysisSession, AnalysisTarget, steps_for_fields
     from .analyzers import (
         LanguageAnalyzer,
         FrameworkAnalyzer,
@@ -23,8 +40,21 @@ try:
         HintsAnalyzer,
     )
 except ImportError:
-    from models import ProjectStack
+    from models import ProjectStack, ModuleStack
     from config import ConfigLoader
+    from deadline import (
+        STEP_COMPLETE, STEP_ERROR, STEP_PARTIAL, STEP_SKIPPED, STEP_STATUS_HINTS, STEP_TIMEOUT,
+        WATCHDOG_GRACE, Deadline, run_with_watchdog,
+    )
+    from descriptors import BuildDescriptors
+    from events import (
+        EVENT_CLONED, EVENT_INVENTORY, EVENT_STACK, EVENT_STEP,
+        AnalysisEvent, EventCallback, EventSink, aiter_events, iter_events, step_fields,
+    )
+    from inventory import FileInventory
+    from modules import find_module_roots
+    from ruleset import get_ruleset
+    from session import AnalysisSession, AnalysisTarget, steps_for_fields
     from analyzers import (
         LanguageAnalyzer,
         FrameworkAnalyzer,
@@ -38,13 +68,18 @@ except ImportError:
         HintsAnalyzer,
     )
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class ProjectStackDetector:
-    """Детектор технологического стека проекта по Git-репозиторию."""
+    """Детектор технологического стека проекта по Git-репозиторию.
+
+    Детектор после создания не изменяется: клон, инвентаризация и
+    результат каждого вызова живут в его AnalysisSession. Поэтому один
+    экземпляр можно использовать одновременно из нескольких потоков
+    (и из asyncio через detect_stack_async) без повторной сборки правил.
+    Логирование настраивает приложение, а не модуль.
+    """
 
     def __init__(self, config_path: str = None):
         """
@@ -53,9 +88,11 @@ class ProjectStackDetector:
         Args:
             config_path: Путь к конфигурационному файлу (опционально)
         """
-        self.temp_dir = None
-        self.repo_path = None
         self.config_loader = ConfigLoader(config_path)
+        # Скомпилированные правила общие для процесса и пересобираются при изменении конфигурации
+        self.ruleset = get_ruleset(self.config_loader)
+        self.vendored_classifier = self.ruleset.vendored
+        self.sampling_policy = self.ruleset.sampling
 
         # Инициализация анализаторов
         self.language_analyzer = LanguageAnalyzer(self.config_loader)
@@ -69,124 +106,446 @@ class ProjectStackDetector:
         self.cicd_analyzer = CICDAnalyzer(self.config_loader)
         self.hints_analyzer = HintsAnalyzer(self.config_loader)
 
-    def detect_stack(self, repo_url: str) -> ProjectStack:
+        # Шаги анализа (см. session.ANALYSIS_STEPS): step(session, target)
+        self.steps = {
+            'language': self._run_language,
+            'framework': lambda session, target: self.framework_analyzer.analyze(target.root, target.stack, target.inventory),
+            'devops': lambda session, target: self.devops_analyzer.analyze(target.root, target.stack, target.inventory),
+            'test': lambda session, target: self.test_analyzer.analyze(target.root, target.stack, target.inventory),
+            'database': lambda session, target: self.database_analyzer.analyze(target.root, target.stack, target.inventory),
+            'cloud': lambda session, target: self.cloud_analyzer.analyze(target.root, target.stack, target.inventory),
+            'build_tools': lambda session, target: self.build_tools_analyzer.analyze(target.root, target.stack, target.inventory),
+            'cicd': lambda session, target: self.cicd_analyzer.analyze(target.root, target.stack, target.inventory),
+            'hints': lambda session, target: self.hints_analyzer.analyze(target.root, target.stack, target.inventory),
+            'entry_point': lambda session, target: self.entry_point_analyzer.analyze(target.root, target.stack, target.inventory),
+            'toolchain': self._run_toolchain,
+        }
+
+    def detect_stack(
+        self,
+        repo_url: str,
+        scope_path: Optional[str] = None,
+        detect_modules: bool = False,
+        max_workers: Optional[int] = None,
+        files_listing_path: Optional[str] = None,
+        count_lines: bool = False,
+        fields: Optional[Iterable[str]] = None,
+        deadline: Optional[float] = None,
+        sample_content: bool = False,
+        on_event: Optional[EventCallback] = None,
+    ) -> ProjectStack:
         """
         Основной метод для определения технологического стека.
 
         Args:
             repo_url: URL Git-репозитория
+            scope_path: Поддиректория репозитория для анализа (опционально).
+                Анализируется только это поддерево, манифесты из корня
+                репозитория учитываются как унаследованный контекст.
+            detect_modules: Определить стеки модулей монорепозитория
+                (результат в stack.modules, сам stack остается агрегатом)
+            max_workers: Количество потоков для анализа модулей
+            files_listing_path: Файл для полного списка файлов по языкам
+                (в files_detected остаются только количество и выборка путей)
+            count_lines: Считать доли языков также по строкам (stack.language_stats)
+            fields: Нужные поля ProjectStack (см. session.FIELD_STEPS). Запускаются
+                только анализаторы, заполняющие эти поля; None - все анализаторы.
+                Чтобы досчитать остальные поля позже, используйте open_session.
+                Неизвестное поле - ValueError (до клонирования).
+            deadline: Бюджет времени на анализ в секундах, включая клонирование
+                (None - без ограничения). К дедлайну возвращается частичный стек:
+                состояние каждого шага - в stack.metrics['steps'], незавершенные
+                шаги отмечаются в stack.hints.
+            sample_content: Определять фреймворки и тестовые раннеры по
+                стратифицированной выборке файлов вместо чтения всех файлов
+                (параметры - секция sampling конфигурации, достигнутая
+                уверенность - в stack.metrics['sampling'])
+            on_event: Обработчик событий хода анализа (см. events.AnalysisEvent):
+                клонирование, инвентаризация, каждый шаг анализа с заполненными
+                им полями, итоговый стек. Вызывается из потоков анализа.
+                Для генератора событий используйте detect_stack_events.
 
         Returns:
-            ProjectStack: Объект с информацией о стеке
+            ProjectStack: Объект с информацией о стеке. Если анализ не удалось
+            выполнить (репозиторий не клонирован, поддиректория не найдена),
+            стек пуст, а причина - в stack.metrics['error'] и stack.hints
         """
+        steps = steps_for_fields(fields)
         stack = ProjectStack()
+        session = None
+        events = EventSink.wrap(on_event)
 
         try:
-            # Клонирование репозитория
-            self._clone_repository(repo_url)
-
-            # Анализ содержимого
-            self.language_analyzer.analyze(self.repo_path, stack)
-            self.framework_analyzer.analyze(self.repo_path, stack)
-            self.devops_analyzer.analyze(self.repo_path, stack)
-            self.test_analyzer.analyze(self.repo_path, stack)
-            self.database_analyzer.analyze(self.repo_path, stack)
-            self.cloud_analyzer.analyze(self.repo_path, stack)
-            self.build_tools_analyzer.analyze(self.repo_path, stack)
-            self.cicd_analyzer.analyze(self.repo_path, stack)
-            self.hints_analyzer.analyze(self.repo_path, stack)
-
-            # Анализ точек входа
-            self.entry_point_analyzer.analyze(self.repo_path, stack)
-            
-            # Определяем версию Java из pom.xml до очистки
-            java_version = self._extract_java_version_from_pom()
-            if java_version:
-                if not hasattr(stack, 'java_version'):
-                    stack.files_detected['java_version'] = java_version
-                else:
-                    stack.java_version = java_version
-
+            stack.scope_path = self._normalize_scope_path(scope_path)
+            session = self.open_session(
+                repo_url, scope_path, detect_modules, max_workers, files_listing_path, count_lines, deadline, sample_content,
+                events,
+            )
+            stack = session.stack
+            session.ensure(fields)
+            logger.info(f"Выполненные шаги анализа: {steps}")
         except Exception as e:
             logger.error(f"Ошибка при анализе репозитория: {e}")
             stack.hints.append(f"Ошибка анализа: {str(e)}")
+            # Анализ не выполнен (клонирование, поддиректория): ValueError - ошибка входных данных
+            stack.metrics['error'] = {'message': str(e), 'input': isinstance(e, ValueError)}
         finally:
             # Очистка временных файлов
-            self._cleanup()
+            if session:
+                session.close()
 
+        if events:
+            events.emit(EVENT_STACK, stack=stack)
         return stack
 
-    def _clone_repository(self, repo_url: str):
-        """Клонирование репозитория во временную директорию."""
-        self.temp_dir = tempfile.mkdtemp(prefix="repo_analyzer_")
-        logger.info(f"Клонирование репозитория {repo_url} в {self.temp_dir}")
+    async def detect_stack_async(self, repo_url: str, **kwargs) -> ProjectStack:
+        """
+        detect_stack для asyncio: анализ выполняется в отдельном потоке, не блокируя цикл событий.
+
+        Args:
+            repo_url: URL Git-репозитория
+            **kwargs: Параметры detect_stack
+
+        Returns:
+            ProjectStack: Объект с информацией о стеке
+        """
+        return await asyncio.to_thread(self.detect_stack, repo_url, **kwargs)
+
+    def detect_stack_events(self, repo_url: str, **kwargs) -> Iterator[AnalysisEvent]:
+        """
+        detect_stack в виде генератора событий хода анализа.
+
+        Анализ выполняется в фоновом потоке, события выдаются по мере
+        появления; последнее событие - EVENT_STACK с итоговым стеком.
+
+        Args:
+            repo_url: URL Git-репозитория
+            **kwargs: Параметры detect_stack (кроме on_event)
+
+        Returns:
+            Iterator[AnalysisEvent]: События анализа
+        """
+        return iter_events(lambda callback: self.detect_stack(repo_url, on_event=callback, **kwargs))
+
+    def detect_stack_events_async(self, repo_url: str, **kwargs) -> AsyncIterator[AnalysisEvent]:
+        """
+        detect_stack_events для asyncio (async for), не блокирует цикл событий.
+
+        Args:
+            repo_url: URL Git-репозитория
+            **kwargs: Параметры detect_stack (кроме on_event)
+
+        Returns:
+            AsyncIterator[AnalysisEvent]: События анализа
+        """
+        return aiter_events(lambda callback: self.detect_stack(repo_url, on_event=callback, **kwargs))
+
+    def open_session(
+        self,
+        repo_url: str,
+        scope_path: Optional[str] = None,
+        detect_modules: bool = False,
+        max_workers: Optional[int] = None,
+        files_listing_path: Optional[str] = None,
+        count_lines: bool = False,
+        deadline: Optional[float] = None,
+        sample_content: bool = False,
+        on_event: Optional[EventCallback] = None,
+    ) -> AnalysisSession:
+        """
+        Клонировать репозиторий и подготовить сессию анализа без запуска анализаторов.
+
+        Поля стека вычисляются через session.ensure(fields) по мере необходимости
+        из того же checkout. Сессию нужно закрыть (close() или with).
+
+        Args:
+            repo_url: URL Git-репозитория
+            scope_path: Поддиректория репозитория для анализа (опционально)
+            detect_modules: Найти модули монорепозитория (анализируются вместе с корнем)
+            max_workers: Количество потоков для анализа модулей
+            files_listing_path: Файл для полного списка файлов по языкам
+            count_lines: Считать доли языков также по строкам
+            deadline: Бюджет времени в секундах на клонирование и все шаги
+                анализа сессии (None - без ограничения)
+            sample_content: Выборочный анализ содержимого (см. detect_stack)
+            on_event: Обработчик событий хода анализа (см. detect_stack); события
+                шагов приходят из последующих вызовов session.ensure
+
+        Returns:
+            AnalysisSession
+        """
+        events = EventSink.wrap(on_event)
+        scope = self._normalize_scope_path(scope_path)
+        session_deadline = Deadline(deadline) if deadline is not None else None
+        temp_dir = tempfile.mkdtemp(prefix="repo_analyzer_")
 
         try:
+            # Клонирование репозитория
+            repo_path = self._clone_repository(repo_url, temp_dir, scope, session_deadline)
+            if events:
+                events.emit(EVENT_CLONED, sparse=bool(scope))
+
+            analysis_root = repo_path / scope if scope else repo_path
+            if not analysis_root.is_dir():
+                raise ValueError(f"Директория {scope} не найдена в репозитории")
+
+            # Единственный проход по файлам, общий для всех анализаторов
+            # (файлы сборки разбираются один раз за анализ - кэш общий для корня и модулей)
+            inventory = FileInventory.build(analysis_root, self.vendored_classifier, BuildDescriptors())
+            inventory.deadline = session_deadline
+            inventory.sampling = self.sampling_policy if sample_content else None
+            stack = ProjectStack(scope_path=scope, commit_sha=self._head_commit(repo_path))
+            stack.metrics.update(inventory.metrics())
+            logger.info(
+                f"Инвентаризация: {len(inventory.entries)} файлов, "
+                f"пропущено стороннего кода: {stack.metrics['vendored_files']} файлов"
+            )
+
+            modules, module_targets = self._find_modules(inventory, scope) if detect_modules else ([], [])
+            if events:
+                events.emit(
+                    EVENT_INVENTORY,
+                    files=len(inventory.entries),
+                    vendored_files=stack.metrics['vendored_files'],
+                    modules=[target.module_path for target in module_targets],
+                )
+        except Exception:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+
+        return AnalysisSession(
+            self,
+            temp_dir,
+            repo_path,
+            AnalysisTarget(analysis_root, stack, inventory),
+            modules,
+            module_targets,
+            max_workers,
+            files_listing_path,
+            count_lines,
+            session_deadline,
+            events,
+        )
+
+    def _run_steps(self, session: AnalysisSession, target: AnalysisTarget, steps: List[str]):
+        """Выполнить для корня анализа шаги, которые еще не выполнялись.
+
+        Каждый шаг выполняется под сторожевым таймером до дедлайна сессии.
+        Шаг заполняет копию стека, которая переносится в target.stack только
+        после завершения шага: поток шага, не завершившегося к дедлайну,
+        продолжает менять лишь свою копию, и она отбрасывается.
+        Ошибка или остановка шага не прерывает остальные шаги: состояние шагов
+        сохраняется в stack.metrics['steps'], незавершенные шаги - в stack.hints.
+        Шаг, пропущенный из-за истекшего дедлайна, не считается выполненным.
+        """
+        deadline = session.deadline
+        for step in steps:
+            if step in target.done:
+                continue
+
+            error = None
+            if deadline and deadline.expired():
+                status = STEP_SKIPPED
+            else:
+                skipped_reads = target.inventory.skipped_reads
+                timeout = deadline.remaining() + WATCHDOG_GRACE if deadline else None
+                scratch = replace(target, stack=_copy_stack(target.stack))
+                try:
+                    finished = run_with_watchdog(partial(self.steps[step], session, scratch), timeout, f"analysis-{step}")
+                except Exception as e:
+                    logger.error(f"Ошибка шага анализа {step}: {e}")
+                    error = e
+                    status = STEP_ERROR
+                    _merge_stack(target.stack, scratch.stack)
+                else:
+                    if not finished:
+                        logger.warning(f"Шаг анализа {step} не завершился к дедлайну, его результат отброшен")
+                        status = STEP_TIMEOUT
+                    else:
+                        _merge_stack(target.stack, scratch.stack)
+                        if target.inventory.skipped_reads > skipped_reads:
+                            status = STEP_PARTIAL
+                        else:
+                            status = STEP_COMPLETE
+                target.done.add(step)
+
+            target.stack.metrics.setdefault('steps', {})[step] = status
+            if status != STEP_COMPLETE:
+                hint = f"Шаг анализа {step} {STEP_STATUS_HINTS[status]}"
+                target.stack.hints.append(f"{hint}: {error}" if error else hint)
+            if session.events:
+                fields = step_fields(step, target.stack) if status not in (STEP_SKIPPED, STEP_TIMEOUT) else {}
+                session.events.emit(EVENT_STEP, step=step, status=status, module=target.module_path, fields=fields)
+
+    def _run_language(self, session: AnalysisSession, target: AnalysisTarget):
+        """Языки и менеджер пакетов (с учетом манифестов корня репозитория)."""
+        if session.files_listing_path and target.module_path is None:
+            with open(session.files_listing_path, 'w', encoding='utf-8') as files_listing:
+                self.language_analyzer.analyze(
+                    target.root, target.stack, target.inventory, files_listing, session.count_lines
+                )
+            target.stack.files_detected['files_listing'] = session.files_listing_path
+        else:
+            self.language_analyzer.analyze(target.root, target.stack, target.inventory, None, session.count_lines)
+        self.language_analyzer.analyze_inherited(session.repo_path, target.root, target.stack)
+
+    def _run_toolchain(self, session: AnalysisSession, target: AnalysisTarget):
+        """Версии инструментов (Java, Go, Node.js, Python) из файлов сборки."""
+        versions = self._detect_toolchain_versions(session.repo_path, target.root, target.inventory)
+        for tool, version in versions.items():
+            target.stack.files_detected[f'{tool}_version'] = version
+
+    def _find_modules(
+        self,
+        inventory: FileInventory,
+        scope: Optional[str] = None,
+    ) -> Tuple[List[ModuleStack], List[AnalysisTarget]]:
+        """
+        Найти модули монорепозитория.
+
+        Корни модулей находятся один раз (workspace-манифесты и эвристики по
+        директориям). Каждый модуль анализируется по своей части общей
+        инвентаризации без повторного обхода диска (см. AnalysisSession.ensure).
+
+        Args:
+            inventory: Инвентаризация корня анализа
+            scope: Поддиректория анализа относительно корня репозитория
+
+        Returns:
+            Дерево модулей (вложенные модули находятся в modules родителя)
+            и корни анализа модулей
+        """
+        roots = find_module_roots(inventory)
+        if not roots:
+            return [], []
+        logger.info(f"Найдено модулей монорепозитория: {len(roots)}")
+
+        modules = []
+        targets = []
+        for rel_dir, source in roots:
+            module = ModuleStack(path=rel_dir, source=source)
+            module.stack.scope_path = f"{scope}/{rel_dir}" if scope else rel_dir
+            module_inventory = inventory.subset(rel_dir)
+            module.stack.metrics.update(module_inventory.metrics())
+            modules.append(module)
+            targets.append(AnalysisTarget(module_inventory.root, module.stack, module_inventory, rel_dir))
+
+        # Собираем дерево: родитель - ближайший модуль, путь которого является префиксом
+        by_path: Dict[str, ModuleStack] = {}
+        top_level = []
+        for module in modules:
+            parent = None
+            parent_path = module.path
+            while '/' in parent_path and parent is None:
+                parent_path = parent_path.rpartition('/')[0]
+                parent = by_path.get(parent_path)
+            (parent.modules if parent else top_level).append(module)
+            by_path[module.path] = module
+
+        return top_level, targets
+
+    @staticmethod
+    def _normalize_scope_path(scope_path: Optional[str]) -> Optional[str]:
+        """Нормализовать путь поддиректории относительно корня репозитория."""
+        if not scope_path:
+            return None
+
+        parts = [part for part in scope_path.replace('\\', '/').split('/') if part not in ('', '.')]
+        if any(part == '..' for part in parts):
+            raise ValueError(f"Путь поддиректории не может выходить за пределы репозитория: {scope_path}")
+        if parts and parts[0].startswith('-'):
+            raise ValueError(f"Путь поддиректории не может начинаться с '-': {scope_path}")
+
+        return '/'.join(parts) or None
+
+    def _clone_repository(
+        self,
+        repo_url: str,
+        temp_dir: str,
+        scope_path: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Path:
+        """Клонирование репозитория во временную директорию.
+
+        Если указан scope_path, используется sparse checkout: на диск выгружаются
+        только поддерево scope_path и файлы из корня репозитория.
+        Если задан deadline, git останавливается по его истечении.
+
+        Returns:
+            Путь к корню репозитория
+        """
+        logger.info(f"Клонирование репозитория {repo_url} в {temp_dir}")
+
+        try:
+            if scope_path and self._sparse_clone(repo_url, temp_dir, scope_path, deadline):
+                return Path(temp_dir)
+
             subprocess.run([
-                'git', 'clone', '--depth', '1', repo_url, self.temp_dir
-            ], check=True, capture_output=True, text=True)
+                'git', 'clone', '--depth', '1', '--', repo_url, temp_dir
+            ], check=True, capture_output=True, text=True, timeout=deadline.remaining() if deadline else None)
 
-            self.repo_path = Path(self.temp_dir)
+            return Path(temp_dir)
         except subprocess.CalledProcessError as e:
             raise Exception(f"Ошибка клонирования репозитория: {e.stderr}")
+        except subprocess.TimeoutExpired:
+            raise Exception("Клонирование репозитория не завершилось до дедлайна")
 
-    def _extract_java_version_from_pom(self) -> Optional[str]:
-        """Извлечь версию Java из pom.xml файлов в репозитории.
-        
-        Возвращает максимальную версию Java из всех найденных pom.xml файлов,
-        чтобы образ поддерживал все модули монорепозитория.
-        """
-        import re
-        
-        if not self.repo_path or not self.repo_path.exists():
-            return None
-        
-        # Ищем все pom.xml файлы
-        pom_files = list(self.repo_path.rglob("pom.xml"))
-        if not pom_files:
+    @staticmethod
+    def _head_commit(repo_path: Path) -> Optional[str]:
+        """Коммит, выгруженный в клон (None, если git не смог его определить)."""
+        try:
+            result = subprocess.run(
+                ['git', '-C', str(repo_path), 'rev-parse', 'HEAD'], check=True, capture_output=True, text=True
+            )
+        except (subprocess.CalledProcessError, OSError) as e:
+            logger.warning(f"Не удалось определить коммит клона: {e}")
             return None
-        
-        versions = []
-        
-        # Пробуем найти версию Java в каждом pom.xml
-        for pom_file in pom_files:
-            try:
-                with open(pom_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Ищем maven.compiler.release, source, target или java.version
-                patterns = [
-                    r'<maven\.compiler\.release>(\d+)</maven\.compiler\.release>',
-                    r'<maven\.compiler\.source>(\d+)</maven\.compiler\.source>',
-                    r'<maven\.compiler\.target>(\d+)</maven\.compiler\.target>',
-                    r'<java\.version>(\d+)</java\.version>',
-                    r'<javaVersion>(\d+)</javaVersion>',
-                ]
-                
-                for pattern in patterns:
-                    match = re.search(pattern, content)
-                    if match:
-                        version = match.group(1)
-                        # Нормализуем версию (например, 21 -> 21, 1.8 -> 8)
-                        if version.startswith('1.'):
-                            version = version[2:]
-                        try:
-                            versions.append(int(version))
-                        except ValueError:
-                            pass
-                        break
-            except Exception:
-                continue
-        
-        # Возвращаем максимальную версию Java
-        if versions:
-            return str(max(versions))
-        
-        return None
-
-    def _cleanup(self):
-        """Очистка временных файлов."""
-        if self.temp_dir and os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
-            logger.info(f"Временная директория {self.temp_dir} удалена")
+        return result.stdout.strip() or None
+
+    def _sparse_clone(self, repo_url: str, temp_dir: str, scope_path: str, deadline: Optional[Deadline] = None) -> bool:
+        """Частичное клонирование только поддерева scope_path.
+
+        Returns:
+            True если sparse checkout удался, иначе False (нужен полный клон)
+        """
+        try:
+            subprocess.run([
+                'git', 'clone', '--depth', '1', '--filter=blob:none', '--sparse', '--', repo_url, temp_dir
+            ], check=True, capture_output=True, text=True, timeout=deadline.remaining() if deadline else None)
+            # В cone-режиме файлы из корня репозитория выгружаются всегда
+            subprocess.run([
+                'git', '-C', temp_dir, 'sparse-checkout', 'set', '--', scope_path
+            ], check=True, capture_output=True, text=True, timeout=deadline.remaining() if deadline else None)
+            return True
+        except subprocess.CalledProcessError as e:
+            logger.warning(f"Sparse checkout недоступен, выполняется полное клонирование: {e.stderr}")
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            os.makedirs(temp_dir, exist_ok=True)
+            return False
+
+    def _detect_toolchain_versions(self, repo_path: Path, analysis_root: Path, inventory: FileInventory) -> Dict[str, str]:
+        """Определить версии инструментов по файлам сборки корня анализа.
+
+        При анализе поддиректории со своим pom.xml также учитывается
+        родительский pom.xml из корня репозитория.
+        """
+        inherited = []
+        root_pom = repo_path / "pom.xml"
+        if analysis_root != repo_path and inventory.by_name("pom.xml") and root_pom.is_file():
+            inherited.append(root_pom)
+        return inventory.descriptors.toolchain_versions(inventory, inherited)
+
+
+def _copy_stack(stack: ProjectStack) -> ProjectStack:
+    """Копия стека для выполнения шага (без модулей: их стеки заполняют свои шаги)."""
+    # Одна копия для всех полей сохраняет общие объекты (main_entry_point - элемент entry_points)
+    return ProjectStack(**copy.deepcopy({
+        item.name: getattr(stack, item.name) for item in dataclass_fields(ProjectStack) if item.name != 'modules'
+    }))
+
 
+def _merge_stack(stack: ProjectStack, result: ProjectStack):
+    """Перенести в стек результат завершившегося шага (копия стека, заполненная шагом)."""
+    for item in dataclass_fields(ProjectStack):
+        if item.name != 'modules':
+            setattr(stack, item.name, getattr(result, item.name))
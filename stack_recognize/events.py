@@ -0,0 +1,162 @@
+"""События хода анализа: клонирование, инвентаризация, шаги анализаторов, итоговый стек."""
+import asyncio
+import copy
+import logging
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Union
+
+from .models import ProjectStack
+from .session import FIELD_STEPS
+
+logger = logging.getLogger(__name__)
+
+EVENT_CLONED = 'cloned'  # Репозиторий клонирован
+EVENT_INVENTORY = 'inventory'  # Инвентаризация файлов построена
+EVENT_STEP = 'step'  # Шаг анализа завершен (с полями, которые он заполнил)
+EVENT_STACK = 'stack'  # Итоговый стек
+
+# Обработчик события
+EventCallback = Callable[['AnalysisEvent'], None]
+
+
+@dataclass
+class AnalysisEvent:
+    """Событие хода анализа."""
+    type: str  # EVENT_*
+    elapsed: float  # Секунды от начала анализа
+    data: Dict[str, Any] = field(default_factory=dict)
+    stack: Optional[ProjectStack] = None  # Итоговый стек (только EVENT_STACK)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Представление события для JSON (одна строка NDJSON)."""
+        result = {'event': self.type, 'elapsed': round(self.elapsed, 3), **self.data}
+        if self.stack is not None:
+            result['stack'] = asdict(self.stack)
+        return result
+
+
+class EventSink:
+    """Передает события анализа обработчику.
+
+    Шаги модулей монорепозитория выполняются в нескольких потоках, поэтому
+    обработчик должен быть потокобезопасным. Исключение обработчика не
+    прерывает анализ.
+    """
+
+    def __init__(self, callback: EventCallback):
+        self.callback = callback
+        self.started = time.monotonic()
+
+    @classmethod
+    def wrap(cls, on_event: Union[EventCallback, 'EventSink', None]) -> Optional['EventSink']:
+        """EventSink для обработчика (уже созданный EventSink возвращается как есть)."""
+        if on_event is None or isinstance(on_event, cls):
+            return on_event
+        return cls(on_event)
+
+    def emit(self, event_type: str, stack: Optional[ProjectStack] = None, **data):
+        """Отправить событие обработчику."""
+        event = AnalysisEvent(event_type, time.monotonic() - self.started, data, stack)
+        try:
+            self.callback(event)
+        except Exception as e:
+            logger.warning(f"Ошибка обработчика события {event_type}: {e}")
+
+
+def step_fields(step: str, stack: ProjectStack) -> Dict[str, Any]:
+    """
+    Поля стека, которые окончательно заполнены шагом (см. FIELD_STEPS).
+
+    Значения копируются: стек продолжает заполняться следующими шагами.
+
+    Args:
+        step: Шаг анализа
+        stack: Стек корня анализа или модуля
+
+    Returns:
+        Поле -> значение
+    """
+    fields = {}
+    for name, steps in FIELD_STEPS.items():
+        if steps[-1] != step:
+            continue
+        if name == 'toolchain_versions':
+            fields[name] = {
+                key: value for key, value in stack.files_detected.items() if key.endswith('_version')
+            }
+            continue
+        fields[name] = _plain(getattr(stack, name))
+    return fields
+
+
+def _plain(value: Any) -> Any:
+    """Копия значения поля стека из словарей и списков (EntryPoint - словарь)."""
+    if hasattr(value, '__dataclass_fields__'):
+        return asdict(value)
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return copy.deepcopy(value)
+
+
+_DONE = object()
+
+
+def _run_in_thread(run: Callable[[EventCallback], Any], put: Callable[[Any], None]):
+    """Запустить анализ в фоновом потоке, передавая события, ошибку и завершение через put."""
+    def target():
+        try:
+            run(put)
+        except BaseException as e:
+            put(e)
+        put(_DONE)
+
+    threading.Thread(target=target, name='analysis-events', daemon=True).start()
+
+
+def iter_events(run: Callable[[EventCallback], Any]) -> Iterator[AnalysisEvent]:
+    """
+    Выполнить анализ в фоновом потоке и выдавать его события по мере появления.
+
+    Если потребитель прекращает чтение, анализ все равно доходит до конца
+    (и удаляет временную директорию) в фоновом потоке.
+
+    Args:
+        run: Функция, выполняющая анализ с переданным обработчиком событий
+
+    Yields:
+        AnalysisEvent
+    """
+    events: queue.Queue = queue.Queue()
+    _run_in_thread(run, events.put)
+    while True:
+        item = events.get()
+        if item is _DONE:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+
+async def aiter_events(run: Callable[[EventCallback], Any]) -> AsyncIterator[AnalysisEvent]:
+    """
+    iter_events для asyncio: события передаются в цикл событий без его блокировки.
+
+    Args:
+        run: Функция, выполняющая анализ с переданным обработчиком событий
+
+    Yields:
+        AnalysisEvent
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    _run_in_thread(run, lambda item: loop.call_soon_threadsafe(events.put_nowait, item))
+    while True:
+        item = await events.get()
+        if item is _DONE:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield item
@@ -0,0 +1,576 @@
+"""Инвентаризация файлов репозитория и дерево агрегатов по директориям."""
+import logging
+import os
+import re
+import stat
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+from .utils import (
+    should_ignore_path,
+    get_language_extensions,
+    is_binary_content,
+    is_generated_name,
+    is_generated_content,
+    limit_sample,
+    limit_sample_tail,
+    BINARY_EXTENSIONS,
+    SNIFF_BLOCK_SIZE,
+)
+from .deadline import Deadline
+from .descriptors import BuildDescriptors
+from .vendored import VendoredClassifier, measure_directory
+
+if TYPE_CHECKING:
+    from .sampling import SamplingPolicy
+
+logger = logging.getLogger(__name__)
+
+# Размер файла по умолчанию для выборок (совпадает с get_relevant_files)
+DEFAULT_MAX_FILE_SIZE = 1024 * 1024
+
+# Манифесты, наличие которых учитывается в агрегатах директорий
+MANIFEST_FILES = {
+    'package.json', 'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml', 'tsconfig.json',
+    'requirements.txt', 'pyproject.toml', 'setup.py', 'Pipfile', 'poetry.lock', 'tox.ini',
+    'pom.xml', 'build.gradle', 'build.gradle.kts', 'settings.gradle', 'settings.gradle.kts', 'build.xml',
+    'go.mod', 'go.sum', 'go.work',
+}
+
+# Типичные имена директорий монорепозиториев
+FRONTEND_DIRS = {'frontend', 'web', 'client', 'ui', 'app'}
+BACKEND_DIRS = {'backend', 'server', 'api', 'services'}
+APPS_DIRS = {'apps', 'applications'}
+PACKAGES_DIRS = {'packages', 'libs', 'libraries'}
+
+
+def _build_extension_map() -> Dict[str, str]:
+    """Обратный словарь расширение -> язык (как в LanguageAnalyzer)."""
+    extension_map = {}
+    for language, extensions in get_language_extensions().items():
+        for extension in extensions:
+            extension_map.setdefault(extension, language)
+    return extension_map
+
+
+_EXTENSION_MAP = _build_extension_map()
+
+
+def is_dockerfile_name(name: str) -> bool:
+    """Проверка, является ли имя файла Dockerfile (Dockerfile, Dockerfile.prod, app.dockerfile)."""
+    return name.startswith('Dockerfile') or name.endswith('.dockerfile')
+
+
+@dataclass
+class FileEntry:
+    """Файл репозитория, найденный при проходе по дереву."""
+    path: Path
+    rel_path: str  # POSIX-путь относительно корня инвентаризации
+    name: str
+    suffix: str  # Расширение в нижнем регистре
+    size: int
+    language: Optional[str] = None
+    binary: Optional[bool] = None  # None - содержимое еще не проверялось
+    generated: Optional[bool] = None  # Минифицированный/сгенерированный код
+
+
+@dataclass
+class DirectoryNode:
+    """Узел дерева директорий с агрегатами по всему поддереву."""
+    name: str
+    rel_path: str
+    parent: Optional['DirectoryNode'] = field(default=None, repr=False)
+    children: Dict[str, 'DirectoryNode'] = field(default_factory=dict, repr=False)
+    file_count: int = 0
+    language_counts: Dict[str, int] = field(default_factory=dict)
+    dockerfiles: List[str] = field(default_factory=list)
+    test_hits: Dict[str, int] = field(default_factory=dict)
+    manifests: List[str] = field(default_factory=list)  # Только файлы непосредственно в директории
+
+    def ancestors(self) -> Iterator['DirectoryNode']:
+        """Узел и все его предки до корня."""
+        node = self
+        while node is not None:
+            yield node
+            node = node.parent
+
+    @property
+    def languages(self) -> List[str]:
+        """Языки поддерева, отсортированные по количеству файлов."""
+        return sorted(self.language_counts, key=lambda language: -self.language_counts[language])
+
+    @property
+    def test_runners(self) -> List[str]:
+        """Тестовые раннеры, найденные в поддереве."""
+        return list(self.test_hits)
+
+
+class DirectoryTree:
+    """Дерево директорий, заполняемое за один проход по файлам.
+
+    Агрегаты (количество файлов по языкам, Dockerfile, срабатывания правил тестов)
+    поднимаются от директории файла до корня, поэтому любой вопрос о поддиректории
+    решается поиском узла за O(глубины) без повторного обхода.
+    """
+
+    def __init__(self):
+        self.root = DirectoryNode(name='', rel_path='')
+
+    def node(self, rel_dir: str, create: bool = False) -> Optional[DirectoryNode]:
+        """Получить узел директории по относительному пути."""
+        node = self.root
+        if not rel_dir or rel_dir == '.':
+            return node
+
+        for part in rel_dir.strip('/').split('/'):
+            child = node.children.get(part)
+            if child is None:
+                if not create:
+                    return None
+                child_path = f"{node.rel_path}/{part}" if node.rel_path else part
+                child = DirectoryNode(name=part, rel_path=child_path, parent=node)
+                node.children[part] = child
+            node = child
+        return node
+
+    def add_file(self, entry: FileEntry):
+        """Учесть файл в агрегатах его директории и всех предков."""
+        directory = self.node(entry.rel_path.rpartition('/')[0], create=True)
+        if entry.name in MANIFEST_FILES:
+            directory.manifests.append(entry.name)
+
+        is_dockerfile = is_dockerfile_name(entry.name)
+        for node in directory.ancestors():
+            node.file_count += 1
+            if entry.language:
+                node.language_counts[entry.language] = node.language_counts.get(entry.language, 0) + 1
+            if is_dockerfile:
+                node.dockerfiles.append(entry.rel_path)
+
+    def record_test_hit(self, rel_path: str, runner: str):
+        """Учесть срабатывание правила тестового раннера для файла."""
+        directory = self.node(rel_path.rpartition('/')[0], create=True)
+        for node in directory.ancestors():
+            node.test_hits[runner] = node.test_hits.get(runner, 0) + 1
+
+
+class FileInventory:
+    """Результат единственного прохода по файлам репозитория.
+
+    Анализаторы получают списки файлов из инвентаризации вместо повторного
+    обхода репозитория через get_relevant_files/rglob.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        entries: List[FileEntry],
+        ignored_dirs: Optional[List[str]] = None,
+        vendored_dirs: Optional[Dict[str, Tuple[int, int]]] = None,
+        descriptors: Optional[BuildDescriptors] = None,
+    ):
+        """
+        Инициализация инвентаризации.
+
+        Args:
+            root: Корень инвентаризации
+            entries: Найденные файлы
+            ignored_dirs: Пропущенные при обходе директории (относительные пути)
+            vendored_dirs: Пропущенные директории стороннего кода:
+                относительный путь -> (количество файлов, размер в байтах)
+            descriptors: Кэш разобранных файлов сборки (общий с подмножествами)
+        """
+        self.root = root
+        self.entries = entries
+        self.ignored_dirs = ignored_dirs or []
+        self.vendored_dirs = vendored_dirs or {}
+        self.descriptors = descriptors or BuildDescriptors()
+        self.tree = DirectoryTree()
+        self._by_name: Dict[str, List[FileEntry]] = {}
+        self._declared_dependencies: Optional[Dict[str, Dict[str, List[str]]]] = None
+        # Дедлайн анализа: после него файлы не читаются (см. deadline_expired)
+        self.deadline: Optional[Deadline] = None
+        self.skipped_reads = 0
+        # Политика выборочного анализа содержимого (None - читаются все файлы, см. sampling.ContentScan)
+        self.sampling: Optional['SamplingPolicy'] = None
+
+        for entry in entries:
+            self.tree.add_file(entry)
+            self._by_name.setdefault(entry.name, []).append(entry)
+
+    @classmethod
+    def build(
+        cls,
+        root: Path,
+        vendored: Optional[VendoredClassifier] = None,
+        descriptors: Optional[BuildDescriptors] = None,
+    ) -> 'FileInventory':
+        """
+        Построить инвентаризацию одним проходом по дереву.
+
+        Игнорируемые директории (см. should_ignore_path) отсекаются целиком
+        и не обходятся. Директории стороннего кода (см. VendoredClassifier)
+        из оставшихся также отсекаются, для них считается только объем.
+
+        Args:
+            root: Корневой путь репозитория
+            vendored: Классификатор стороннего кода (опционально)
+            descriptors: Кэш разобранных файлов сборки (опционально)
+
+        Returns:
+            FileInventory
+        """
+        entries = []
+        ignored_dirs = []
+        vendored_dirs = {}
+
+        for dir_path, dir_names, file_names in os.walk(root):
+            rel_dir = os.path.relpath(dir_path, root)
+            rel_dir = '' if rel_dir == '.' else rel_dir.replace(os.sep, '/')
+
+            # Маркеры стороннего кода проверяются при входе в директорию (корень не проверяется)
+            if vendored and rel_dir:
+                marker = vendored.match_markers(Path(dir_path), file_names)
+                if marker:
+                    vendored_dirs[rel_dir] = measure_directory(Path(dir_path))
+                    logger.debug(f"Директория {rel_dir} определена как сторонний код (маркер {marker})")
+                    dir_names[:] = []
+                    continue
+
+            kept_dirs = []
+            for dir_name in sorted(dir_names):
+                rel_path = f"{rel_dir}/{dir_name}" if rel_dir else dir_name
+                # Игнорируемые директории проверяются первыми: их объем не измеряется
+                if should_ignore_path(Path(rel_path)):
+                    ignored_dirs.append(rel_path)
+                elif vendored and vendored.match_path(rel_path):
+                    vendored_dirs[rel_path] = measure_directory(Path(dir_path) / dir_name)
+                    logger.debug(f"Директория {rel_path} определена как сторонний код")
+                else:
+                    kept_dirs.append(dir_name)
+            dir_names[:] = kept_dirs
+
+            for file_name in sorted(file_names):
+                rel_path = f"{rel_dir}/{file_name}" if rel_dir else file_name
+                if should_ignore_path(Path(rel_path)):
+                    continue
+
+                file_path = Path(dir_path) / file_name
+                try:
+                    file_stat = file_path.stat()
+                except (OSError, ValueError):
+                    continue
+                if not stat.S_ISREG(file_stat.st_mode):
+                    continue
+
+                suffix = file_path.suffix.lower()
+                entries.append(FileEntry(
+                    path=file_path,
+                    rel_path=rel_path,
+                    name=file_name,
+                    suffix=suffix,
+                    size=file_stat.st_size,
+                    language=_EXTENSION_MAP.get(suffix),
+                    binary=True if suffix in BINARY_EXTENSIONS else None,
+                    generated=True if is_generated_name(file_name) else None,
+                ))
+
+        return cls(root, entries, ignored_dirs, vendored_dirs, descriptors)
+
+    def subset(self, rel_dir: str) -> 'FileInventory':
+        """
+        Инвентаризация поддиректории без повторного обхода диска.
+
+        Пути в результате указаны относительно rel_dir.
+
+        Args:
+            rel_dir: Относительный путь поддиректории
+
+        Returns:
+            FileInventory с корнем в поддиректории
+        """
+        prefix = rel_dir.strip('/') + '/'
+        entries = [
+            replace(entry, rel_path=entry.rel_path[len(prefix):])
+            for entry in self.entries if entry.rel_path.startswith(prefix)
+        ]
+        ignored_dirs = [
+            rel_path[len(prefix):] for rel_path in self.ignored_dirs if rel_path.startswith(prefix)
+        ]
+        vendored_dirs = {
+            rel_path[len(prefix):]: volume
+            for rel_path, volume in self.vendored_dirs.items() if rel_path.startswith(prefix)
+        }
+        inventory = FileInventory(self.root / rel_dir.strip('/'), entries, ignored_dirs, vendored_dirs, self.descriptors)
+        inventory.deadline = self.deadline
+        inventory.sampling = self.sampling
+        return inventory
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Метрики обхода: проанализированный и пропущенный объем.
+
+        Returns:
+            Словарь с количеством и размером просканированных файлов,
+            количеством игнорируемых директорий и объемом стороннего кода
+        """
+        return {
+            'files_scanned': len(self.entries),
+            'bytes_scanned': sum(entry.size for entry in self.entries),
+            'ignored_dirs': len(self.ignored_dirs),
+            'vendored_dirs': sorted(self.vendored_dirs),
+            'vendored_files': sum(files for files, _ in self.vendored_dirs.values()),
+            'vendored_bytes': sum(size for _, size in self.vendored_dirs.values()),
+        }
+
+    def files(
+        self,
+        extensions: Optional[List[str]] = None,
+        max_file_size: Optional[int] = DEFAULT_MAX_FILE_SIZE,
+    ) -> List[Path]:
+        """
+        Получить список файлов с фильтрацией (аналог get_relevant_files).
+
+        Args:
+            extensions: Список расширений для фильтрации (если None - все файлы)
+            max_file_size: Максимальный размер файла в байтах (None - без ограничения)
+
+        Returns:
+            Список путей к файлам
+        """
+        return [entry.path for entry in self.select(extensions, max_file_size)]
+
+    def select(
+        self,
+        extensions: Optional[List[str]] = None,
+        max_file_size: Optional[int] = DEFAULT_MAX_FILE_SIZE,
+        text_only: bool = False,
+    ) -> List[FileEntry]:
+        """То же, что files(), но возвращает записи инвентаризации.
+
+        При text_only=True пропускаются файлы, уже помеченные как бинарные
+        или сгенерированные/минифицированные. Если задан дедлайн, файлы ближе
+        к корню идут первыми - они прочитаются до остановки по дедлайну.
+        """
+        extension_set = set(extensions) if extensions else None
+        selected = [
+            entry for entry in self.entries
+            if (extension_set is None or entry.suffix in extension_set)
+            and (max_file_size is None or entry.size <= max_file_size)
+            and not (text_only and (entry.binary or entry.generated))
+        ]
+        if self.deadline is not None:
+            selected.sort(key=lambda entry: entry.rel_path.count('/'))
+        return selected
+
+    def read_sample(self, entry: FileEntry, max_lines: int = 100, max_bytes: int = 8192) -> str:
+        """
+        Прочитать начало файла для правил по содержимому.
+
+        Первый блок проверяется на бинарное содержимое, затем на признаки
+        сгенерированного/минифицированного кода. Такие файлы помечаются в
+        инвентаризации и больше не открываются. Строки образца обрезаются
+        до MAX_LINE_LENGTH символов.
+
+        Args:
+            entry: Запись инвентаризации
+            max_lines: Максимальное количество строк
+            max_bytes: Максимальное количество байт
+
+        Returns:
+            Начало файла (пустая строка для бинарных, сгенерированных и недоступных файлов)
+        """
+        return self.read_windows(entry, max_bytes, 0, max_lines)[0]
+
+    def read_windows(
+        self,
+        entry: FileEntry,
+        head_bytes: int = 4096,
+        tail_bytes: int = 2048,
+        max_lines: int = 50,
+    ) -> Tuple[str, str]:
+        """
+        Прочитать начало и конец файла, не читая середину.
+
+        Файл открывается один раз: читается head_bytes байт начала, затем
+        одним seek - tail_bytes байт конца. Если файл помещается в оба окна,
+        он читается целиком, и окном конца считается все содержимое.
+        Проверки на бинарное и сгенерированное содержимое - как в read_sample.
+        После дедлайна анализа файлы не читаются.
+
+        Args:
+            entry: Запись инвентаризации
+            head_bytes: Размер окна начала файла
+            tail_bytes: Размер окна конца файла (0 - только начало)
+            max_lines: Максимальное количество строк в каждом окне
+
+        Returns:
+            Кортеж (начало, конец); пустые строки для пропускаемых файлов
+        """
+        if entry.binary or entry.generated or self.deadline_expired():
+            return '', ''
+        try:
+            with open(entry.path, 'rb') as f:
+                if tail_bytes and entry.size <= head_bytes + tail_bytes:
+                    block = f.read(head_bytes + tail_bytes)
+                    tail_block = None
+                else:
+                    block = f.read(head_bytes)
+                    tail_block = b''
+                    if tail_bytes:
+                        f.seek(-tail_bytes, os.SEEK_END)
+                        tail_block = f.read(tail_bytes)
+        except OSError:
+            return '', ''
+
+        if entry.binary is None:
+            entry.binary = is_binary_content(block[:SNIFF_BLOCK_SIZE])
+            if entry.binary:
+                logger.debug(f"Файл {entry.rel_path} определен как бинарный, правила по содержимому пропускаются")
+        if entry.binary:
+            return '', ''
+
+        text = block.decode('utf-8', errors='ignore')
+        if entry.generated is None:
+            entry.generated = is_generated_content(text)
+            if entry.generated:
+                logger.debug(f"Файл {entry.rel_path} определен как сгенерированный/минифицированный, правила по содержимому пропускаются")
+                return '', ''
+
+        if tail_block is None:
+            # Файл прочитан целиком: окно конца - все содержимое (не больше head_bytes + tail_bytes)
+            return limit_sample(text, max_lines), limit_sample_tail(text, text.count('\n') + 1)
+        # Первая строка окна конца обычно обрезана - отбрасываем ее
+        tail_text = tail_block.decode('utf-8', errors='ignore').split('\n', 1)[-1] if tail_block else ''
+        return limit_sample(text, max_lines), limit_sample_tail(tail_text, max_lines)
+
+    def sniff_binary(self, entry: FileEntry) -> bool:
+        """
+        Проверить, бинарный ли файл, прочитав только первый блок.
+
+        Результат запоминается в записи инвентаризации (как в read_windows).
+        После дедлайна анализа непроверенные файлы не читаются и считаются текстовыми.
+
+        Args:
+            entry: Запись инвентаризации
+
+        Returns:
+            True если файл бинарный
+        """
+        if entry.binary is None and not self.deadline_expired():
+            try:
+                with open(entry.path, 'rb') as f:
+                    block = f.read(SNIFF_BLOCK_SIZE)
+            except OSError:
+                return False
+            entry.binary = is_binary_content(block)
+            if entry.binary:
+                logger.debug(f"Файл {entry.rel_path} определен как бинарный")
+        return bool(entry.binary)
+
+    def deadline_expired(self) -> bool:
+        """Истек ли дедлайн анализа; каждый отказ от чтения файла учитывается в skipped_reads."""
+        if self.deadline is None or not self.deadline.expired():
+            return False
+        self.skipped_reads += 1
+        return True
+
+    def declared_dependencies(self) -> Dict[str, Dict[str, List[str]]]:
+        """Зависимости из манифестов: экосистема -> {имя -> пути манифестов} (см. BuildDescriptors)."""
+        if self._declared_dependencies is None:
+            self._declared_dependencies = self.descriptors.declared_dependencies(self)
+        return self._declared_dependencies
+
+    def languages(self) -> List[str]:
+        """Языки, файлы которых есть в инвентаризации."""
+        return sorted({entry.language for entry in self.entries if entry.language})
+
+    def by_name(self, name: str) -> List[Path]:
+        """Все файлы с указанным именем (без ограничения размера)."""
+        return [entry.path for entry in self._by_name.get(name, [])]
+
+    def glob(self, pattern: str) -> List[Path]:
+        """Файлы, соответствующие шаблону в семантике Path.rglob."""
+        regex = _compile_rglob_pattern(pattern)
+        return [entry.path for entry in self.entries if regex.match(entry.rel_path)]
+
+    def has_directory(self, name: str) -> bool:
+        """Есть ли в репозитории директория с таким именем (включая пропущенные при обходе)."""
+        name = name.strip('/')
+        if any(rel_path.rpartition('/')[2] == name for rel_path in self.ignored_dirs):
+            return True
+
+        stack = [self.tree.root]
+        while stack:
+            node = stack.pop()
+            if node.name == name:
+                return True
+            stack.extend(node.children.values())
+        return False
+
+    def monorepo_structure(self) -> Dict[str, List[str]]:
+        """Определить структуру монорепозитория по директориям верхнего уровня.
+
+        Returns:
+            Словарь с ключами 'frontend', 'backend', 'root', 'apps', 'packages'
+            и относительными путями директорий
+        """
+        structure = {
+            'frontend': [],
+            'backend': [],
+            'root': [],
+            'apps': [],
+            'packages': []
+        }
+
+        # Директории пакетов (например, packages/) пропускаются при обходе, но учитываются в структуре
+        top_level = sorted(set(self.tree.root.children) | {
+            rel_path for rel_path in self.ignored_dirs if '/' not in rel_path
+        })
+        for dir_name in top_level:
+            name = dir_name.lower()
+            if name in FRONTEND_DIRS:
+                structure['frontend'].append(dir_name)
+            elif name in BACKEND_DIRS:
+                structure['backend'].append(dir_name)
+            elif name in APPS_DIRS:
+                structure['apps'].append(dir_name)
+            elif name in PACKAGES_DIRS:
+                structure['packages'].append(dir_name)
+
+        # Проверяем apps/ на наличие frontend/backend подпапок
+        for apps_dir in structure['apps']:
+            apps_node = self.tree.node(apps_dir)
+            for subdir_name in sorted(apps_node.children) if apps_node else []:
+                name = subdir_name.lower()
+                if name in FRONTEND_DIRS:
+                    structure['frontend'].append(f"{apps_dir}/{subdir_name}")
+                elif name in BACKEND_DIRS:
+                    structure['backend'].append(f"{apps_dir}/{subdir_name}")
+
+        return structure
+
+
+def _compile_rglob_pattern(pattern: str) -> re.Pattern:
+    """Преобразовать шаблон rglob (с поддержкой **) в регулярное выражение по относительному пути."""
+    regex = ''
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            regex += '(?:.*/)?'
+            i += 3
+        elif pattern.startswith('**', i):
+            regex += '.*'
+            i += 2
+        elif pattern[i] == '*':
+            regex += '[^/]*'
+            i += 1
+        elif pattern[i] == '?':
+            regex += '[^/]'
+            i += 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    # rglob ищет шаблон на любой глубине
+    return re.compile(f'(?:.*/)?{regex}$')
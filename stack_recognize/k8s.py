@@ -0,0 +1,181 @@
+"""Определение манифестов Kubernetes, чартов Helm и Kustomize по заголовкам YAML-документов."""
+import logging
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .inventory import FileInventory
+
+logger = logging.getLogger(__name__)
+
+# Сколько значимых строк документа просматривается в поисках apiVersion/kind
+HEADER_LINES = 30
+
+YAML_EXTENSIONS = ['.yaml', '.yml']
+HELM_CHART_FILE = 'Chart.yaml'
+KUSTOMIZATION_FILES = {'kustomization.yaml', 'kustomization.yml', 'Kustomization'}
+KUSTOMIZE_KINDS = {'Kustomization', 'Component'}
+
+# Ресурсы, порты которых записываются (контейнеры рабочих нагрузок и сервисы)
+PORT_KINDS = {
+    'Pod', 'Deployment', 'StatefulSet', 'DaemonSet', 'ReplicaSet', 'Job', 'CronJob', 'Service',
+}
+
+# Группы API с моделью apiVersion/kind, не относящиеся к Kubernetes
+_NON_KUBERNETES_GROUPS = ('backstage.io',)
+
+_DOCUMENT_SEPARATOR = re.compile(r'^---')
+_HEADER_FIELD = re.compile(r'^(apiVersion|kind)\s*:\s*["\']?([^\s"\'#]+)')
+_PORT_FIELD = re.compile(r'^\s*(?:-\s*)?(?:containerPort|port|targetPort|nodePort)\s*:\s*["\']?(\d+)["\']?\s*(?:#.*)?$')
+_API_VERSION = re.compile(r'^(?:[a-z0-9.-]+/)?v\d+(?:(?:alpha|beta)\d+)?$')
+_KIND = re.compile(r'^[A-Z][A-Za-z0-9]*$')
+
+
+@dataclass
+class KubernetesScan:
+    """Найденные манифесты Kubernetes, чарты Helm и оверлеи Kustomize."""
+    manifests: List[str] = field(default_factory=list)  # Файлы с ресурсами Kubernetes (вне чартов)
+    charts: List[str] = field(default_factory=list)  # Chart.yaml
+    chart_templates: List[str] = field(default_factory=list)  # Шаблоны и values чартов
+    kustomizations: List[str] = field(default_factory=list)  # kustomization.yaml
+    kinds: Counter = field(default_factory=Counter)  # kind -> количество ресурсов
+    ports: Set[int] = field(default_factory=set)  # Порты контейнеров и сервисов
+
+    @property
+    def found(self) -> bool:
+        """Найдено ли что-либо, указывающее на Kubernetes."""
+        return bool(self.manifests or self.charts or self.kustomizations)
+
+
+def iter_document_headers(path: Path, header_lines: int = HEADER_LINES) -> Iterator[Tuple[str, str, List[int]]]:
+    """
+    Построчно прочитать YAML-файл и выдать (apiVersion, kind, порты) его документов.
+
+    В каждом документе (документы разделены строками ---) просматриваются
+    только первые header_lines значимых строк в поисках пары apiVersion/kind
+    верхнего уровня, полный разбор YAML не выполняется. Остальные строки
+    документа проверяются только на порты и только для PORT_KINDS.
+    Если у первого документа нет заголовка, файл дальше не читается.
+
+    Args:
+        path: Путь к YAML-файлу
+        header_lines: Количество значимых строк заголовка документа
+
+    Yields:
+        Кортеж (apiVersion, kind, порты документа)
+    """
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            header: Dict[str, str] = {}
+            ports: List[int] = []
+            seen = 0  # Значимые строки текущего документа
+            document = 0  # Номер текущего документа
+            for line in f:
+                if _DOCUMENT_SEPARATOR.match(line):
+                    if len(header) == 2:
+                        yield header['apiVersion'], header['kind'], ports
+                    elif document == 0 and seen:
+                        return
+                    if seen:
+                        document += 1
+                    header, ports, seen = {}, [], 0
+                    continue
+
+                if len(header) < 2:
+                    stripped = line.strip()
+                    if not stripped or stripped.startswith('#'):
+                        continue
+                    seen += 1
+                    if seen > header_lines:
+                        if document == 0:
+                            return
+                        continue
+                    match = _HEADER_FIELD.match(line)
+                    if match:
+                        header.setdefault(match.group(1), match.group(2))
+                elif header['kind'] in PORT_KINDS:
+                    match = _PORT_FIELD.match(line)
+                    if match:
+                        ports.append(int(match.group(1)))
+
+            if len(header) == 2:
+                yield header['apiVersion'], header['kind'], ports
+    except OSError as e:
+        logger.debug(f"Не удалось прочитать {path}: {e}")
+
+
+def is_kubernetes_resource(api_version: str, kind: str) -> bool:
+    """Похожа ли пара apiVersion/kind на ресурс Kubernetes."""
+    if not (_API_VERSION.match(api_version) and _KIND.match(kind)):
+        return False
+    return not api_version.split('/')[0].endswith(_NON_KUBERNETES_GROUPS)
+
+
+def _chart_root(rel_path: str, chart_dirs: Set[str]) -> Optional[str]:
+    """Корень чарта Helm, которому принадлежит файл."""
+    parts = rel_path.split('/')[:-1]
+    for depth in range(len(parts), -1, -1):
+        rel_dir = '/'.join(parts[:depth])
+        if rel_dir in chart_dirs:
+            return rel_dir
+    return None
+
+
+def scan_kubernetes(inventory: FileInventory) -> KubernetesScan:
+    """
+    Найти манифесты Kubernetes, чарты Helm и оверлеи Kustomize в YAML-файлах.
+
+    Чарты определяются по Chart.yaml, оверлеи Kustomize - по имени файла или
+    kind Kustomization. Файлы внутри чарта считаются его шаблонами, ресурсы
+    из них учитываются в kinds и ports. Остальные YAML-файлы относятся к
+    манифестам, если заголовок хотя бы одного документа - ресурс Kubernetes.
+    После дедлайна анализа файлы не читаются.
+
+    Args:
+        inventory: Инвентаризация корня анализа
+
+    Returns:
+        KubernetesScan
+    """
+    scan = KubernetesScan()
+    entries = inventory.select(extensions=YAML_EXTENSIONS, text_only=True)
+    entries.extend(entry for entry in inventory.entries if entry.name == 'Kustomization')
+    chart_dirs = {
+        entry.rel_path.rpartition('/')[0] for entry in entries if entry.name == HELM_CHART_FILE
+    }
+
+    for entry in entries:
+        if entry.name == HELM_CHART_FILE:
+            scan.charts.append(entry.rel_path)
+            continue
+        if entry.name in KUSTOMIZATION_FILES:
+            scan.kustomizations.append(entry.rel_path)
+            continue
+        if inventory.deadline_expired():
+            break
+
+        chart = _chart_root(entry.rel_path, chart_dirs)
+        resources = False
+        for api_version, kind, ports in iter_document_headers(entry.path):
+            if kind in KUSTOMIZE_KINDS and api_version.startswith('kustomize.config.k8s.io'):
+                scan.kustomizations.append(entry.rel_path)
+                break
+            if not is_kubernetes_resource(api_version, kind):
+                continue
+            resources = True
+            scan.kinds[kind] += 1
+            scan.ports.update(ports)
+
+        if chart is not None:
+            scan.chart_templates.append(entry.rel_path)
+        elif resources:
+            scan.manifests.append(entry.rel_path)
+
+    if scan.found:
+        logger.info(
+            f"Kubernetes: манифестов {len(scan.manifests)}, чартов Helm {len(scan.charts)}, "
+            f"Kustomize {len(scan.kustomizations)}, ресурсы {dict(scan.kinds)}, порты {sorted(scan.ports)}"
+        )
+    return scan
@@ -0,0 +1,161 @@
+"""Статистика языков по объему кода (байты и строки)."""
+import logging
+from typing import Dict, List
+
+from .inventory import FileInventory
+from .utils import get_language_extensions
+
+logger = logging.getLogger(__name__)
+
+# С какого количества файлов группировка через NumPy окупает импорт NumPy (~0.1 с)
+NUMPY_MIN_FILES = 100_000
+
+_numpy = None
+
+# Артефакты сборки учитываются при определении языка, но не в объеме кода
+ARTIFACT_EXTENSIONS = {'.jar', '.war', '.class'}
+
+# Размер блока при подсчете строк
+_READ_BLOCK_SIZE = 1024 * 1024
+
+
+def compute_language_stats(inventory: FileInventory, count_lines: bool = False) -> Dict[str, Dict[str, float]]:
+    """
+    Посчитать долю каждого языка в объеме кода.
+
+    Инвентаризация превращается в массивы идентификаторов расширений и размеров,
+    суммы по языкам считаются одной группировкой (np.bincount). Для небольших
+    репозиториев и без NumPy используется эквивалентный проход на чистом
+    Python: NumPy импортируется, только когда это окупается. Артефакты сборки,
+    файлы, сгенерированные по имени (*.min.js, *.pb.go), и бинарные файлы с
+    расширением исходного кода (первый блок проверяется is_binary_content) в
+    объем кода не входят.
+
+    Args:
+        inventory: Инвентаризация файлов репозитория
+        count_lines: Также посчитать строки (требует чтения файлов)
+
+    Returns:
+        Словарь язык -> {'files', 'bytes', 'bytes_percent'[, 'lines', 'lines_percent']},
+        отсортированный по убыванию объема
+    """
+    languages = list(get_language_extensions())
+    entries = [
+        entry for entry in inventory.entries
+        if entry.language and entry.suffix not in ARTIFACT_EXTENSIONS and not entry.generated
+        and not inventory.sniff_binary(entry)
+    ]
+    if not entries:
+        return {}
+
+    language_ids = {language: index for index, language in enumerate(languages)}
+    line_counts = None
+    if count_lines:
+        line_counts = []
+        for entry in entries:
+            # Частичный подсчет строк исказил бы доли: после дедлайна остаются только байты
+            if inventory.deadline_expired():
+                logger.warning("Подсчет строк остановлен по дедлайну, доли языков только по байтам")
+                line_counts = None
+                count_lines = False
+                break
+            line_counts.append(_count_lines(entry.path))
+
+    np = _load_numpy() if len(entries) >= NUMPY_MIN_FILES else None
+    if np is not None:
+        totals = _group_numpy(np, entries, languages, language_ids, line_counts)
+    else:
+        totals = _group_python(entries, languages, language_ids, line_counts)
+
+    total_bytes = sum(values['bytes'] for values in totals.values())
+    total_lines = sum(values.get('lines', 0) for values in totals.values())
+
+    stats = {}
+    for language, values in sorted(totals.items(), key=lambda item: -item[1]['bytes']):
+        if not values['files']:
+            continue
+        values['bytes_percent'] = round(100.0 * values['bytes'] / total_bytes, 2) if total_bytes else 0.0
+        if count_lines:
+            values['lines_percent'] = round(100.0 * values['lines'] / total_lines, 2) if total_lines else 0.0
+        stats[language] = values
+
+    return stats
+
+
+def _load_numpy():
+    """Импортировать NumPy при первой необходимости (None - NumPy не установлен)."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:  # NumPy опционален, есть реализация на чистом Python
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
+
+
+def _group_numpy(np, entries, languages: List[str], language_ids: Dict[str, int], line_counts) -> Dict[str, Dict[str, float]]:
+    """Группировка по языкам через NumPy."""
+    # Идентификаторы расширений и таблица расширение -> язык
+    suffix_ids: Dict[str, int] = {}
+    suffix_array = np.fromiter(
+        (suffix_ids.setdefault(entry.suffix, len(suffix_ids)) for entry in entries),
+        dtype=np.int64, count=len(entries),
+    )
+    suffix_language = np.empty(len(suffix_ids), dtype=np.int64)
+    extension_map = {entry.suffix: entry.language for entry in entries}
+    for suffix, suffix_id in suffix_ids.items():
+        suffix_language[suffix_id] = language_ids[extension_map[suffix]]
+
+    language_array = suffix_language[suffix_array]
+    sizes = np.fromiter((entry.size for entry in entries), dtype=np.float64, count=len(entries))
+
+    file_totals = np.bincount(language_array, minlength=len(languages))
+    byte_totals = np.bincount(language_array, weights=sizes, minlength=len(languages))
+    line_totals = None
+    if line_counts is not None:
+        lines = np.asarray(line_counts, dtype=np.float64)
+        line_totals = np.bincount(language_array, weights=lines, minlength=len(languages))
+
+    totals = {}
+    for language, index in language_ids.items():
+        totals[language] = {'files': int(file_totals[index]), 'bytes': int(byte_totals[index])}
+        if line_totals is not None:
+            totals[language]['lines'] = int(line_totals[index])
+    return totals
+
+
+def _group_python(entries, languages: List[str], language_ids: Dict[str, int], line_counts) -> Dict[str, Dict[str, float]]:
+    """Группировка по языкам без NumPy."""
+    totals = {language: {'files': 0, 'bytes': 0} for language in languages}
+    if line_counts is not None:
+        for values in totals.values():
+            values['lines'] = 0
+
+    for index, entry in enumerate(entries):
+        values = totals[entry.language]
+        values['files'] += 1
+        values['bytes'] += entry.size
+        if line_counts is not None:
+            values['lines'] += line_counts[index]
+    return totals
+
+
+def _count_lines(path) -> int:
+    """Подсчет строк файла блоками без декодирования."""
+    lines = 0
+    last_block = b''
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                block = f.read(_READ_BLOCK_SIZE)
+                if not block:
+                    break
+                lines += block.count(b'\n')
+                last_block = block
+    except OSError:
+        return 0
+    # Последняя строка без перевода строки тоже считается
+    if last_block and not last_block.endswith(b'\n'):
+        lines += 1
+    return lines
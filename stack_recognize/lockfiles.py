@@ -0,0 +1,28 @@
+"""Сопоставление имен зависимостей из манифестов с правилами конфигурации."""
+import re
+from typing import Optional
+
+
+def normalize_dependency_name(name: str, ecosystem: Optional[str] = None) -> str:
+    """Нормализовать имя зависимости для сравнения (для Python - по PEP 503)."""
+    if ecosystem == 'python':
+        return re.sub(r'[-_.]+', '-', name).lower()
+    return name
+
+
+def dependency_matches(name: str, dependency: str, ecosystem: Optional[str] = None) -> bool:
+    """
+    Проверка соответствия имени зависимости из манифеста зависимости из detect_config.json.
+
+    Для Go учитываются major-версии модулей (github.com/labstack/echo/v4),
+    для Maven/Gradle - семейства артефактов (spring-boot -> spring-boot-starter-web).
+    """
+    name = normalize_dependency_name(name, ecosystem)
+    dependency = normalize_dependency_name(dependency, ecosystem)
+    if name == dependency:
+        return True
+    if ecosystem == 'go':
+        return name.startswith(dependency + '/')
+    if ecosystem == 'maven':
+        return name.startswith(dependency + '-')
+    return False
@@ -0,0 +1,57 @@
+"""Определение по манифестам (первая фаза двухфазного анализа)."""
+import logging
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Set
+
+from .inventory import FileInventory
+from .lockfiles import dependency_matches
+from .models import ProjectStack
+from .utils import get_language_by_extension
+
+logger = logging.getLogger(__name__)
+
+# Экосистема манифеста -> язык, к которому относятся его зависимости
+ECOSYSTEM_LANGUAGES = {'npm': 'typescript', 'python': 'python', 'go': 'go', 'maven': 'java'}
+
+
+def match_declared_dependencies(
+    inventory: FileInventory,
+    rules: Mapping[str, Sequence[str]],
+    applies: Optional[Callable[[str, str], bool]] = None,
+) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Сопоставить зависимости из манифестов с правилами.
+
+    Args:
+        inventory: Инвентаризация корня анализа
+        rules: Элемент (фреймворк, раннер, БД) -> имена зависимостей
+        applies: Проверка применимости элемента к языку: applies(элемент, язык)
+
+    Returns:
+        Словарь язык -> {элемент -> относительные пути манифестов}.
+        Язык присутствует, только если по его манифестам найден хотя бы один элемент.
+    """
+    resolved: Dict[str, Dict[str, List[str]]] = {}
+    for ecosystem, declared in inventory.declared_dependencies().items():
+        language = ECOSYSTEM_LANGUAGES.get(ecosystem)
+        for item, dependencies in rules.items():
+            if applies and not applies(item, language):
+                continue
+            for name, manifests in declared.items():
+                if any(dependency_matches(name, dependency, ecosystem) for dependency in dependencies):
+                    found = resolved.setdefault(language, {}).setdefault(item, [])
+                    found.extend(path for path in manifests if path not in found)
+    return resolved
+
+
+def filter_extensions(extensions: List[str], languages: Set[str]) -> List[str]:
+    """Оставить расширения только указанных языков."""
+    return [extension for extension in extensions if get_language_by_extension(extension) in languages]
+
+
+def record_content_scan(stack: ProjectStack, category: str, languages: Set[str]):
+    """Сохранить в метриках, для каких языков категория потребовала чтения исходников."""
+    stack.metrics.setdefault('content_scan', {})[category] = sorted(languages)
+    if languages:
+        logger.info(f"{category}: анализ содержимого для языков {sorted(languages)}")
+    else:
+        logger.info(f"{category}: определено по манифестам, анализ содержимого не нужен")
@@ -18,6 +18,7 @@ class EntryPoint:
 class ProjectStack:
     """Структура для хранения информации о технологическом стеке проекта."""
     languages: List[str] = field(default_factory=list)
+    language_stats: Dict[str, Dict[str, float]] = field(default_factory=dict)  # Доли языков по байтам/строкам
     frameworks: List[str] = field(default_factory=list)
     frontend_frameworks: List[str] = field(default_factory=list)
     backend_frameworks: List[str] = field(default_factory=list)
@@ -35,4 +36,17 @@ class ProjectStack:
     main_entry_point: Optional[EntryPoint] = None
     hints: List[str] = field(default_factory=list)
     files_detected: Dict[str, Any] = field(default_factory=dict)
+    scope_path: Optional[str] = None  # Поддиректория, относительно которой указаны пути
+    commit_sha: Optional[str] = None  # Проанализированный коммит (HEAD клона)
+    metrics: Dict[str, Any] = field(default_factory=dict)  # Просканированный и пропущенный объем
+    modules: List['ModuleStack'] = field(default_factory=list)  # Стеки модулей монорепозитория
+
+
+@dataclass
+class ModuleStack:
+    """Стек отдельного модуля монорепозитория."""
+    path: str  # Путь модуля относительно корня анализа
+    source: str  # Откуда известен модуль: 'workspaces', 'maven', 'gradle', 'go-work', 'directory'
+    stack: ProjectStack = field(default_factory=ProjectStack)
+    modules: List['ModuleStack'] = field(default_factory=list)  # Вложенные модули
 
@@ -0,0 +1,196 @@
+"""Определение корней модулей монорепозитория."""
+import fnmatch
+import json
+import logging
+import re
+from typing import Dict, List, Tuple
+
+from .inventory import FileInventory, FRONTEND_DIRS, BACKEND_DIRS
+
+logger = logging.getLogger(__name__)
+
+
+def find_module_roots(inventory: FileInventory) -> List[Tuple[str, str]]:
+    """
+    Найти корни модулей монорепозитория.
+
+    Источники (в порядке приоритета): workspace-манифесты npm/yarn/pnpm,
+    модули Maven, include в settings.gradle, go.work и эвристики по именам
+    директорий (frontend/backend, apps/*).
+
+    Args:
+        inventory: Инвентаризация файлов репозитория
+
+    Returns:
+        Список пар (относительный путь модуля, источник), отсортированный по пути
+    """
+    roots: Dict[str, str] = {}
+
+    def add(rel_dir: str, source: str):
+        rel_dir = rel_dir.strip().strip('/')
+        if rel_dir.startswith('./'):
+            rel_dir = rel_dir[2:]
+        node = inventory.tree.node(rel_dir)
+        # Корень репозитория модулем не считается, пустые директории пропускаем
+        if not rel_dir or node is None or node.file_count == 0:
+            return
+        roots.setdefault(rel_dir, source)
+
+    for rel_dir in _npm_workspaces(inventory):
+        add(rel_dir, 'workspaces')
+    for rel_dir in _maven_modules(inventory):
+        add(rel_dir, 'maven')
+    for rel_dir in _gradle_includes(inventory):
+        add(rel_dir, 'gradle')
+    for rel_dir in _go_work_uses(inventory):
+        add(rel_dir, 'go-work')
+
+    structure = inventory.monorepo_structure()
+    for rel_dir in structure['frontend'] + structure['backend']:
+        add(rel_dir, 'directory')
+    for apps_dir in structure['apps']:
+        apps_node = inventory.tree.node(apps_dir)
+        for child in apps_node.children.values() if apps_node else []:
+            # В apps/* модулем считается любая директория со своим манифестом
+            if child.manifests or child.name.lower() in FRONTEND_DIRS | BACKEND_DIRS:
+                add(child.rel_path, 'directory')
+
+    return sorted(roots.items())
+
+
+def _read_text(inventory: FileInventory, rel_path: str) -> str:
+    """Прочитать файл инвентаризации как текст (пустая строка при ошибке)."""
+    try:
+        return (inventory.root / rel_path).read_text(encoding='utf-8', errors='ignore')
+    except OSError:
+        return ''
+
+
+def _manifest_dirs(inventory: FileInventory, manifest: str) -> List[str]:
+    """Все директории, содержащие указанный манифест."""
+    result = []
+    stack = [inventory.tree.root]
+    while stack:
+        node = stack.pop()
+        if manifest in node.manifests:
+            result.append(node.rel_path)
+        stack.extend(node.children.values())
+    return result
+
+
+def _expand_workspace_patterns(inventory: FileInventory, patterns: List[str]) -> List[str]:
+    """Раскрыть шаблоны workspaces (packages/*, apps/**) в директории с package.json."""
+    package_dirs = _manifest_dirs(inventory, 'package.json')
+    result = []
+    for pattern in patterns:
+        if not isinstance(pattern, str) or pattern.startswith('!'):
+            continue
+        pattern = pattern.strip().strip('/')
+        if pattern.startswith('./'):
+            pattern = pattern[2:]
+        segments = pattern.split('/')
+        result.extend(d for d in package_dirs if d and _match_segments(d.split('/'), segments))
+    return result
+
+
+def _match_segments(parts: List[str], pattern: List[str]) -> bool:
+    """
+    Сопоставить путь с шаблоном по сегментам.
+
+    * и ? действуют внутри одного сегмента (packages/* - только прямые
+    поддиректории packages), ** - любое число сегментов.
+
+    Args:
+        parts: Сегменты пути
+        pattern: Сегменты шаблона
+
+    Returns:
+        True если путь соответствует шаблону
+    """
+    if not pattern:
+        return not parts
+    if pattern[0] == '**':
+        return any(_match_segments(parts[index:], pattern[1:]) for index in range(len(parts) + 1))
+    return bool(parts) and fnmatch.fnmatchcase(parts[0], pattern[0]) and _match_segments(parts[1:], pattern[1:])
+
+
+def _npm_workspaces(inventory: FileInventory) -> List[str]:
+    """Модули из workspaces в корневом package.json и pnpm-workspace.yaml."""
+    patterns = []
+
+    if 'package.json' in inventory.tree.root.manifests:
+        try:
+            package_data = json.loads(_read_text(inventory, 'package.json') or '{}')
+        except json.JSONDecodeError:
+            package_data = {}
+        workspaces = package_data.get('workspaces', []) if isinstance(package_data, dict) else []
+        if isinstance(workspaces, dict):
+            # Формат yarn: {"packages": [...], "nohoist": [...]}
+            workspaces = workspaces.get('packages', [])
+        patterns.extend(workspaces)
+
+    pnpm_workspace = _read_text(inventory, 'pnpm-workspace.yaml') if inventory.by_name('pnpm-workspace.yaml') else ''
+    in_packages = False
+    for line in pnpm_workspace.splitlines():
+        if re.match(r'^packages\s*:', line):
+            in_packages = True
+            continue
+        if in_packages:
+            match = re.match(r'^\s+-\s*[\'"]?([^\'"#]+?)[\'"]?\s*(?:#.*)?$', line)
+            if match:
+                patterns.append(match.group(1))
+            elif line.strip() and not line.startswith((' ', '\t')):
+                in_packages = False
+
+    return _expand_workspace_patterns(inventory, patterns) if patterns else []
+
+
+def _maven_modules(inventory: FileInventory) -> List[str]:
+    """Модули из секций <modules> в pom.xml (включая вложенные)."""
+    result = []
+    pending = [''] if 'pom.xml' in inventory.tree.root.manifests else []
+    seen = set()
+
+    while pending:
+        base = pending.pop()
+        if base in seen:
+            continue
+        seen.add(base)
+
+        content = _read_text(inventory, f"{base}/pom.xml" if base else 'pom.xml')
+        for module in re.findall(r'<module>\s*([^<\s]+)\s*</module>', content):
+            rel_dir = f"{base}/{module}" if base else module
+            rel_dir = rel_dir.strip('/')
+            result.append(rel_dir)
+            node = inventory.tree.node(rel_dir)
+            if node is not None and 'pom.xml' in node.manifests:
+                pending.append(rel_dir)
+
+    return result
+
+
+def _gradle_includes(inventory: FileInventory) -> List[str]:
+    """Модули из include в settings.gradle / settings.gradle.kts."""
+    result = []
+    for settings_file in ('settings.gradle', 'settings.gradle.kts'):
+        if settings_file not in inventory.tree.root.manifests:
+            continue
+        content = _read_text(inventory, settings_file)
+        for include_args in re.findall(r'^\s*include\s*\(?([^)\n]+)\)?', content, re.MULTILINE):
+            for project in re.findall(r'[\'"]([^\'"]+)[\'"]', include_args):
+                # ':services:api' -> services/api
+                result.append(project.strip(':').replace(':', '/'))
+    return result
+
+
+def _go_work_uses(inventory: FileInventory) -> List[str]:
+    """Модули из директив use в go.work."""
+    if 'go.work' not in inventory.tree.root.manifests:
+        return []
+
+    content = _read_text(inventory, 'go.work')
+    result = []
+    for block in re.findall(r'^use\s*\(([^)]*)\)', content, re.MULTILINE):
+        result.extend(line.split('//')[0].strip() for line in block.splitlines())
+    result.extend(re.findall(r'^use\s+([^\s(]+)', content, re.MULTILINE))
+    return [rel_dir for rel_dir in result if rel_dir and rel_dir != '.']
@@ -0,0 +1,137 @@
+"""Скомпилированный набор правил определения стека, общий для процесса."""
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterable, Mapping, Tuple
+
+from .config import ConfigLoader, PatternConfig
+from .sampling import SamplingPolicy
+from .vendored import VendoredClassifier
+
+logger = logging.getLogger(__name__)
+
+# Окна чтения файла для правил точек входа (см. PatternConfig)
+WINDOW_HEAD = PatternConfig.WINDOW_HEAD
+WINDOW_TAIL = PatternConfig.WINDOW_TAIL
+WINDOW_ANY = PatternConfig.WINDOW_ANY
+
+# Правило точки входа: (паттерн, фреймворк, уверенность, окно)
+EntryPointRule = Tuple[re.Pattern, str, float, str]
+
+
+@dataclass(frozen=True)
+class Ruleset:
+    """Неизменяемый набор правил для одной версии конфигурации.
+
+    Таблицы PatternConfig и конфигурации переносятся в набор один раз на
+    процесс и версию конфигурации (хэш detect_config.json): регулярные
+    выражения компилируются, списки становятся кортежами, множества -
+    frozenset. Анализаторы берут правила только из набора. Набор только
+    читается, поэтому его безопасно разделять между потоками и детекторами;
+    дочерние процессы после fork получают его готовым.
+    """
+    version: str
+    frameworks: Mapping[str, Tuple[re.Pattern, ...]]
+    test_runners: Mapping[str, Tuple[re.Pattern, ...]]
+    databases: Mapping[str, Tuple[re.Pattern, ...]]
+    clouds: Mapping[str, Tuple[re.Pattern, ...]]
+    entry_points: Mapping[str, Tuple[EntryPointRule, ...]]
+    entry_points_need_tail: Mapping[str, bool]  # Язык -> нужен ли конец файла хотя бы одному правилу
+    entry_point_head_bytes: int
+    entry_point_tail_bytes: int
+    standard_entry_files: Mapping[str, Tuple[str, ...]]
+    test_runner_dependencies: Mapping[str, Tuple[str, ...]]
+    database_dependencies: Mapping[str, Tuple[str, ...]]
+    frontend_frameworks: FrozenSet[str]
+    backend_frameworks: FrozenSet[str]
+    mobile_frameworks: FrozenSet[str]
+    vendored: VendoredClassifier
+    sampling: SamplingPolicy
+
+
+_rulesets: Dict[Tuple[str, str], Ruleset] = {}
+_rulesets_lock = threading.Lock()
+
+
+def _reset_rulesets_lock():
+    """Новая блокировка в дочернем процессе (блокировка родителя могла быть захвачена при fork)."""
+    global _rulesets_lock
+    _rulesets_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_rulesets_lock)
+
+
+def _compile_table(table: Mapping[str, Iterable[str]], flags: int = re.IGNORECASE) -> Mapping[str, Tuple[re.Pattern, ...]]:
+    """Скомпилировать таблицу имя -> паттерны с сохранением порядка."""
+    return MappingProxyType({
+        name: tuple(re.compile(pattern, flags) for pattern in patterns)
+        for name, patterns in table.items()
+    })
+
+
+def _freeze_table(table: Mapping[str, Iterable[str]]) -> Mapping[str, Tuple[str, ...]]:
+    """Неизменяемая копия таблицы имя -> значения с сохранением порядка."""
+    return MappingProxyType({name: tuple(values) for name, values in table.items()})
+
+
+def _compile(config_loader: ConfigLoader) -> Ruleset:
+    """Собрать набор правил для конфигурации."""
+    return Ruleset(
+        version=config_loader.version,
+        frameworks=_compile_table(PatternConfig.FRAMEWORK_PATTERNS),
+        test_runners=_compile_table(PatternConfig.TEST_RUNNER_PATTERNS),
+        databases=_compile_table(PatternConfig.DATABASE_PATTERNS),
+        clouds=_compile_table(PatternConfig.CLOUD_PATTERNS),
+        entry_points=MappingProxyType({
+            language: tuple(
+                (re.compile(pattern), framework, confidence, window)
+                for pattern, framework, confidence, window in patterns
+            )
+            for language, patterns in PatternConfig.ENTRY_POINT_PATTERNS.items()
+        }),
+        entry_points_need_tail=MappingProxyType({
+            language: any(window != WINDOW_HEAD for _, _, _, window in patterns)
+            for language, patterns in PatternConfig.ENTRY_POINT_PATTERNS.items()
+        }),
+        entry_point_head_bytes=PatternConfig.ENTRY_POINT_HEAD_BYTES,
+        entry_point_tail_bytes=PatternConfig.ENTRY_POINT_TAIL_BYTES,
+        standard_entry_files=_freeze_table(PatternConfig.STANDARD_ENTRY_FILES),
+        test_runner_dependencies=_freeze_table(PatternConfig.TEST_RUNNER_DEPENDENCIES),
+        database_dependencies=_freeze_table(PatternConfig.DATABASE_DEPENDENCIES),
+        frontend_frameworks=frozenset(PatternConfig.FRONTEND_FRAMEWORKS),
+        backend_frameworks=frozenset(PatternConfig.BACKEND_FRAMEWORKS),
+        mobile_frameworks=frozenset(PatternConfig.MOBILE_FRAMEWORKS),
+        vendored=VendoredClassifier.from_config(config_loader.vendored),
+        sampling=SamplingPolicy.from_config(config_loader.sampling),
+    )
+
+
+def get_ruleset(config_loader: ConfigLoader) -> Ruleset:
+    """
+    Получить набор правил для конфигурации.
+
+    Набор собирается один раз для пары (файл конфигурации, версия) и
+    пересобирается, только когда меняется хэш файла.
+
+    Args:
+        config_loader: Загрузчик конфигурации
+
+    Returns:
+        Ruleset
+    """
+    key = (str(config_loader.config_path), config_loader.version)
+    with _rulesets_lock:
+        ruleset = _rulesets.get(key)
+        if ruleset is None:
+            ruleset = _compile(config_loader)
+            # Старые версии той же конфигурации больше не нужны
+            for stale in [k for k in _rulesets if k[0] == key[0]]:
+                del _rulesets[stale]
+            _rulesets[key] = ruleset
+            logger.debug(f"Скомпилирован набор правил для конфигурации {key[0]} версии {key[1][:12]}")
+    return ruleset
@@ -0,0 +1,153 @@
+"""Стратифицированная выборка файлов для правил по содержимому."""
+import logging
+import math
+import random
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .inventory import FileEntry
+from .models import ProjectStack
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SamplingPolicy:
+    """Условие остановки выборочного анализа содержимого.
+
+    Фреймворк или тестовый раннер, которым пользуется проект, встречается
+    в заметной доле файлов своего языка. Если после n прочитанных файлов
+    языка признаков нет, вероятность пропустить элемент с долей файлов
+    не меньше min_prevalence равна (1 - min_prevalence)^n. Язык считается
+    решенным, когда эта вероятность не больше 1 - confidence.
+    """
+    min_prevalence: float = 0.01  # Минимальная доля файлов языка с признаками элемента
+    confidence: float = 0.95  # Требуемая уверенность в отсутствии ненайденных элементов
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'SamplingPolicy':
+        """
+        Создать политику из секции 'sampling' конфигурации.
+
+        Args:
+            config: Секция 'sampling' (min_prevalence, confidence)
+
+        Returns:
+            SamplingPolicy
+
+        Raises:
+            ValueError: Если min_prevalence или confidence не число строго между 0 и 1
+        """
+        values = {}
+        for name in ('min_prevalence', 'confidence'):
+            value = config.get(name, getattr(cls, name))
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 < value < 1:
+                raise ValueError(f"Параметр sampling.{name} должен быть числом строго между 0 и 1: {value!r}")
+            values[name] = float(value)
+        return cls(**values)
+
+    def required_files(self) -> int:
+        """Количество прочитанных файлов языка, после которого язык решен."""
+        return math.ceil(math.log(1 - self.confidence) / math.log(1 - self.min_prevalence))
+
+    def confidence_after(self, files: int) -> float:
+        """Уверенность после чтения files файлов языка без новых находок."""
+        return 1 - (1 - self.min_prevalence) ** files
+
+
+def _stratum(entry: FileEntry) -> Tuple[str, str]:
+    """Страта файла: язык и директория второго уровня (например, apps/web)."""
+    return entry.language or '', '/'.join(entry.rel_path.split('/')[:-1][:2])
+
+
+def stratify(entries: List[FileEntry]) -> List[FileEntry]:
+    """
+    Упорядочить файлы по кругу между стратами (язык, директория).
+
+    Любой префикс результата покрывает все части репозитория и все языки
+    примерно поровну, поэтому выборка не застревает в одной большой директории.
+    Внутри страты файлы перемешиваются с фиксированным зерном: выборка
+    случайна (иначе она смещена к первым по алфавиту поддиректориям),
+    но результат анализа воспроизводим.
+    """
+    strata: Dict[Tuple[str, str], List[FileEntry]] = {}
+    for entry in entries:
+        strata.setdefault(_stratum(entry), []).append(entry)
+
+    shuffler = random.Random(0)
+    for queue in strata.values():
+        shuffler.shuffle(queue)
+
+    ordered = []
+    queues = list(strata.values())
+    for index in range(max((len(queue) for queue in queues), default=0)):
+        ordered.extend(queue[index] for queue in queues if index < len(queue))
+    return ordered
+
+
+class ContentScan:
+    """Обход файлов для правил по содержимому: полный или выборочный.
+
+    Без политики файлы обходятся все и в исходном порядке. С политикой файлы
+    идут в стратифицированном порядке, а файлы языка перестают выдаваться,
+    когда язык решен (см. SamplingPolicy). Анализатор отмечает прочитанные
+    файлы через observe().
+    """
+
+    def __init__(self, entries: List[FileEntry], policy: Optional[SamplingPolicy] = None):
+        """
+        Инициализация обхода.
+
+        Args:
+            entries: Файлы для правил по содержимому
+            policy: Политика выборки (None - полный обход)
+        """
+        self.policy = policy
+        self.entries = stratify(entries) if policy else entries
+        self.required = policy.required_files() if policy else None
+        self.totals = Counter(entry.language for entry in entries)
+        self.read = Counter()
+
+    def __iter__(self) -> Iterator[FileEntry]:
+        for entry in self.entries:
+            if self.policy and all(self.settled(language) for language in self.totals):
+                logger.debug("Все языки решены выборкой, анализ содержимого остановлен")
+                return
+            if not self.settled(entry.language):
+                yield entry
+
+    def settled(self, language: Optional[str]) -> bool:
+        """Решен ли язык выборкой (при полном обходе - никогда)."""
+        return self.required is not None and self.read[language] >= self.required
+
+    def observe(self, entry: FileEntry):
+        """Отметить, что содержимое файла прочитано и проверено."""
+        self.read[entry.language] += 1
+
+    def report(self, stack: ProjectStack, category: str, decided: Iterable[Optional[str]] = ()):
+        """
+        Сохранить в stack.metrics['sampling'] объем выборки и достигнутую уверенность.
+
+        Уверенность равна 1.0 для языков, файлы которых прочитаны все, и для
+        языков из decided (все возможные элементы уже найдены).
+        При полном обходе ничего не сохраняется.
+
+        Args:
+            stack: ProjectStack для заполнения
+            category: Категория (frameworks, test_runners)
+            decided: Языки, для которых искать больше нечего
+        """
+        if self.policy is None:
+            return
+        decided = set(decided)
+        summary = {}
+        for language, total in sorted(self.totals.items(), key=lambda item: item[0] or ''):
+            files = self.read[language]
+            if files >= total or language in decided:
+                confidence = 1.0
+            else:
+                confidence = round(self.policy.confidence_after(files), 4)
+            summary[language or 'other'] = {'files_read': files, 'files_total': total, 'confidence': confidence}
+        stack.metrics.setdefault('sampling', {})[category] = summary
+        logger.info(f"{category}: выборочный анализ содержимого {summary}")
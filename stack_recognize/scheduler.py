@@ -0,0 +1,59 @@
+"""Планировщик правил анализаторов по стоимости."""
+import logging
+from dataclasses import dataclass
+from typing import Callable, FrozenSet, Iterable, List, Optional, Set
+
+from .models import ProjectStack
+
+logger = logging.getLogger(__name__)
+
+# Относительная стоимость правил
+COST_FILE_NAMES = 1  # Имена файлов из инвентаризации, без чтения
+COST_MANIFESTS = 2  # Манифесты (разбираются один раз за анализ)
+COST_CONTENT = 10  # Чтение исходников
+
+
+@dataclass(frozen=True)
+class Rule:
+    """Правило анализатора.
+
+    decides - вопросы (например, языки), на которые правило может ответить.
+    None означает, что правило только дополняет результат и выполняется всегда.
+    run получает открытые вопросы и возвращает вопросы, на которые ответило.
+    """
+    name: str
+    cost: int
+    run: Callable[[Set[str]], Optional[Set[str]]]
+    decides: Optional[FrozenSet[str]] = None
+
+
+def run_rules(category: str, rules: Iterable[Rule], questions: Iterable[str], stack: ProjectStack) -> Set[str]:
+    """
+    Выполнить правила категории от дешевых к дорогим.
+
+    Правило пропускается, если ни один из вопросов, на которые оно может
+    ответить, уже не открыт, - его результат не может изменить ответ.
+
+    Args:
+        category: Категория (frameworks, test_runners, databases)
+        rules: Правила категории
+        questions: Открытые вопросы (языки, для которых ответ еще не известен)
+        stack: ProjectStack (в metrics['rules'] сохраняется план)
+
+    Returns:
+        Вопросы, оставшиеся открытыми после всех правил
+    """
+    open_questions = set(questions)
+    executed: List[str] = []
+    skipped: List[str] = []
+
+    for rule in sorted(rules, key=lambda rule: rule.cost):
+        if rule.decides is not None and not (rule.decides & open_questions):
+            skipped.append(rule.name)
+            logger.debug(f"{category}: правило {rule.name} пропущено, открытых вопросов нет")
+            continue
+        executed.append(rule.name)
+        open_questions -= rule.run(set(open_questions)) or set()
+
+    stack.metrics.setdefault('rules', {})[category] = {'executed': executed, 'skipped': skipped}
+    return open_questions
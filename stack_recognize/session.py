@@ -0,0 +1,181 @@
+"""Сессия анализа одного checkout: поля стека вычисляются по требованию."""
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, List, Optional, Set
+
+from .deadline import Deadline
+from .inventory import FileInventory
+from .models import ModuleStack, ProjectStack
+
+logger = logging.getLogger(__name__)
+
+# Шаги анализа в порядке выполнения
+ANALYSIS_STEPS = (
+    'language', 'framework', 'devops', 'test', 'database', 'cloud',
+    'build_tools', 'cicd', 'hints', 'entry_point', 'toolchain',
+)
+
+# Поле ProjectStack -> шаги, которые его заполняют (с учетом зависимостей между шагами)
+FIELD_STEPS = {
+    'languages': ('language',),
+    'language_stats': ('language',),
+    'package_manager': ('language',),
+    # Фреймворки из package.json определяет LanguageAnalyzer, классификацию - FrameworkAnalyzer
+    'frameworks': ('language', 'framework'),
+    'frontend_frameworks': ('language', 'framework'),
+    'backend_frameworks': ('language', 'framework'),
+    'mobile_frameworks': ('language', 'framework'),
+    'test_runner': ('test',),
+    'docker': ('devops',),
+    'kubernetes': ('devops',),
+    'terraform': ('devops',),
+    'databases': ('database',),
+    'cloud_platforms': ('cloud',),
+    'build_tools': ('build_tools',),
+    'cicd': ('cicd',),
+    'hints': ('hints',),
+    'entry_points': ('entry_point',),
+    'main_entry_point': ('entry_point',),
+    # Версии Java/Go/Node.js/Python в files_detected['<инструмент>_version']
+    'toolchain_versions': ('toolchain',),
+}
+
+
+def steps_for_fields(fields: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Шаги анализа, нужные для заполнения полей.
+
+    Args:
+        fields: Поля ProjectStack (см. FIELD_STEPS); None - все поля
+
+    Returns:
+        Шаги в порядке выполнения
+    """
+    if fields is None:
+        return list(ANALYSIS_STEPS)
+    steps: Set[str] = set()
+    for name in fields:
+        if name not in FIELD_STEPS:
+            raise ValueError(f"Неизвестное поле стека: {name}")
+        steps.update(FIELD_STEPS[name])
+    return [step for step in ANALYSIS_STEPS if step in steps]
+
+
+@dataclass
+class AnalysisTarget:
+    """Корень анализа (весь scope или модуль монорепозитория) и выполненные для него шаги."""
+    root: Path
+    stack: ProjectStack
+    inventory: FileInventory
+    module_path: Optional[str] = None  # None - корень анализа
+    done: Set[str] = field(default_factory=set)
+
+
+class AnalysisSession:
+    """Анализ одного checkout репозитория.
+
+    Сессия владеет временной директорией с клоном: запрошенные поля
+    вычисляются сразу, остальные - позже через ensure() без повторного
+    клонирования и обхода файлов. Каждый шаг выполняется для корня не более
+    одного раза. После использования сессию нужно закрыть (close() или with).
+    Дедлайн сессии общий для всех вызовов ensure: шаги, не начатые до него,
+    пропускаются.
+    """
+
+    def __init__(
+        self,
+        detector,
+        temp_dir: str,
+        repo_path: Path,
+        target: AnalysisTarget,
+        modules: Optional[List[ModuleStack]] = None,
+        module_targets: Optional[List[AnalysisTarget]] = None,
+        max_workers: Optional[int] = None,
+        files_listing_path: Optional[str] = None,
+        count_lines: bool = False,
+        deadline: Optional[Deadline] = None,
+        events=None,
+    ):
+        """
+        Инициализация сессии (создается через ProjectStackDetector.open_session).
+
+        Args:
+            detector: ProjectStackDetector, выполняющий шаги анализа
+            temp_dir: Временная директория с клоном
+            repo_path: Корень репозитория
+            target: Корень анализа
+            modules: Дерево модулей монорепозитория (stack.modules)
+            module_targets: Корни анализа модулей
+            max_workers: Количество потоков для анализа модулей
+            files_listing_path: Файл для полного списка файлов по языкам
+            count_lines: Считать доли языков также по строкам
+            deadline: Дедлайн шагов анализа (None - без ограничения)
+            events: EventSink для событий хода анализа (None - без событий)
+        """
+        self.detector = detector
+        self.temp_dir = temp_dir
+        self.repo_path = repo_path
+        self.target = target
+        self.module_targets = module_targets or []
+        self.max_workers = max_workers
+        self.files_listing_path = files_listing_path
+        self.count_lines = count_lines
+        self.deadline = deadline
+        self.events = events
+        self.stack.modules = modules or []
+        self._lock = threading.Lock()
+
+    @property
+    def stack(self) -> ProjectStack:
+        """Стек корня анализа (заполняется по мере вызова ensure)."""
+        return self.target.stack
+
+    def ensure(self, fields: Optional[Iterable[str]] = None) -> ProjectStack:
+        """
+        Вычислить поля стека, если они еще не вычислены.
+
+        Args:
+            fields: Поля ProjectStack (см. FIELD_STEPS); None - все поля
+
+        Returns:
+            ProjectStack корня анализа
+        """
+        steps = steps_for_fields(fields)
+        with self._lock:
+            if self.temp_dir is None:
+                raise RuntimeError("Сессия анализа закрыта")
+            self.detector._run_steps(self, self.target, steps)
+
+            pending = [target for target in self.module_targets if not set(steps) <= target.done]
+            if pending:
+                workers = self.max_workers or min(len(pending), os.cpu_count() or 1)
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    list(executor.map(lambda target: self._run_module_steps(target, steps), pending))
+        return self.stack
+
+    def _run_module_steps(self, target: AnalysisTarget, steps: List[str]):
+        """Шаги анализа модуля: ошибка модуля не прерывает анализ остальных."""
+        try:
+            self.detector._run_steps(self, target, steps)
+        except Exception as e:
+            logger.error(f"Ошибка при анализе модуля {target.module_path}: {e}")
+            target.stack.hints.append(f"Ошибка анализа: {str(e)}")
+
+    def close(self):
+        """Удалить временную директорию с клоном."""
+        with self._lock:
+            if self.temp_dir and os.path.exists(self.temp_dir):
+                shutil.rmtree(self.temp_dir)
+                logger.info(f"Временная директория {self.temp_dir} удалена")
+            self.temp_dir = None
+
+    def __enter__(self) -> 'AnalysisSession':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
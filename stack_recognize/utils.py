@@ -1,4 +1,5 @@
 """Вспомогательные функции для проекта."""
+import codecs
 import re
 import os
 from typing import Optional, List
@@ -87,7 +88,9 @@ def should_ignore_path(path: Path) -> bool:
         # Сборка
         'target', 'bin', 'obj', 'out', '.gradle',
         # Зависимости
-        'vendor', 'bower_components', 'packages',
+        # packages/ не игнорируется: там обычно лежат workspace-пакеты монорепозитория,
+        # пакеты NuGet определяются классификатором стороннего кода (секция vendored)
+        'vendor', 'bower_components',
         # Другое
         '.DS_Store', 'Thumbs.db', '.tmp',
         # Убрали 'tmp' и 'temp' - слишком общие имена, которые могут быть в проектах
@@ -104,7 +107,10 @@ def should_ignore_path(path: Path) -> bool:
         start_idx = 1
     
     # Важные конфигурационные файлы в корне, которые не нужно игнорировать
-    important_root_files = {'.dockerignore', '.gitignore', '.env.example', '.github', '.gitlab', '.circleci'}
+    important_root_files = {
+        '.dockerignore', '.gitignore', '.env.example', '.github', '.gitlab', '.circleci',
+        '.nvmrc', '.node-version', '.python-version',
+    }
     
     # Проверить каждую часть пути (начиная с start_idx)
     for i, part in enumerate(parts[start_idx:], start=start_idx):
@@ -191,6 +197,75 @@ def get_relevant_files(
     return relevant_files
 
 
+# Размер первого блока файла, по которому определяется бинарное содержимое
+SNIFF_BLOCK_SIZE = 8192
+
+# Расширения заведомо бинарных файлов (определяются без чтения)
+BINARY_EXTENSIONS = {
+    '.jar', '.war', '.ear', '.class', '.pyc', '.pyo', '.so', '.dll', '.dylib', '.exe', '.o', '.a',
+    '.png', '.jpg', '.jpeg', '.gif', '.ico', '.bmp', '.webp', '.pdf',
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar',
+    '.woff', '.woff2', '.ttf', '.otf', '.eot',
+}
+
+# Управляющие байты, допустимые в тексте: \b \t \n \f \r и ESC
+_TEXT_CONTROL_BYTES = {8, 9, 10, 12, 13, 27}
+
+# Максимальная длина строки, передаваемой в регулярные выражения
+MAX_LINE_LENGTH = 500
+
+# Строка длиннее этого порога признак минифицированного файла
+MINIFIED_LINE_LENGTH = 1000
+
+# Имена минифицированных и сгенерированных файлов
+_GENERATED_NAME_PATTERN = re.compile(
+    r'(\.min\.(js|css|mjs)|\.bundle\.js|\.chunk\.js'
+    r'|\.pb\.go|\.pb\.gw\.go|_pb2(_grpc)?\.pyi?|_pb\.(js|ts|d\.ts)|_grpc_pb\.(js|ts|d\.ts)'
+    r'|\.generated\.\w+|_generated\.go|\.g\.dart)$',
+    re.IGNORECASE,
+)
+
+# Маркеры сгенерированного кода в заголовке файла
+_GENERATED_HEADER_PATTERN = re.compile(
+    r'Code generated .* DO NOT EDIT|@generated|<auto-generated|'
+    r'Generated by the protocol buffer compiler|Autogenerated by Thrift|DO NOT EDIT!',
+)
+
+# Сколько первых строк проверяется на маркеры генерации
+_GENERATED_HEADER_LINES = 10
+
+
+def is_binary_content(block: bytes) -> bool:
+    """
+    Проверка начала файла на бинарное содержимое.
+
+    Блок считается бинарным, если в нем есть NUL-байты, больше 30% управляющих
+    символов или он не декодируется как UTF-8 и больше 30% байт не ASCII.
+
+    Args:
+        block: Первые байты файла (обычно SNIFF_BLOCK_SIZE)
+
+    Returns:
+        True если содержимое бинарное
+    """
+    if not block:
+        return False
+    if b'\x00' in block:
+        return True
+
+    control = sum(1 for byte in block if (byte < 32 and byte not in _TEXT_CONTROL_BYTES) or byte == 127)
+    if control / len(block) > 0.3:
+        return True
+
+    try:
+        # Блок может обрываться посреди многобайтового символа (final=False)
+        codecs.getincrementaldecoder('utf-8')().decode(block, final=False)
+    except UnicodeDecodeError:
+        high = sum(1 for byte in block if byte >= 128)
+        return high / len(block) > 0.3
+    return False
+
+
 def read_file_sample(
     file_path: Path, 
     max_lines: int = 100, 
@@ -200,6 +275,7 @@ def read_file_sample(
     Читать только начало файла для быстрого анализа паттернов.
     
     Для большинства паттернов (импорты, объявления) достаточно первых строк.
+    Файл читается в двоичном режиме, бинарное содержимое не декодируется.
     
     Args:
         file_path: Путь к файлу
@@ -207,30 +283,67 @@ def read_file_sample(
         max_bytes: Максимальное количество байт для чтения
         
     Returns:
-        Строка с содержимым начала файла
+        Строка с содержимым начала файла (пустая для бинарных файлов)
     """
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = ''
-            bytes_read = 0
-            
-            for line_num, line in enumerate(f):
-                if line_num >= max_lines:
-                    break
-                
-                line_bytes = len(line.encode('utf-8'))
-                if bytes_read + line_bytes > max_bytes:
-                    # Читаем только часть строки, чтобы не превысить лимит
-                    remaining_bytes = max_bytes - bytes_read
-                    if remaining_bytes > 0:
-                        content += line[:remaining_bytes]
-                    break
-                
-                content += line
-                bytes_read += line_bytes
-            
-            return content
-    except (UnicodeDecodeError, IOError, OSError):
-        # Если файл бинарный или недоступен, возвращаем пустую строку
+        with open(file_path, 'rb') as f:
+            block = f.read(max_bytes)
+    except (IOError, OSError):
+        # Если файл недоступен, возвращаем пустую строку
+        return ''
+
+    if is_binary_content(block[:SNIFF_BLOCK_SIZE]):
         return ''
+    return decode_sample(block, max_lines)
+
+
+def decode_sample(block: bytes, max_lines: int = 100) -> str:
+    """Декодировать прочитанный блок и оставить не более max_lines строк."""
+    return limit_sample(block.decode('utf-8', errors='ignore'), max_lines)
+
+
+def limit_sample(text: str, max_lines: int = 100, max_line_length: int = MAX_LINE_LENGTH) -> str:
+    """
+    Оставить не более max_lines строк, каждую обрезать до max_line_length символов.
+
+    Ограничение длины строки защищает регулярные выражения вида
+    'import.*from' от долгого перебора на многокилобайтных строках.
+    """
+    lines = text.split('\n', max_lines)
+    truncated = len(lines) > max_lines
+    lines = [line[:max_line_length] for line in lines[:max_lines]]
+    return '\n'.join(lines) + ('\n' if truncated else '')
+
+
+def limit_sample_tail(text: str, max_lines: int = 100, max_line_length: int = MAX_LINE_LENGTH) -> str:
+    """Оставить не более max_lines последних строк, каждую обрезать до max_line_length символов."""
+    lines = text.rsplit('\n', max_lines)
+    if len(lines) > max_lines:
+        lines = lines[1:]
+    return '\n'.join(line[:max_line_length] for line in lines)
+
+
+def is_generated_name(name: str) -> bool:
+    """Проверка имени файла на минифицированный/сгенерированный код (*.min.js, *.pb.go, *_pb2.py)."""
+    return bool(_GENERATED_NAME_PATTERN.search(name))
+
+
+def is_generated_content(text: str) -> bool:
+    """
+    Проверка начала файла на сгенерированный или минифицированный код.
+
+    Признаки: маркеры генераторов в заголовке ('Code generated ... DO NOT EDIT',
+    '@generated' и т.п.) или строки длиннее MINIFIED_LINE_LENGTH символов.
+
+    Args:
+        text: Декодированное начало файла (без обрезки строк)
+
+    Returns:
+        True если файл сгенерирован или минифицирован
+    """
+    lines = text.split('\n')
+    if any(len(line) > MINIFIED_LINE_LENGTH for line in lines):
+        return True
+    header = '\n'.join(lines[:_GENERATED_HEADER_LINES])
+    return bool(_GENERATED_HEADER_PATTERN.search(header))
 
@@ -0,0 +1,93 @@
+"""Определение директорий со сторонним (vendored) кодом."""
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Сколько байт файла-маркера читается для проверки паттерна
+_MARKER_SAMPLE_BYTES = 4096
+
+
+class VendoredClassifier:
+    """Классификатор директорий со сторонним кодом (по аналогии с linguist vendor.yml).
+
+    Директория считается сторонней, если ее путь соответствует одному из
+    регулярных выражений секции 'vendored.paths' конфигурации или в ней
+    лежит файл-маркер из 'vendored.markers' (с опциональным паттерном
+    содержимого). Проверка выполняется один раз на директорию при обходе.
+    """
+
+    def __init__(self, paths: Optional[List[str]] = None, markers: Optional[List[Dict[str, str]]] = None):
+        """
+        Инициализация классификатора.
+
+        Args:
+            paths: Регулярные выражения по относительному пути директории (с '/' в конце)
+            markers: Файлы-маркеры: {'file': имя, 'pattern': регулярное выражение (опционально)}
+        """
+        self.path_patterns = [re.compile(pattern) for pattern in paths or []]
+        self.markers: Dict[str, Optional[re.Pattern]] = {}
+        for marker in markers or []:
+            pattern = marker.get('pattern')
+            self.markers[marker['file']] = re.compile(pattern, re.MULTILINE) if pattern else None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'VendoredClassifier':
+        """Создать классификатор из секции 'vendored' конфигурации."""
+        return cls(config.get('paths', []), config.get('markers', []))
+
+    def match_path(self, rel_dir: str) -> bool:
+        """Проверка относительного пути директории по регулярным выражениям."""
+        path = rel_dir.strip('/') + '/'
+        return any(pattern.search(path) for pattern in self.path_patterns)
+
+    def match_markers(self, dir_path: Path, file_names: Iterable[str]) -> Optional[str]:
+        """
+        Проверка файлов-маркеров директории.
+
+        Args:
+            dir_path: Путь к директории
+            file_names: Имена файлов директории
+
+        Returns:
+            Имя сработавшего маркера или None
+        """
+        for file_name in file_names:
+            if file_name not in self.markers:
+                continue
+            pattern = self.markers[file_name]
+            if pattern is None:
+                return file_name
+            try:
+                with open(dir_path / file_name, 'rb') as f:
+                    content = f.read(_MARKER_SAMPLE_BYTES).decode('utf-8', errors='ignore')
+            except OSError:
+                continue
+            if pattern.search(content):
+                return file_name
+        return None
+
+
+def measure_directory(dir_path: Path) -> Tuple[int, int]:
+    """
+    Подсчитать количество файлов и суммарный размер поддерева без чтения файлов.
+
+    Args:
+        dir_path: Путь к директории
+
+    Returns:
+        Кортеж (количество файлов, размер в байтах)
+    """
+    files = 0
+    size = 0
+    for current, _, file_names in os.walk(dir_path):
+        for file_name in file_names:
+            try:
+                size += os.lstat(os.path.join(current, file_name)).st_size
+            except OSError:
+                continue
+            files += 1
+    return files, size